@@ -0,0 +1,49 @@
+import threading
+import pygame
+import sprites
+
+# Fonts on first use and a background prefetch of the game's images and fonts.
+#
+#   font = assets.font("Comic Sans MS", 18)            # pygame.font.SysFont
+#   font = assets.font(None, 36, system=False)         # pygame.font.Font, None for the default font
+#
+# Nothing is loaded at import. Fonts are created on first use and kept for the whole run, like the images in the
+# sprites cache, so returning to the menu or starting another level reuses them. prefetch() loads and transforms
+# images on a background thread, e.g. the game's images while the menu is shown. Fonts are created and conversion
+# to the display format happens on the main thread only (load_fonts(), sprites.warm() or first use): FreeType
+# isn't safe to use from two threads, and the main thread renders text every frame. wait() joins the prefetch.
+
+fonts = {}        # (name, size, system) -> font
+worker = None     # Prefetch thread, None when none was started
+
+def font(name: str | None, size: int, system: bool = True) -> pygame.font.Font:
+    key = (name, size, system)
+    cached = fonts.get(key)
+    if cached is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        cached = fonts[key] = pygame.font.SysFont(name, size) if system else pygame.font.Font(name, size)
+    return cached
+
+def load_fonts(fontKeys=()):
+    """Create the given font keys (name, size[, system]), main thread only."""
+    for key in fontKeys:
+        font(*key)
+
+def load(images=()):
+    """Load and transform the given sprite keys (image, angle, scale) without converting, safe on any thread."""
+    for key in images:
+        sprites.prepare(*key)
+
+def prefetch(images=()):
+    """load() on a background thread."""
+    global worker
+    if worker is not None and worker.is_alive():
+        return
+    worker = threading.Thread(target=load, args=(images,), name="asset prefetch", daemon=True)
+    worker.start()
+
+def wait():
+    """Wait for a running prefetch to finish."""
+    if worker is not None:
+        worker.join()
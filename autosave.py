@@ -0,0 +1,88 @@
+import os
+import queue
+import threading
+import time
+import profiler
+import savefile
+
+# Periodic autosave that keeps the game loop running while it writes.
+#
+# At a tick boundary the main thread only takes a savefile.Snapshot (copies of the entity states, the costly part
+# is a dict copy per entity, timed as profiler section "autosave snapshot"). Encoding and the atomic write happen
+# on a worker thread. At most one save is queued: while the previous one is still being written a due autosave is
+# skipped, so a slow disk can never pile up snapshots or stall the frame.
+
+class AutoSaver:
+    directory: str
+    slots: int      # Autosaves rotate through this many files
+    interval: float # Real seconds between autosaves, 0 disables them
+    slot: int       # Slot the next autosave goes to
+    lastPath: str | None
+    lastError: Exception | None
+    lastSnapshotTime: float # Seconds the last snapshot took on the main thread
+    lastWriteTime: float    # Seconds the last encode and write took on the worker
+
+    def __init__(self, directory: str = "autosaves", slots: int = 3, interval: float = 60.0):
+        self.directory = directory
+        self.slots = max(1, slots)
+        self.interval = interval
+        self.slot = 0
+        self.lastPath = None
+        self.lastError = None
+        self.lastSnapshotTime = 0.0
+        self.lastWriteTime = 0.0
+        self.nextSave = time.monotonic() + interval
+        self.writing = False
+        self.pending = queue.Queue(maxsize=1)
+        self.worker = threading.Thread(target=self._work, name="autosave", daemon=True)
+        self.worker.start()
+
+    def slot_path(self, slot: int) -> str:
+        return os.path.join(self.directory, f"autosave{slot + 1}.sav")
+
+    def busy(self) -> bool:
+        return self.writing
+
+    def tick(self, entityList, nextId=None):
+        """Call at a tick boundary, autosaves to the next slot once the interval has passed."""
+        if self.interval <= 0 or time.monotonic() < self.nextSave:
+            return
+        if self.save(entityList, self.slot_path(self.slot), nextId):
+            self.slot = (self.slot + 1) % self.slots
+            self.nextSave = time.monotonic() + self.interval
+
+    def save(self, entityList, path: str, nextId=None) -> bool:
+        """Snapshot the entities and write them to path in the background. False if a save is still in progress."""
+        if self.busy():
+            return False
+        started = time.perf_counter()
+        profiled = profiler.start()
+        snapshot = savefile.Snapshot(entityList, nextId)
+        profiler.stop("autosave snapshot", profiled)
+        self.lastSnapshotTime = time.perf_counter() - started
+        self.writing = True
+        self.pending.put((snapshot, path))
+        return True
+
+    def wait(self):
+        """Block until the queued save is written, e.g. before quitting."""
+        self.pending.join()
+
+    def _work(self):
+        while True:
+            snapshot, path = self.pending.get()
+            started = time.perf_counter()
+            try:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                savefile.write(savefile.encode_snapshot(snapshot), path)
+                self.lastPath = path
+                self.lastError = None
+            except Exception as error:
+                # Keep the game running, the next autosave tries again
+                self.lastError = error
+                print(f"Autosave to {path} failed: {error}")
+            self.lastWriteTime = time.perf_counter() - started
+            self.writing = False
+            self.pending.task_done()
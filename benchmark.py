@@ -0,0 +1,371 @@
+import argparse
+import json
+import math
+import os
+import pickle
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import pygame
+import level
+import leveldef
+import periscopeui
+import scenario
+import sensors
+import settings
+import ship
+import sprites
+import tacticalmap
+
+# Benchmarks for the simulation, run with `python benchmark.py <suite>`.
+
+class BenchTorpedo(ship.torpedo):
+    # Torpedo that stays in the level after a hit so the same check can be repeated
+    def destroy(self):
+        pass
+
+def linear_check_attack(torp: ship.torpedo):
+    """Hit check without the spatial index, scanning every entity of the level."""
+    start = -round(torp.speed)+math.floor(torp.length/2)
+    end = math.ceil(torp.length/2)
+    for entity in level.entityList:
+        if entity != torp and math.sqrt((entity.x - torp.x)**2 + (entity.y - torp.y)**2) < 500:
+            for i in range(start, end):
+                if ship.point_in_rect(torp.x + i*math.cos(math.radians(torp.heading)), torp.y + i*math.sin(math.radians(torp.heading)), entity.x, entity.y, entity.width, entity.length, entity.heading):
+                    return True
+    return False
+
+def sampled_hit(torp: ship.torpedo, entity: ship.Ship) -> bool:
+    """Point sampling along the torpedo path, as check_attack did before the swept test."""
+    for i in range(-round(torp.speed)+math.floor(torp.length/2), math.ceil(torp.length/2)):
+        if ship.point_in_rect(torp.x + i*math.cos(math.radians(torp.heading)), torp.y + i*math.sin(math.radians(torp.heading)), entity.x, entity.y, entity.width, entity.length, entity.heading):
+            return True
+    return False
+
+def swept_hit(torp: ship.torpedo, entity: ship.Ship) -> bool:
+    dx = math.cos(math.radians(torp.heading))
+    dy = math.sin(math.radians(torp.heading))
+    x1 = torp.x + torp.length/2 * dx
+    y1 = torp.y + torp.length/2 * dy
+    heading = math.radians(entity.heading)
+    return ship.segment_rect_intersection(x1 - torp.speed * dx, y1 - torp.speed * dy, x1, y1, entity.x, entity.y, entity.width, entity.length, math.cos(heading), math.sin(heading)) is not None
+
+def build_hit_scenario(ships: int, torpedoes: int = 4, seed: int = 0) -> list[ship.torpedo]:
+    """Transports spread at constant density around the player, with a spread of torpedoes in flight."""
+    rng = random.Random(seed)
+    level.enableWorld(False)
+    level.loadEntities([])
+    player = ship.playerShip(0, 0, 0, 0)
+    half = math.sqrt(ships) * 200
+    for i in range(ships):
+        ship.transport(i + 1, rng.uniform(-half, half), rng.uniform(-half, half), rng.uniform(0, 360), "cargo", 1, 1)
+    torps = []
+    for i in range(torpedoes):
+        player.x, player.y = rng.uniform(-half, half), rng.uniform(-half, half)
+        torp = BenchTorpedo(ships + 1 + i, 0, ship.torpedoStat[3], player)
+        torp.speed = ship.torpedoStat[3]
+        torps.append(torp)
+    player.x, player.y = 0, 0
+    level.loadEntities(level.entityList)
+    return torps
+
+def time_calls(fn, torps, min_time: float) -> float:
+    """Calls per second of fn over the torpedoes, repeated for at least min_time seconds."""
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0
+    while elapsed < min_time:
+        for torp in torps:
+            fn(torp)
+        calls += len(torps)
+        elapsed = time.perf_counter() - start
+    return calls / elapsed
+
+def bench_hit_checks(counts: list[int], min_time: float):
+    print(f"{'ships':>8} {'grid checks/s':>15} {'linear checks/s':>17} {'speedup':>8}")
+    for count in counts:
+        torps = build_hit_scenario(count)
+        grid_rate = time_calls(ship.torpedo.check_attack, torps, min_time)
+        linear_rate = time_calls(linear_check_attack, torps, min_time)
+        print(f"{count:>8} {grid_rate:>15.0f} {linear_rate:>17.0f} {grid_rate / linear_rate:>7.1f}x")
+
+def bench_collision(min_time: float, pairs: int = 1000):
+    torps = build_hit_scenario(pairs, pairs)
+    targets = [entity for entity in level.entityList if entity.type == "transport"]
+    # Move each target next to its torpedo so roughly half of the tests are hits
+    rng = random.Random(1)
+    for torp, target in zip(torps, targets):
+        target.x = torp.x + rng.uniform(-80, 80)
+        target.y = torp.y + rng.uniform(-80, 80)
+    agree = sum(sampled_hit(torp, target) == swept_hit(torp, target) for torp, target in zip(torps, targets))
+    hits = sum(swept_hit(torp, target) for torp, target in zip(torps, targets))
+    print(f"{pairs} torpedo/target pairs, {hits} hits, sampled and swept agree on {agree}")
+    for name, fn in (("sampled", sampled_hit), ("swept", swept_hit)):
+        tests = 0
+        start = time.perf_counter()
+        elapsed = 0
+        while elapsed < min_time:
+            for torp, target in zip(torps, targets):
+                fn(torp, target)
+            tests += pairs
+            elapsed = time.perf_counter() - start
+        print(f"{name:>8}: {elapsed / tests * 1e6:.2f} us per test")
+
+def blit_rate(draw, min_time: float) -> float:
+    """Calls of draw per second."""
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0
+    while elapsed < min_time:
+        for _ in range(100):
+            draw()
+        calls += 100
+        elapsed = time.perf_counter() - start
+    return calls / elapsed
+
+def bench_blits(min_time: float):
+    """Blits per second of the UI images as loaded and transformed per blit, against the sprite cache."""
+    screen = pygame.display.get_surface() or pygame.display.set_mode((1024, 880))
+    import gameui
+    sprites.warm()
+    def loaded(name, angle=0, scale=1):
+        image = pygame.image.load(os.path.join(sprites.IMG_PATH, name))
+        return pygame.transform.scale_by(pygame.transform.rotate(image, angle), scale)
+    raw_wheel = loaded("wheel.png", 0, settings.SCREEN_SCALING_RATIO)
+    cases = [
+        # name, blit before, blit with the cache
+        ("background", loaded(*gameui.bg_sprite), sprites.get(*gameui.bg_sprite)),
+        ("throttler", loaded(*gameui.throttler_sprite), sprites.get(*gameui.throttler_sprite)),
+        ("wheel", lambda: pygame.transform.rotate(raw_wheel, -30), sprites.get(*gameui.wheel_sprites[1])),
+        ("arrow", loaded(*gameui.button_sprites[0]), sprites.get(*gameui.button_sprites[0])),
+        ("bubble", pygame.transform.scale(loaded("bubble.png"), (29, 29)), sprites.get("bubble.png", scale=(29, 29))),
+    ]
+    print(f"{'image':>12} {'before/s':>10} {'cached/s':>10} {'speedup':>8}")
+    for name, before, after in cases:
+        rates = []
+        for image in (before, after):
+            if callable(image):
+                rates.append(blit_rate(lambda: screen.blit(image(), (100, 100)), min_time))
+            else:
+                rates.append(blit_rate(lambda: screen.blit(image, (100, 100)), min_time))
+        print(f"{name:>12} {rates[0]:>10.0f} {rates[1]:>10.0f} {rates[1] / rates[0]:>7.1f}x")
+
+# Run in a fresh interpreter by bench_startup, prints the milliseconds until gameui and menu are imported, until the
+# first menu frame is shown and until the first frame of a second menu visit, after the game assets were warmed as
+# when a level starts. Each frame ends its menu with a QUIT.
+STARTUP_SCRIPT = """
+import time
+started = time.perf_counter()
+import pygame
+import menu
+import gameui
+import sensors
+import settings
+imported = time.perf_counter()
+pygame.init()
+screen = pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT))
+frames = []
+flip = pygame.display.flip
+def first_flip():
+    flip()
+    frames.append(time.perf_counter())
+    pygame.event.post(pygame.event.Event(pygame.QUIT))
+pygame.display.flip = first_flip
+menu.menu(screen, pygame.time.Clock(), 60, gameui.prefetch_assets)
+gameui.warm_sprites()
+again = time.perf_counter()
+menu.menu(screen, pygame.time.Clock(), 60, gameui.prefetch_assets)
+print((imported - started) * 1e3, (frames[0] - started) * 1e3, (frames[1] - again) * 1e3)
+"""
+
+def bench_startup(runs: int):
+    """Median time to import the UI and show the first menu frame, in new processes."""
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        samples.append([float(value) for value in output.split()[-3:]])
+    imported, firstFrame, revisit = (statistics.median(column) for column in zip(*samples))
+    print(f"import {imported:.1f} ms, first menu frame {firstFrame:.1f} ms, menu revisit frame {revisit:.1f} ms (median of {runs})")
+
+def convoy_definition(ships: int) -> dict:
+    """Level definition of the player and one escorted convoy of ships in total."""
+    columns = math.ceil(math.sqrt(ships * 0.9))
+    rows = max(1, int(ships * 0.9) // columns)
+    return {"player": {"x": 0, "y": 0},
+            "convoys": [{"x": 0, "y": 400 * (rows + 4), "columns": columns, "rows": rows, "jitter": 50, "throttle": 50, "behaviour": "safe",
+                         "escorts": {"count": max(0, ships - columns * rows), "behaviour": "aware", "combat": "aggressive"}}]}
+
+def bench_levels(counts: list[int], repeat: int):
+    """Load times of convoy level definitions, built from scratch, from their cache and as a pickle."""
+    print(f"{'ships':>8} {'parse ms':>9} {'compile ms':>11} {'cached ms':>10} {'pickle ms':>10} {'loadSave ms':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        leveldef.CACHE_DIR = os.path.join(directory, "levelcache")
+        for count in counts:
+            path = os.path.join(directory, f"convoy{count}.json")
+            with open(path, "w") as file:
+                json.dump(convoy_definition(count), file)
+            with open(path, "rb") as file:
+                data = file.read()
+            parse = timed(lambda: leveldef.parse(data), repeat)
+            build = timed(lambda: leveldef.compile_level(path, data), repeat)
+            cached = timed(lambda: leveldef.load(path), repeat)
+            pickled = pickle.dumps(leveldef.load(path))
+            unpickle = timed(lambda: pickle.loads(pickled), repeat)
+            loadSave = timed(lambda: level.loadSave(path), repeat)
+            print(f"{len(level.entityList) - 1:>8} {parse * 1e3:>9.2f} {build * 1e3:>11.1f} {cached * 1e3:>10.1f} {unpickle * 1e3:>10.1f} {loadSave * 1e3:>12.1f}")
+
+def timed(fn, repeat: int) -> float:
+    """Median seconds per call of fn over repeat calls."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def build_sim_scenario(total: int, seed: int = 0) -> dict:
+    destroyers, transports, torpedoes = scenario.split_entities(total)
+    scenario.build_scenario(destroyers, transports, torpedoes, seed=seed, torpedoType=BenchTorpedo)
+    # Keep the player alive so the destroyer AI keeps running
+    player = level.playerShip
+    player.health_max = player.health = 10 ** 12
+    # Put the player just outside the escort screen and give every escort a contact on it, so the AI timings measure
+    # steering and gunnery instead of the early returns of destroyers that see nothing
+    escorts = list(level.registry.of_type("destroyer"))
+    player.x, player.y = escorts[0].x + 500, escorts[0].y
+    for escort in escorts:
+        escort.spottedPlayer = True
+        escort.lastKnownPosition = (player.x, player.y)
+        escort.lastKnownTime = level.tickCount
+        escort.lastKnownHeading = player.heading
+        escort.lastKnownSpeed = player.speed
+        # Reloaded on every call, each timed AI pass fires the guns in range
+        escort.gun_time_reload = 0
+        sensors.tracking[escort.id] = escort
+    return {"destroyers": destroyers, "transports": transports, "torpedoes": torpedoes}
+
+def engaging(player: ship.Ship, destroyers) -> int:
+    """Destroyers with a contact on the player and the player in gun range."""
+    return sum(1 for escort in destroyers if escort.lastKnownPosition is not None and escort.has_gun
+               and math.hypot(player.x - escort.x, player.y - escort.y) <= escort.gun_range)
+
+def bench_sim_scenario(total: int, repeat: int) -> dict:
+    """Time the main simulation and drawing paths on a generated scenario of total entities."""
+    result = {"entities": total}
+    result.update(build_sim_scenario(total))
+    player = level.playerShip
+    destroyers = [entity for entity in level.entityList if entity.type == "destroyer"]
+    torps = [entity for entity in level.entityList if entity.type == "torpedo"]
+    result["engaging"] = engaging(player, destroyers)
+    assert result["engaging"] > 0, "no destroyer is engaging the player, the AI columns would time early returns"
+
+    def check_all():
+        for torp in torps:
+            torp.check_attack()
+    result["check_attack_us"] = timed(check_all, repeat) / len(torps) * 1e6
+
+    def ai_all():
+        for escort in destroyers:
+            escort.ai_combat_behavior(player)
+            escort.ai_gun_behavior(player)
+    result["ai_combat_behavior_us"] = timed(ai_all, repeat) / len(destroyers) * 1e6
+
+    samples = []
+    for _ in range(repeat):
+        level.projectiles.clear()
+        for escort in destroyers:
+            escort.attack_depth_charge(player)
+        # Every charge from drop to detonation
+        start = time.perf_counter()
+        while len(level.projectiles):
+            level.projectiles.update()
+        samples.append(time.perf_counter() - start)
+    result["depth_charges_us"] = statistics.median(samples) / len(destroyers) * 1e6
+
+    surface = pygame.Surface((1024, 880))
+    result["debug_draw_ms"] = timed(lambda: level.debugDrawLevel(surface), repeat) * 1e3
+    # Periscope trained on the convoy ahead, 40 degree field of view like the game
+    result["periscope_draw_ms"] = timed(lambda: periscopeui.render_periscope(surface, 90, 40, player), repeat) * 1e3
+    # Tactical map zoomed out over the whole scenario, the most contacts it can show
+    camera = tacticalmap.camera
+    zoom = camera.zoom
+    camera.zoom = tacticalmap.ZOOM_MIN
+    tacticalmap.render_tactical_map(surface)
+    result["map_draw_ms"] = timed(lambda: tacticalmap.render_tactical_map(surface), repeat) * 1e3
+    camera.zoom = zoom
+
+    result["update_level_ms"] = timed(lambda: level.updateLevel(False), repeat) * 1e3
+    build_sim_scenario(total)
+    level.enableWorld()
+    result["update_level_world_ms"] = timed(lambda: level.updateLevel(False), repeat) * 1e3
+    destroyers = list(level.registry.of_type("destroyer"))
+    assert engaging(level.playerShip, destroyers) > 0, "no destroyer is engaging the player in the world run"
+    def world_ai():
+        level.world.combat_ai(level.playerShip, destroyers)
+        level.world.gun_ai(level.playerShip, destroyers)
+    result["combat_ai_world_us"] = timed(world_ai, repeat) / len(destroyers) * 1e6
+    level.enableWorld(False)
+    return result
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def bench_sim(counts: list[int], repeat: int, output: str | None):
+    results = []
+    print(f"{'entities':>8} {'update ms':>10} {'world ms':>9} {'hit us':>8} {'ai us':>7} {'world ai us':>12} {'engaging':>9} {'charges us':>11} {'draw ms':>8} {'scope ms':>9} {'map ms':>7}")
+    for count in counts:
+        result = bench_sim_scenario(count, repeat)
+        results.append(result)
+        print(f"{count:>8} {result['update_level_ms']:>10.2f} {result['update_level_world_ms']:>9.2f} {result['check_attack_us']:>8.1f} "
+              f"{result['ai_combat_behavior_us']:>7.1f} {result['combat_ai_world_us']:>12.2f} {result['engaging']:>9} {result['depth_charges_us']:>11.1f} {result['debug_draw_ms']:>8.2f} {result['periscope_draw_ms']:>9.2f} {result['map_draw_ms']:>7.2f}")
+    # --world has to pay for itself on the full tick, not just on the motion step
+    slower = [str(result["entities"]) for result in results if result["update_level_world_ms"] > result["update_level_ms"]]
+    if slower:
+        print(f"World store slower than per-object ticking at {', '.join(slower)} entities")
+    if output:
+        report = {
+            "commit": git_commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "results": results,
+        }
+        with open(output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to {output}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Submarine simulation benchmarks")
+    parser.add_argument("suite", nargs="?", choices=["sim", "hits", "collision", "blits", "startup", "levels"], default="sim",
+                        help="sim: scaling table of the simulation paths on generated scenarios, "
+                             "hits: torpedo hit checks per second with and without the spatial index, collision: cost of one torpedo/target test, "
+                             "blits: UI image blits per second without and with the sprite cache, startup: time to the first menu frame, "
+                             "levels: load times of convoy level definitions with and without the level cache")
+    parser.add_argument("--counts", type=int, nargs="+", help="entity counts to measure (default: 10 to 10000 for sim, 10 to 1000 for hits, 5000 for levels)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds to spend on each hits/collision/blits measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="samples per sim or levels measurement or startup runs, the median is reported")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file for the sim results, empty to skip")
+    args = parser.parse_args()
+
+    match args.suite:
+        case "sim":
+            bench_sim(args.counts or [10, 100, 1000, 10000], args.repeat, args.output)
+        case "hits":
+            bench_hit_checks(args.counts or [10, 100, 1000], args.min_time)
+        case "collision":
+            bench_collision(args.min_time)
+        case "blits":
+            bench_blits(args.min_time)
+        case "startup":
+            bench_startup(args.repeat)
+        case "levels":
+            bench_levels(args.counts or [5000], args.repeat)
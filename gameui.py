@@ -1,7 +1,11 @@
 import pygame
-import os
 import level
 import periscopeui
+import assets
+import profiler
+import sprites
+import tacticalmap
+import textcache
 from settings import SCREEN_SCALING_RATIO
 from enum import Enum
 
@@ -102,12 +106,11 @@ class Wheel:
 
 class Button:
     def __init__(self, img, rotation, scale, bounding_box: BoundingBox2D):
-        self.image = img
+        # img is the file name of the image in assets/img
         self.rotation = rotation
         self.scale = scale
         self.bounding_box = bounding_box
-        self.image = pygame.transform.rotate(self.image, self.rotation)
-        self.image = pygame.transform.scale_by(self.image, self.scale)
+        self.image = sprites.get(img, self.rotation, self.scale)
         self.loc = Vec2(self.bounding_box.top_left.x, self.bounding_box.top_left.y)
         self.rect = self.image.get_rect(center=self.loc.to_tuple())
         self.disabled = False  # Add a disabled attribute
@@ -123,10 +126,11 @@ class Button:
         return self.bounding_box.contains(pos)
     
 
-pygame.font.init()
-gameui_font = pygame.font.SysFont('Comic Sans MS', 18)
-gameui_font_16 = pygame.font.SysFont('Comic Sans MS', 16)
-gameui_font_48 = pygame.font.SysFont('Comic Sans MS', 48)
+# Font keys (name, size) of assets.font, the fonts are created on first use
+gameui_font = ('Comic Sans MS', 18)
+gameui_font_16 = ('Comic Sans MS', 16)
+gameui_font_48 = ('Comic Sans MS', 48)
+profiler_font = ('monospace', 14)
 current_screen = UIScreen.PANEL
 img_location_radar = BoundingBox2D(Vec2(820, 1300) * SCREEN_SCALING_RATIO, Vec2(1080, 1550) * SCREEN_SCALING_RATIO)
 img_location_steer_left = BoundingBox2D(Vec2(330, 1060) * SCREEN_SCALING_RATIO, Vec2(475, 1300) * SCREEN_SCALING_RATIO)
@@ -142,38 +146,36 @@ img_location_throttle_stop = BoundingBox2D(Vec2(860, 1142) * SCREEN_SCALING_RATI
 img_location_throttle_rev = BoundingBox2D(Vec2(860, 1172) * SCREEN_SCALING_RATIO, Vec2(956, 1202) * SCREEN_SCALING_RATIO)
 img_location_stats = Vec2(1045, 875) * SCREEN_SCALING_RATIO
 
-# Absolute path to a current file.
-base_path = os.path.abspath(os.path.dirname(__file__))
-# assets/img/
-imgs_path = os.path.join(base_path, "assets", "img")
-# Images full paths (with file names now)
-bg_img_path = os.path.join(imgs_path, "submarine_main_bg.png")
-throttler_img_path = os.path.join(imgs_path, "throttler.png")
-wheel_img_path = os.path.join(imgs_path, "wheel.png")
-# Images load and scale
-# Background image
-bg_img = pygame.image.load(bg_img_path)
-bg_img = pygame.transform.scale_by(bg_img, SCREEN_SCALING_RATIO)
-# Throttler image
-throttler_img = pygame.image.load(throttler_img_path)
-throttler_img = pygame.transform.scale_by(throttler_img, SCREEN_SCALING_RATIO / 2)
-# Wheel image
-wheel_img = pygame.image.load(wheel_img_path)
-wheel_img = pygame.transform.scale_by(wheel_img, SCREEN_SCALING_RATIO)
-arrow_up_img = pygame.image.load(os.path.join("assets", "img", "arrow.png"))
-button_img = pygame.image.load(os.path.join("assets", "img", "button.png"))
-
-wheel_size = wheel_img.get_size()
-wheel_size = Vec2(wheel_size[0], wheel_size[1])
-img_location_wheel = Vec2(494, 1180) * SCREEN_SCALING_RATIO
+# Sprite keys (image, angle, scale) of the panel images, see sprites.get
+bg_sprite = ("submarine_main_bg.png", 0, SCREEN_SCALING_RATIO)
+throttler_sprite = ("throttler.png", 0, SCREEN_SCALING_RATIO / 2)
+wheel_sprites = {value: ("wheel.png", -value * 30, SCREEN_SCALING_RATIO) for value in (-1, 0, 1)}  # Rotated by wheel value
+button_sprites = [("arrow.png", angle, 0.5) for angle in (90, -90, 0, 180)] + [("button.png", 0, 1)]
 
-throttler_size = throttler_img.get_size()
-throttler_size = Vec2(throttler_size[0], throttler_size[1])
-img_location_throttler = Vec2(970, 1160) * SCREEN_SCALING_RATIO - throttler_size / 2
+img_location_wheel = Vec2(494, 1180) * SCREEN_SCALING_RATIO
+img_location_throttler = Vec2(970, 1160) * SCREEN_SCALING_RATIO # Centre of the throttler at stop
 
 throttler = Throttler()
 wheel = Wheel()
 
+def asset_keys():
+    """Sprite and font keys of the panel, loaded ahead by prefetch_assets and the level loader."""
+    return ([bg_sprite, throttler_sprite, *wheel_sprites.values(), *button_sprites],
+            [gameui_font, gameui_font_16, gameui_font_48, profiler_font])
+
+def prefetch_assets():
+    """Create the panel fonts and load its images on a background thread, called while the menu is shown."""
+    images, fonts = asset_keys()
+    assets.load_fonts(fonts)
+    assets.prefetch(images)
+
+def warm_sprites():
+    """Create the panel fonts and load the panel and periscope images in display format, called when a level starts."""
+    assets.wait()
+    assets.load_fonts(asset_keys()[1])
+    sprites.warm([bg_sprite, throttler_sprite, *wheel_sprites.values(), *button_sprites])
+    periscopeui.warm_sprites()
+
 def switch_screen(new_screen):
     """Switch the current UI screen."""
     global current_screen
@@ -181,7 +183,7 @@ def switch_screen(new_screen):
 
 def draw_bg(screen):
     """Draw the background image on the screen."""
-    screen.blit(bg_img, (0, 0))
+    screen.blit(sprites.get(*bg_sprite), (0, 0))
 
 def check_input(mouse_pos):
     """Check if the mouse position is within any clickable UI elements."""
@@ -211,17 +213,17 @@ def check_input(mouse_pos):
     else:
         return InputType.NONE
 
-def draw_wheel(screen):
-    """Draw the steering wheel image on the screen."""
-    rotated_wheel_img = pygame.transform.rotate(wheel_img, -wheel.get_value() * 30)  # Rotate based on wheel value
-    wheel_rect = rotated_wheel_img.get_rect(center=img_location_wheel.to_tuple())
-    screen.blit(rotated_wheel_img, wheel_rect)
+def wheel_blits():
+    """(image, rect) of the steering wheel."""
+    image = sprites.get(*wheel_sprites[wheel.get_value()])
+    return [(image, image.get_rect(center=img_location_wheel.to_tuple()))]
 
-def draw_throttler(screen):
-    """Draw the throttler image on the screen."""
+def throttler_blits():
+    """(image, rect) of the throttler."""
+    image = sprites.get(*throttler_sprite)
     offset = throttler.get_value() * 30 * SCREEN_SCALING_RATIO  # Adjust the offset based on throttler value
-    location = img_location_throttler + Vec2(0, -offset)
-    screen.blit(throttler_img, location.to_tuple())
+    location = img_location_throttler - Vec2(image.get_width(), image.get_height()) / 2 + Vec2(0, -offset)
+    return [(image, image.get_rect(topleft=location.to_tuple()))]
 
 def adjust_ship_param(ship, param, amount, min_value, max_value, idx):
     """Adjust a parameter value within specified bounds."""
@@ -246,20 +248,20 @@ def get_torpedo_buttons(amount):
     for idx in range(amount):
         # heading change buttons
         
-        button_angle_left = Button(arrow_up_img, 90, 0.5, BoundingBox2D(
+        button_angle_left = Button("arrow.png", 90, 0.5, BoundingBox2D(
             Vec2(1540, 1426 + margin * idx) * SCREEN_SCALING_RATIO, Vec2(1540 + btn_size, (1426 + btn_size) + (margin * idx)) * SCREEN_SCALING_RATIO))
         button_angle_left.on_clicked = lambda target: adjust_ship_param(level.playerShip, 'torpedo_tube_targetAngle', -1, -180, 180, target)
-        button_angle_right = Button(arrow_up_img, -90, 0.5, BoundingBox2D(
+        button_angle_right = Button("arrow.png", -90, 0.5, BoundingBox2D(
             Vec2(1680, 1426 + margin * idx) * SCREEN_SCALING_RATIO, Vec2(1680 + btn_size, (1426 + btn_size) + (margin * idx)) * SCREEN_SCALING_RATIO))
         button_angle_right.on_clicked = lambda target: adjust_ship_param(level.playerShip, 'torpedo_tube_targetAngle', 1, -180, 180, target)
-        button_speed_up = Button(arrow_up_img, 0, 0.5, BoundingBox2D(
+        button_speed_up = Button("arrow.png", 0, 0.5, BoundingBox2D(
             Vec2(1860, 1426 + margin * idx) * SCREEN_SCALING_RATIO, Vec2(1860 + btn_size, (1426 + btn_size) + (margin * idx)) * SCREEN_SCALING_RATIO))
         button_speed_up.on_clicked = lambda target: adjust_ship_param(level.playerShip, 'torpedo_tube_targetSpeed', 1, 15, 60, target)
-        button_speed_down = Button(arrow_up_img, 180, 0.5, BoundingBox2D(
+        button_speed_down = Button("arrow.png", 180, 0.5, BoundingBox2D(
             Vec2(1980, 1440 + margin * idx) * SCREEN_SCALING_RATIO, Vec2(1980 + btn_size, (1426 + btn_size) + (margin * idx)) * SCREEN_SCALING_RATIO))
         button_speed_down.on_clicked = lambda target: adjust_ship_param(level.playerShip, 'torpedo_tube_targetSpeed', -1, 15, 60, target)
 
-        button_fire = Button(button_img, 0, 1, BoundingBox2D(
+        button_fire = Button("button.png", 0, 1, BoundingBox2D(
             Vec2(1750, 1426 + margin * idx) * SCREEN_SCALING_RATIO, Vec2(1750 + btn_size, (1426 + btn_size) + (margin * idx)) * SCREEN_SCALING_RATIO))
         button_fire.on_clicked = lambda target: launch_torpedo(level.playerShip, target)
 
@@ -267,48 +269,121 @@ def get_torpedo_buttons(amount):
         
     return torpedo_buttons
 
-def draw_torpedo_settings(screen, is_mouse_down=False):
+def text_blit(font, text, antialias, color, location, static=False):
+    surface = textcache.text.render(font, text, antialias, color, static)
+    return (surface, surface.get_rect(topleft=location))
+
+def torpedo_blits(idx, button_set):
+    """Labels, values and buttons of one torpedo tube."""
     margin = 80
-    
-    for idx in range(4):
-        torpedo_title = gameui_font.render(f'T{idx+1}', False, (25, 25, 25))
-        torpedo_current_angle = gameui_font.render(str(level.playerShip.torpedo_tube_targetAngle[idx]), False, (25, 25, 25))
-        torpedo_current_speed = gameui_font.render(str(level.playerShip.torpedo_tube_targetSpeed[idx]), False, (25, 25, 25))
-        screen.blit(torpedo_title, (Vec2(1464, 1400 + margin * idx) * SCREEN_SCALING_RATIO).to_tuple())
-        screen.blit(torpedo_current_angle, (Vec2(1600, 1400 + margin * idx) * SCREEN_SCALING_RATIO).to_tuple())
-        screen.blit(torpedo_current_speed, (Vec2(1900, 1400 + margin * idx) * SCREEN_SCALING_RATIO).to_tuple())
-
-    torpedo_buttons = get_torpedo_buttons(4)
-    for i, button_set in enumerate(torpedo_buttons):
+    blits = [
+        text_blit(assets.font(*gameui_font), f'T{idx+1}', False, (25, 25, 25), (Vec2(1464, 1400 + margin * idx) * SCREEN_SCALING_RATIO).to_tuple(), static=True),
+        text_blit(assets.font(*gameui_font), str(level.playerShip.torpedo_tube_targetAngle[idx]), False, (25, 25, 25), (Vec2(1600, 1400 + margin * idx) * SCREEN_SCALING_RATIO).to_tuple()),
+        text_blit(assets.font(*gameui_font), str(level.playerShip.torpedo_tube_targetSpeed[idx]), False, (25, 25, 25), (Vec2(1900, 1400 + margin * idx) * SCREEN_SCALING_RATIO).to_tuple()),
+    ]
+    blits += [(button.image, button.rect) for button in button_set if not button.disabled]
+    return blits
+
+def click_torpedo_buttons(is_mouse_down=False):
+    if not is_mouse_down:
+        return
+    for i, button_set in enumerate(get_torpedo_buttons(4)):
         for button in button_set:
-            button.draw(screen)
-            if is_mouse_down and button.check_clicked(pygame.mouse.get_pos()):
+            if button.check_clicked(pygame.mouse.get_pos()):
                 # If the button is clicked, call its on_clicked method
                 if hasattr(button, 'on_clicked'):
                     button.on_clicked(i)
 
-def draw_torpedo_screen(screen, is_mouse_down=False):
-    text_surface_heading_title = gameui_font.render('Heading', False, (25, 25, 25))
-    screen.blit(text_surface_heading_title, (Vec2(1520, 1320) * SCREEN_SCALING_RATIO).to_tuple())
-    text_surface_speed_title = gameui_font.render('Speed', False, (25, 25, 25))
-    screen.blit(text_surface_speed_title, (Vec2(1860, 1320) * SCREEN_SCALING_RATIO).to_tuple())
-
-    draw_torpedo_settings(screen, is_mouse_down)
-
-def draw_stats(screen):
-    """Draw the stats of the player ship on the screen."""
+def stats_blits():
+    """The stats of the player ship."""
     stats = [
         f"Throttle: {level.playerShip.throttle:.2f}",
         f"Heading: {level.playerShip.heading:.2f}°",
         f"Depth: {level.playerShip.depth}",
     ]
-    
-    for i, stat in enumerate(stats):
-        text_surface = gameui_font_16.render(stat, True, (255, 255, 255))
-        screen.blit(text_surface, (img_location_stats.x, img_location_stats.y + i * 15))
+    return [text_blit(assets.font(*gameui_font_16), stat, True, (255, 255, 255), (img_location_stats.x, img_location_stats.y + i * 15)) for i, stat in enumerate(stats)]
+
+def panel_widgets():
+    """Everything drawn over the panel background, widget name -> [(surface, rect)] in drawing order."""
+    widgets = {
+        "wheel": wheel_blits(),
+        "throttler": throttler_blits(),
+        "torpedo titles": [
+            text_blit(assets.font(*gameui_font), 'Heading', False, (25, 25, 25), (Vec2(1520, 1320) * SCREEN_SCALING_RATIO).to_tuple(), static=True),
+            text_blit(assets.font(*gameui_font), 'Speed', False, (25, 25, 25), (Vec2(1860, 1320) * SCREEN_SCALING_RATIO).to_tuple(), static=True),
+        ],
+    }
+    for idx, button_set in enumerate(get_torpedo_buttons(4)):
+        widgets[f"torpedo {idx}"] = torpedo_blits(idx, button_set)
+    widgets["stats"] = stats_blits()
+    return widgets
+
+class PanelRenderer:
+    """Draws the control panel, repainting only the widgets that changed since the last frame.
+
+    Widgets are compared by their blits: text comes from textcache and images are reused, so a widget whose
+    surfaces and rects are the same as last frame is left alone. The old and new rects of a changed widget are
+    repainted from the background together with every widget overlapping them, and only those rects are passed
+    to pygame.display.update. Anything drawn over the panel by others (overlays, game over text) is reported with
+    cover(), so it is shown this frame and painted over on the next one.
+    """
+    drawn: dict     # Widget name -> blits drawn last frame
+    covered: list   # Rects drawn over by others last frame
+    rects: list | None  # Rects to update this frame, None when the whole screen has to be updated
+    full: bool      # Whether the next frame redraws everything
+
+    def __init__(self):
+        self.drawn = {}
+        self.covered = []
+        self.rects = None
+        self.full = True
+
+    def invalidate(self):
+        """Redraw everything on the next frame, after something else drew over the whole screen."""
+        self.full = True
+        self.rects = None
+
+    def cover(self, rect):
+        rect = pygame.Rect(rect)
+        self.covered.append(rect)
+        if self.rects is not None:
+            self.rects.append(rect)
+
+    def draw(self, screen, widgets):
+        if self.full:
+            screen.fill((0,0,0))
+            draw_bg(screen)
+            for blits in widgets.values():
+                screen.blits(blits, doreturn=False)
+            self.drawn = widgets
+            self.covered = []
+            self.rects = None
+            self.full = False
+            return
+        dirty = self.covered
+        self.covered = []
+        for name, blits in widgets.items():
+            old = self.drawn.get(name, [])
+            if old != blits:
+                dirty += [rect for surface, rect in old] + [rect for surface, rect in blits]
+        self.drawn = widgets
+        self.rects = dirty
+        if not dirty:
+            return
+        bg = sprites.get(*bg_sprite)
+        clip = screen.get_clip()
+        for rect in dirty:
+            screen.set_clip(rect)
+            screen.blit(bg, rect, rect)
+            for blits in widgets.values():
+                for surface, target in blits:
+                    if target.colliderect(rect):
+                        screen.blit(surface, target)
+        screen.set_clip(clip)
+
+panel = PanelRenderer()
 
 def handle_panel_ui(screen, events):
-    draw_bg(screen)
     is_mouse_down = pygame.mouse.get_pressed()[0]  # Check if the left mouse button is pressed
     for event in events:
         if event.type == pygame.MOUSEBUTTONDOWN:
@@ -337,26 +412,24 @@ def handle_panel_ui(screen, events):
             elif input_type == InputType.THROTTLE_REV:
                 throttler.set(-1)
 
-    draw_wheel(screen)
-    draw_throttler(screen)
-    draw_torpedo_screen(screen, is_mouse_down)
-    draw_stats(screen)
+    click_torpedo_buttons(is_mouse_down)
+    panel.draw(screen, panel_widgets())
 
 # TODO move these to ship.py or similar
 throttle_per_sec = 6  # Base throttle change per second
 # How fast the ship throttles up/down when the lever is up/down
-def update_ship_throttle(coefficient, target_max_throttle, target_min_throttle=-20):
-    # ! Hardcoded 60 FPS, may need to change to delta time.
+def update_ship_throttle(coefficient, target_max_throttle, target_min_throttle=-20, dt=1/60):
+    # dt is the real time since the last frame in seconds
     currentThrottle = level.playerShip.throttle
     if coefficient > 0:
         # Accelerate towards target_max_throttle, or slow down if above it
         if currentThrottle < target_max_throttle:
-            level.playerShip.throttle += coefficient * throttle_per_sec * 1/60
+            level.playerShip.throttle += coefficient * throttle_per_sec * dt
             if level.playerShip.throttle > target_max_throttle:
                 level.playerShip.throttle = target_max_throttle
         elif currentThrottle > target_max_throttle:
             # Slow down if above target_max_throttle
-            level.playerShip.throttle -= throttle_per_sec * 1.5 * 1/60
+            level.playerShip.throttle -= throttle_per_sec * 1.5 * dt
             if level.playerShip.throttle < target_max_throttle:
                 level.playerShip.throttle = target_max_throttle
         else:
@@ -364,7 +437,7 @@ def update_ship_throttle(coefficient, target_max_throttle, target_min_throttle=-
     elif coefficient < 0:
         # Decelerate towards target_min_throttle
         if currentThrottle > target_min_throttle:
-            level.playerShip.throttle += coefficient * throttle_per_sec * 1/60
+            level.playerShip.throttle += coefficient * throttle_per_sec * dt
             if level.playerShip.throttle < target_min_throttle:
                 level.playerShip.throttle = target_min_throttle
         else:
@@ -374,11 +447,11 @@ def update_ship_throttle(coefficient, target_max_throttle, target_min_throttle=-
         if abs(currentThrottle) <= 0.16:
             level.playerShip.throttle = 0
         elif currentThrottle < 0:
-            level.playerShip.throttle += throttle_per_sec * 1.5 * 1/60
+            level.playerShip.throttle += throttle_per_sec * 1.5 * dt
             if level.playerShip.throttle > 0:
                 level.playerShip.throttle = 0
         else:
-            level.playerShip.throttle -= throttle_per_sec * 1.5 * 1/60
+            level.playerShip.throttle -= throttle_per_sec * 1.5 * dt
             if level.playerShip.throttle < 0:
                 level.playerShip.throttle = 0
 
@@ -388,29 +461,68 @@ def reset_buttons():
 
 def draw_pause_screen(screen):
     screen.fill((0,0,0))
-    pause_text = gameui_font_48.render("Game Paused", True, (255, 255, 255))
+    panel.invalidate()
+    textcache.text.set_resolution(screen.get_size())
+    pause_text = textcache.text.render(assets.font(*gameui_font_48), "Game Paused", True, (255, 255, 255), static=True)
     pause_rect = pause_text.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2))
-    save_info_text = gameui_font_48.render("Press 's' to save the game", True, (255, 255, 255))
+    save_info_text = textcache.text.render(assets.font(*gameui_font_48), "Press 's' to save the game", True, (255, 255, 255), static=True)
     save_info_rect = save_info_text.get_rect(center=(screen.get_width() // 2, screen.get_height()*2 // 3))
     screen.blit(pause_text, pause_rect)
     screen.blit(save_info_text, save_info_rect)
 
-def draw_ui(screen, events):
-    screen.fill((0,0,0))
+def draw_profiler_overlay(screen):
+    """Draw the rolling section timings of the profiler in the top left corner."""
+    lines = [f"{'section':<16}{'p50':>8}{'p90':>8}{'p99':>8}{'calls':>8}"]
+    for name, entry in profiler.summary().items():
+        if "p50_ms" in entry:
+            lines.append(f"{name:<16}{entry['p50_ms']:>8.2f}{entry['p90_ms']:>8.2f}{entry['p99_ms']:>8.2f}{entry['calls']:>8.1f}")
+        else:
+            lines.append(f"{name:<16}{'':>24}{entry['calls']:>8.1f}")
+    overlay = pygame.Surface((330, 16 * len(lines) + 8), pygame.SRCALPHA)
+    overlay.fill((0, 0, 0, 180))
+    for i, line in enumerate(lines):
+        overlay.blit(assets.font(*profiler_font).render(line, True, (255, 255, 0)), (4, 4 + i * 16))
+    panel.cover(screen.blit(overlay, (0, 0)))
+    draw_scheduler_overlay(screen, overlay.get_height())
+
+def draw_scheduler_overlay(screen, top=0):
+    """Draw the per tick time of every simulation stage against its budget, stages over budget in red."""
+    lines = [(f"{'stage':<14}{'rate':>6}{'mean':>8}{'p99':>8}{'budget':>8}", False)]
+    for entry in level.scheduler.budgets():
+        # 1/N: a staggered stage visiting 1/N of its entities per tick, Nt: a stage running every N ticks
+        rate = f"1/{entry['period']}" if entry["staggered"] else f"{entry['period']}t"
+        lines.append((f"{entry['name']:<14}{rate:>6}{entry['mean_ms']:>8.2f}{entry['p99_ms']:>8.2f}{entry['budget_ms']:>8.1f}", entry["over_budget"]))
+    overlay = pygame.Surface((330, 16 * len(lines) + 8), pygame.SRCALPHA)
+    overlay.fill((0, 0, 0, 180))
+    for i, (line, over) in enumerate(lines):
+        overlay.blit(assets.font(*profiler_font).render(line, True, (255, 80, 80) if over else (255, 255, 0)), (4, 4 + i * 16))
+    panel.cover(screen.blit(overlay, (0, top)))
+
+def draw_ui(screen, events, dt=1/60, alpha=1.0):
+    """Draw the current UI screen, dt is the frame time in seconds and alpha the interpolation between the last two sim states."""
+    textcache.text.set_resolution(screen.get_size())
     global current_screen
-    update_ship_throttle(throttler.get_value(), 40 * throttler.get_value())
+    update_ship_throttle(throttler.get_value(), 40 * throttler.get_value(), dt=dt)
     #update_ship_steering(wheel.get_value())
+    if current_screen != UIScreen.PANEL:
+        # Only the panel keeps what it drew last frame
+        screen.fill((0,0,0))
+        panel.invalidate()
     match current_screen:
         case UIScreen.PANEL:
             handle_panel_ui(screen, events)
         case UIScreen.TOPDOWN:
-            level.debugDrawLevel(screen)
+            started = profiler.start()
+            tacticalmap.draw_tactical_map(screen, events, dt, alpha)
+            profiler.stop("map draw", started)
         case UIScreen.PERISCOPE:
-            periscopeui.draw_periscope(screen, events, level.playerShip.periscope_angle, 40, level.playerShip)
+            started = profiler.start()
+            periscopeui.draw_periscope(screen, events, level.playerShip.periscope_angle, 40, level.playerShip, dt, alpha)
+            profiler.stop("periscope draw", started)
     if level.playerShip.alive == False:
-        game_over_text = gameui_font_48.render("Your ship has been shot down!", True, (255, 0, 0))
+        game_over_text = textcache.text.render(assets.font(*gameui_font_48), "Your ship has been shot down!", True, (255, 0, 0), static=True)
         game_over_rect = game_over_text.get_rect(center=(screen.get_width() // 2, screen.get_height() // 2))
-        screen.blit(game_over_text, game_over_rect)
+        panel.cover(screen.blit(game_over_text, game_over_rect))
         for event in events:
             if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 return False
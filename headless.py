@@ -0,0 +1,71 @@
+import time
+import level
+import profiler
+
+# Headless simulation runner, steps the level as fast as possible without a window, fonts or assets.
+# Started through `python main.py --headless`.
+
+STOP_CONDITIONS = ("player-dead", "transports-sunk")
+
+def player_dead() -> bool:
+    player = level.get_player()
+    return player is None or not player.alive
+
+def transports_sunk() -> bool:
+    transports = level.registry.of_type("transport")
+    return len(transports) > 0 and not any(transport.alive for transport in transports)
+
+def check_stop(stopOn) -> str | None:
+    """Name of the first met stop condition, None if the simulation should go on."""
+    if "player-dead" in stopOn and player_dead():
+        return "player-dead"
+    if "transports-sunk" in stopOn and transports_sunk():
+        return "transports-sunk"
+    return None
+
+def run(saveName: str, maxTicks: int, stopOn=STOP_CONDITIONS, debug: bool = False, useWorld: bool = False, seed: int | None = None) -> dict:
+    """Load a save and tick it until a stop condition is met or maxTicks ticks have run."""
+    level.loadSave(saveName)
+    level.enableWorld(useWorld)
+    level.seedRandom(seed)
+    reason = "ticks"
+    ticks = 0
+    start = time.perf_counter()
+    while ticks < maxTicks:
+        stop = check_stop(stopOn)
+        if stop:
+            reason = stop
+            break
+        level.updateLevel(debug)
+        profiler.flush()
+        ticks += 1
+    elapsed = time.perf_counter() - start
+    level.enableWorld(False)
+    return make_summary(saveName, reason, ticks, elapsed)
+
+def make_summary(saveName: str, reason: str, ticks: int, elapsed: float) -> dict:
+    player = level.get_player()
+    def count(type, alive=None):
+        return sum(1 for entity in level.registry.of_type(type) if alive is None or entity.alive == alive)
+    return {
+        "save": saveName,
+        "reason": reason,
+        "ticks": ticks,
+        "seconds": elapsed,
+        "ticks_per_second": ticks / elapsed if elapsed > 0 else float("inf"),
+        "player_alive": bool(player.alive) if player else False,
+        "player_health": player.health if player else 0,
+        "transports_sunk": count("transport", False),
+        "transports": count("transport"),
+        "destroyers_alive": count("destroyer", True),
+        "destroyers": count("destroyer"),
+        "torpedoes": count("torpedo"),
+    }
+
+def print_summary(summary: dict):
+    print(f"{summary['save']}: stopped after {summary['ticks']} ticks ({summary['reason']})")
+    print(f"  {summary['seconds']:.3f} s, {summary['ticks_per_second']:.0f} ticks/s")
+    print(f"  player: {'alive' if summary['player_alive'] else 'dead'}, health {summary['player_health']}")
+    print(f"  transports sunk: {summary['transports_sunk']}/{summary['transports']}")
+    print(f"  destroyers alive: {summary['destroyers_alive']}/{summary['destroyers']}")
+    print(f"  torpedoes in flight: {summary['torpedoes']}")
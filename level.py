@@ -1,60 +1,249 @@
 import math
+import random
+from operator import attrgetter
 import pygame
 import ship
-import pickle
+import profiler
+import radio
+import savefile
+import sensors
+from projectiles import ProjectilePool
+from registry import Registry
+from scheduler import Scheduler
+from spatial import SpatialHash
 
 global entityList
 global playerShip
 
 entityList = [] # List of ships in level
+world = None # Optional world.World store, ships are ticked in one vectorised pass while it is enabled
+registry = Registry() # Entities by id and type, see spawn and despawn
+grid = SpatialHash() # Broad phase for hit detection, refreshed at the start of every tick
+projectiles = ProjectilePool() # Depth charges and hedgehog bombs of every destroyer
+previousPoses = {} # id(entity) -> (x, y, heading) before the last tick, used to interpolate drawing
+randomSeed = None # Seed of the random streams, see randomStream
+randomStreams = {} # Stream name -> random.Random
+tickCount = 0 # Ticks since the level was loaded
+recorder = None # Optional replay.Recorder, player commands are logged while it is set
+scheduler = Scheduler() # Stages of a tick and their rates, registered below updateLevel
+SENSOR_PERIOD = 5 # Ticks between two sensor looks for the same target, see sensors.py
+AI_PERIOD = 10 # Ticks between course changes of a destroyer, 1/AI_PERIOD of them re-plan each tick
+ANTISUBMARINE_RANGE = 1000 # Farthest a destroyer can drop depth charges on or throw its hedgehog at the player from
 
 # Used in ship.destoryerai_combat_behavior
 def get_player():
-    for entity in entityList:
-        if entity.type == "playerShip":
-            return entity
-    return None
+    return registry.player
+
+# Add an entity to the level, called by ship.Entity.__init__
+def spawn(entity):
+    entityList.append(entity)
+    registry.add(entity)
+    if world is not None:
+        world.spawned(entity)
+
+# Remove an entity from the level and everything indexing it
+def despawn(entity):
+    entityList.remove(entity)
+    registry.remove(entity)
+    grid.remove(entity)
+    if entity.type == "torpedo":
+        # Enemies forget it now, not on its next sensor look, so a save never refers to it
+        sensors.forget(entity)
+    if world is not None:
+        world.detach(entity)
 
 # Tick the level, updating all entities
 def updateLevel(debug):
+    global tickCount
     if debug:
         print("Updating level with entities:")
         for entity in entityList:
             print(entity)
             print("health: ", entity.health)
-    for entity in entityList:
-        entity.tick_update()
+    if profiler.enabled:
+        for entity in entityList:
+            profiler.count("tick " + entity.type)
+    if recorder is not None:
+        recorder.tick()
+    scheduler.run(tickCount)
+    tickCount += 1
+
+def updateSpatialIndex(tick):
+    grid.update(entityList)
+
+# Physics, weapon reloads, visibility and noise, every tick since they count in ticks
+def updateEntities(tick):
+    if world is not None:
+        world.tick(entityList)
+    else:
+        for entity in entityList:
+            entity.tick_update()
+
+def updateProjectiles(tick):
+    projectiles.update()
+
+def updateSensors(tick, part, period):
+    sensors.update(tick, part, period)
+
+def updateRadioLinks(tick, part, period):
+    radio.update_links(tick, part, period)
+
+def updateRadio(tick):
+    radio.update(tick)
 
-def debugDrawLevel(screen):
+# Destroyer AI stage, after every entity has moved and updated its weapons. Course changes are staggered,
+# the destroyers in this tick's part head for their contact
+def updateCombatAI(tick, part, period):
+    player = get_player()
+    if player is None or not player.alive:
+        return
+    destroyers = [destroyer for destroyer in registry.of_type("destroyer") if destroyer.id % period == part]
+    if world is not None:
+        world.combat_ai(player, destroyers)
+    else:
+        for destroyer in destroyers:
+            destroyer.ai_combat_behavior(player)
+
+# Guns fire as soon as they are reloaded, so every destroyer is checked every tick
+def updateGunnery(tick):
+    player = get_player()
+    if player is None or not player.alive:
+        return
+    if world is not None:
+        world.gun_ai(player, registry.of_type("destroyer"))
+    else:
+        for destroyer in registry.of_type("destroyer"):
+            if not player.alive:
+                break
+            destroyer.ai_gun_behavior(player)
+
+# Depth charges and hedgehog, every tick like the guns. Only destroyers within ANTISUBMARINE_RANGE of the player can
+# reach it, in id order so the projectiles are added in the same order whatever order the grid returns them in
+def updateAntiSubmarine(tick):
+    player = get_player()
+    if player is None or not player.alive:
+        return
+    nearby = grid.query_radius(player.x, player.y, ANTISUBMARINE_RANGE)
+    for destroyer in sorted((entity for entity in nearby if entity.type == "destroyer"), key=attrgetter("id")):
+        destroyer.ai_antisubmarine_behavior(player)
+
+# Budgets split a 60 fps frame (16.7 ms) between the stages, see gameui.draw_scheduler_overlay
+scheduler.register("spatial index", updateSpatialIndex, budget_ms=2.0)
+scheduler.register("entities", updateEntities, budget_ms=6.0)
+scheduler.register("projectiles", updateProjectiles, budget_ms=1.0)
+scheduler.register("sensors", updateSensors, period=SENSOR_PERIOD, staggered=True, budget_ms=2.0)
+scheduler.register("radio links", updateRadioLinks, period=radio.LINK_PERIOD, staggered=True, budget_ms=2.0)
+scheduler.register("radio", updateRadio, budget_ms=1.0)
+scheduler.register("ai", updateCombatAI, period=AI_PERIOD, staggered=True, budget_ms=1.0)
+scheduler.register("guns", updateGunnery, budget_ms=1.0)
+scheduler.register("anti-submarine", updateAntiSubmarine, budget_ms=0.5)
+
+# All simulation randomness comes from named streams derived from one seed, so a run can be repeated exactly.
+# Each system has its own stream, so new random calls in one system do not change the rolls of another.
+def seedRandom(seed=None):
+    global randomSeed
+    randomSeed = seed if seed is not None else random.randrange(2**32)
+    randomStreams.clear()
+
+def randomStream(name):
+    stream = randomStreams.get(name)
+    if stream is None:
+        if randomSeed is None:
+            seedRandom()
+        stream = randomStreams[name] = random.Random(f"{randomSeed}:{name}")
+    return stream
+
+# Remember entity poses before a tick so renderers can interpolate between the last two states
+def snapshotPoses():
+    global previousPoses
+    previousPoses = {id(entity): (entity.x, entity.y, entity.heading) for entity in entityList}
+
+def interpolatedPose(entity, alpha):
+    previous = previousPoses.get(id(entity))
+    if previous is None or alpha >= 1:
+        return entity.x, entity.y, entity.heading
+    x, y, heading = previous
+    turn = (entity.heading - heading + 180) % 360 - 180 # Shortest way around
+    return x + (entity.x - x) * alpha, y + (entity.y - y) * alpha, (heading + turn * alpha) % 360
+
+# Switch between per-object ticking and the NumPy world store
+def enableWorld(enabled=True):
+    global world
+    if world is not None:
+        world.detach_all()
+        world = None
+    if enabled:
+        from world import World
+        world = World(len(entityList))
+        world.sync(entityList)
+
+def debugDrawLevel(screen, alpha=1.0):
     for entity in entityList:
+        x, y, heading = interpolatedPose(entity, alpha)
         match type(entity):
             case ship.Entity:
-                pygame.draw.circle(screen, (255, 255, 255), (screen.get_width()/2 + entity.x, screen.get_height()/2 - entity.y), 2)
+                pygame.draw.circle(screen, (255, 255, 255), (screen.get_width()/2 + x, screen.get_height()/2 - y), 2)
             case ship.playerShip | ship.destroyer | ship.transport | ship.torpedo:
                 if entity.alive:
                     pLen = math.sqrt((entity.width/2) ** 2 + (entity.length/2) ** 2)
 
-                    p1x = screen.get_width()/2 + (entity.x + pLen * math.cos(math.atan2(entity.width/2, entity.length/2) + math.radians(entity.heading)))
-                    p1y = screen.get_height()/2 - (entity.y + pLen * math.sin(math.atan2(entity.width/2, entity.length/2) + math.radians(entity.heading)))
+                    p1x = screen.get_width()/2 + (x + pLen * math.cos(math.atan2(entity.width/2, entity.length/2) + math.radians(heading)))
+                    p1y = screen.get_height()/2 - (y + pLen * math.sin(math.atan2(entity.width/2, entity.length/2) + math.radians(heading)))
 
-                    p2x = screen.get_width()/2 + (entity.x + pLen * math.cos(math.atan2(-entity.width/2, entity.length/2) + math.radians(entity.heading)))
-                    p2y = screen.get_height()/2 - (entity.y + pLen * math.sin(math.atan2(-entity.width/2, entity.length/2) + math.radians(entity.heading)))
+                    p2x = screen.get_width()/2 + (x + pLen * math.cos(math.atan2(-entity.width/2, entity.length/2) + math.radians(heading)))
+                    p2y = screen.get_height()/2 - (y + pLen * math.sin(math.atan2(-entity.width/2, entity.length/2) + math.radians(heading)))
 
-                    p3x = screen.get_width()/2 + (entity.x + pLen * math.cos(math.atan2(-entity.width/2, -entity.length/2) + math.radians(entity.heading)))
-                    p3y = screen.get_height()/2 - (entity.y + pLen * math.sin(math.atan2(-entity.width/2, -entity.length/2) + math.radians(entity.heading)))
+                    p3x = screen.get_width()/2 + (x + pLen * math.cos(math.atan2(-entity.width/2, -entity.length/2) + math.radians(heading)))
+                    p3y = screen.get_height()/2 - (y + pLen * math.sin(math.atan2(-entity.width/2, -entity.length/2) + math.radians(heading)))
 
-                    p4x = screen.get_width()/2 + (entity.x + pLen * math.cos(math.atan2(entity.width/2, -entity.length/2) + math.radians(entity.heading)))
-                    p4y = screen.get_height()/2 - (entity.y + pLen * math.sin(math.atan2(entity.width/2, -entity.length/2) + math.radians(entity.heading)))
+                    p4x = screen.get_width()/2 + (x + pLen * math.cos(math.atan2(entity.width/2, -entity.length/2) + math.radians(heading)))
+                    p4y = screen.get_height()/2 - (y + pLen * math.sin(math.atan2(entity.width/2, -entity.length/2) + math.radians(heading)))
 
                     pygame.draw.polygon(screen, (255, 255, 255), [[p1x, p1y], [p2x, p2y], [p3x, p3y], [p4x, p4y]])
 
 # Save/Load
 
 def saveLevel(entityList, saveName):
-    pickle.dump(entityList, open(saveName, "wb"))
+    savefile.save(entityList, saveName, registry.nextId)
+
+# Loads binary saves (see savefile.py) and level definitions (see leveldef.py), never pickles
+# progress(fraction, stage) is called before each step, e.g. by loading.LevelLoader
+def loadSave(saveName, progress=None):
+    if saveName.endswith(".json"):
+        # Level definitions are built once and loaded from their cached build afterwards
+        import leveldef
+        loadEntities(leveldef.load(saveName, progress), progress)
+        return
+    reportProgress(progress, 0.0, "Reading save")
+    if not savefile.is_save_file(saveName):
+        # Unpickling would run code from the file, legacy saves are converted explicitly
+        raise savefile.SaveFormatError(f"{saveName} is not a binary save, convert a legacy pickle with `python savefile.py convert`")
+    entities, nextId = savefile.load_level(saveName)
+    loadEntities(entities, progress, nextId)
+
+def reportProgress(progress, fraction, stage):
+    if progress is not None:
+        progress(fraction, stage)
 
-def loadSave(saveName):
+# Make the given list the current level and rebuild everything derived from it
+# nextId is the id the level was handing out next when it was saved, ids below it are never handed out again
+def loadEntities(entities, progress=None, nextId=0):
     global entityList
     global playerShip
-    entityList = pickle.load(open(saveName, "rb"))
-    playerShip = get_player()
\ No newline at end of file
+    global tickCount
+    reportProgress(progress, 0.4, "Registering entities")
+    entityList = entities
+    tickCount = 0
+    registry.rebuild(entityList, nextId)
+    playerShip = get_player()
+    previousPoses.clear()
+    reportProgress(progress, 0.5, "Building spatial index")
+    grid.rebuild(entityList)
+    projectiles.clear()
+    sensors.reset()
+    radio.reset()
+    if world is not None:
+        reportProgress(progress, 0.7, "Building world store")
+        enableWorld()
+    if recorder is not None:
+        recorder.reset()
\ No newline at end of file
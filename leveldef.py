@@ -0,0 +1,324 @@
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import level
+import registry
+import savefile
+import scenario
+import ship
+
+# Declarative level definitions, compiled once to the binary save format and cached by content hash.
+#
+#   {
+#     "name": "Convoy ON-166",
+#     "weapons": {"escort": [[8000, 200, 4, 10], [5, 500, 15, 2, 1, "behind", 5, 3], [150, 500, 120, 24, 30]]},
+#     "player": {"x": 0, "y": 0, "heading": 0},
+#     "ships": [
+#       {"type": "destroyer", "x": 3000, "y": 9000, "heading": 180, "weapons": "escort", "behaviour": "aware", "combat": "aggressive"},
+#       {"type": "transport", "x": -500, "y": 6000, "heading": 0, "throttle": 50, "cargo": {"type": "fuel", "amount": 8000, "value": 40}}
+#     ],
+#     "convoys": [
+#       {"x": 0, "y": 20000, "heading": 0, "columns": 10, "rows": 8, "spacing": 400, "jitter": 50, "seed": 1, "throttle": 50,
+#        "cargo": {"type": "cargo", "amount": 1, "value": 1}, "behaviour": "safe",
+#        "escorts": {"count": 12, "distance": 1500, "weapons": "standard", "behaviour": "aware", "combat": "aggressive"}}
+#     ]
+#   }
+#
+# Headings are compass degrees like the ship constructors take them, 0 is north (+y) and 90 east. "weapons" names a
+# destroyer weapon preset, the file's own or "standard" (scenario.destroyerWeaponStat). "behaviour" and "combat" set
+# ai_behaviour and ai_combatMode. A convoy is columns x rows transports centred on (x, y), first row leading, turned
+# to its heading and jittered by up to jitter units, with its escorts evenly spaced on a ring distance beyond its
+# corners. Unknown keys are errors, so a typo never silently falls back to a default.
+#
+# load() validates and builds a definition once and saves the entities to CACHE_DIR in the binary save format, under
+# the hash of the definition and of the code that builds it (BUILD_SOURCES). Later loads of an unchanged definition
+# read that file with savefile.load, without parsing JSON or running a single constructor.
+
+FORMAT_VERSION = 1  # Bump when the meaning of a definition changes, cached levels are then rebuilt
+CACHE_DIR = "levelcache"
+# Modules whose code decides what a definition builds to: ship stats, the standard weapon preset, spawning and ids,
+# and the save format of the cache
+BUILD_SOURCES = (__file__, ship.__file__, scenario.__file__, level.__file__, registry.__file__, savefile.__file__)
+
+SHIP_TYPES = ("destroyer", "transport")
+AI_BEHAVIOURS = ("careless", "safe", "aware", "combat")
+AI_COMBAT_MODES = ("aggressive", "defensive", "evasive")
+DEPTH_CHARGE_PATTERNS = ("behind", "sides", "all")
+WEAPON_STAT_LENGTHS = (4, 8, 5) # Gun, depth charge and hedgehog, see destroyer.__init__
+DEFAULT_CARGO = ("cargo", 1, 1)
+
+LEVEL_KEYS = ("name", "weapons", "player", "ships", "convoys")
+PLAYER_KEYS = ("x", "y", "heading")
+SHIP_KEYS = ("type", "x", "y", "heading", "throttle", "weapons", "cargo", "behaviour", "combat")
+CONVOY_KEYS = ("x", "y", "heading", "columns", "rows", "spacing", "jitter", "seed", "throttle", "cargo", "behaviour", "combat", "escorts")
+ESCORT_KEYS = ("count", "distance", "throttle", "weapons", "behaviour", "combat")
+CARGO_KEYS = ("type", "amount", "value")
+
+NUMBER = (int, float)
+KIND_NAMES = {int: "an integer", float: "a number", str: "a string", dict: "an object", list: "a list"}
+REQUIRED = object() # Default of fields that must be given
+
+class LevelDefinitionError(Exception):
+    pass
+
+# Validation
+
+def where(path: str, key) -> str:
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    return f"{path}.{key}" if path else key
+
+def check_object(value, path: str, keys: tuple[str, ...]) -> dict:
+    if not isinstance(value, dict):
+        raise LevelDefinitionError(f"{path or 'level'}: expected an object, got {value!r}")
+    for key in value:
+        if key not in keys:
+            raise LevelDefinitionError(f"{where(path, key)}: unknown key, expected one of {', '.join(keys)}")
+    return value
+
+def field(data: dict, path: str, key: str, kinds: tuple[type, ...], default=REQUIRED, minimum=None, choices=None):
+    """data[key] checked against the expected types, range or choices, default when it's missing."""
+    if key not in data:
+        if default is REQUIRED:
+            raise LevelDefinitionError(f"{path or 'level'}: missing \"{key}\"")
+        return default
+    value = data[key]
+    # bool is an int, but true is never a valid count or coordinate
+    if not isinstance(value, kinds) or isinstance(value, bool) and bool not in kinds:
+        raise LevelDefinitionError(f"{where(path, key)}: expected {KIND_NAMES[kinds[-1]]}, got {value!r}")
+    if isinstance(value, float) and not math.isfinite(value):
+        raise LevelDefinitionError(f"{where(path, key)}: expected a finite number, got {value!r}")
+    if minimum is not None and value < minimum:
+        raise LevelDefinitionError(f"{where(path, key)}: must be at least {minimum}, got {value!r}")
+    if choices is not None and value not in choices:
+        raise LevelDefinitionError(f"{where(path, key)}: expected one of {', '.join(choices)}, got {value!r}")
+    return value
+
+def check_weapon_stat(stat, path: str) -> list:
+    if not isinstance(stat, list) or len(stat) != len(WEAPON_STAT_LENGTHS):
+        raise LevelDefinitionError(f"{path}: expected [gun, depth charge, hedgehog] stat lists, got {stat!r}")
+    for i, (values, length) in enumerate(zip(stat, WEAPON_STAT_LENGTHS)):
+        if not isinstance(values, list) or len(values) != length:
+            raise LevelDefinitionError(f"{where(path, i)}: expected a list of {length} values, got {values!r}")
+        for j, value in enumerate(values):
+            if i == 1 and j == 5:
+                if value not in DEPTH_CHARGE_PATTERNS:
+                    raise LevelDefinitionError(f"{where(where(path, i), j)}: expected one of {', '.join(DEPTH_CHARGE_PATTERNS)}, got {value!r}")
+            elif not isinstance(value, NUMBER) or isinstance(value, bool) or value < 0:
+                raise LevelDefinitionError(f"{where(where(path, i), j)}: expected a non-negative number, got {value!r}")
+    return stat
+
+def check_cargo(data: dict, path: str) -> tuple[str, int, int]:
+    if "cargo" not in data:
+        return DEFAULT_CARGO
+    cargo = check_object(data["cargo"], where(path, "cargo"), CARGO_KEYS)
+    path = where(path, "cargo")
+    return (field(cargo, path, "type", (str,), DEFAULT_CARGO[0]), field(cargo, path, "amount", (int,), DEFAULT_CARGO[1], 0),
+            field(cargo, path, "value", (int,), DEFAULT_CARGO[2], 0))
+
+def check_ai(data: dict, path: str) -> dict:
+    return {"behaviour": field(data, path, "behaviour", (str,), None, choices=AI_BEHAVIOURS),
+            "combat": field(data, path, "combat", (str,), None, choices=AI_COMBAT_MODES)}
+
+def check_weapons(data: dict, path: str, presets: dict) -> list:
+    name = field(data, path, "weapons", (str,), "standard")
+    if name not in presets:
+        raise LevelDefinitionError(f"{where(path, 'weapons')}: unknown preset {name!r}, expected one of {', '.join(presets)}")
+    return presets[name]
+
+def check_ship(data, path: str, presets: dict) -> dict:
+    check_object(data, path, SHIP_KEYS)
+    entry = {"type": field(data, path, "type", (str,), choices=SHIP_TYPES)}
+    if entry["type"] == "transport":
+        if "weapons" in data:
+            raise LevelDefinitionError(f"{where(path, 'weapons')}: transports carry no weapons")
+        entry["cargo"] = check_cargo(data, path)
+    else:
+        if "cargo" in data:
+            raise LevelDefinitionError(f"{where(path, 'cargo')}: destroyers carry no cargo")
+        entry["weapons"] = check_weapons(data, path, presets)
+    entry.update(x=field(data, path, "x", NUMBER), y=field(data, path, "y", NUMBER), heading=field(data, path, "heading", NUMBER, 0),
+                 throttle=check_throttle(data, path, 0), **check_ai(data, path))
+    return entry
+
+def check_throttle(data: dict, path: str, default: int) -> int:
+    throttle = field(data, path, "throttle", (int,), default, -100)
+    if throttle > 100:
+        raise LevelDefinitionError(f"{where(path, 'throttle')}: must be at most 100, got {throttle}")
+    return throttle
+
+def check_convoy(data, path: str, presets: dict) -> dict:
+    check_object(data, path, CONVOY_KEYS)
+    convoy = {"x": field(data, path, "x", NUMBER), "y": field(data, path, "y", NUMBER), "heading": field(data, path, "heading", NUMBER, 0),
+              "columns": field(data, path, "columns", (int,), minimum=1), "rows": field(data, path, "rows", (int,), minimum=1),
+              "spacing": field(data, path, "spacing", NUMBER, 400, 1), "jitter": field(data, path, "jitter", NUMBER, 0, 0),
+              "seed": field(data, path, "seed", (int,), 0), "throttle": check_throttle(data, path, 0), "cargo": check_cargo(data, path),
+              **check_ai(data, path)}
+    escorts = check_object(data.get("escorts", {}), where(path, "escorts"), ESCORT_KEYS)
+    path = where(path, "escorts")
+    convoy["escorts"] = {"count": field(escorts, path, "count", (int,), 0, 0), "distance": field(escorts, path, "distance", NUMBER, 1000, 0),
+                         # Escorts keep pace with the convoy unless told otherwise
+                         "throttle": check_throttle(escorts, path, convoy["throttle"]), "weapons": check_weapons(escorts, path, presets),
+                         **check_ai(escorts, path)}
+    return convoy
+
+def validate(definition) -> dict:
+    """Check a decoded definition and return it with every default filled in and presets resolved."""
+    check_object(definition, "", LEVEL_KEYS)
+    presets = {"standard": scenario.destroyerWeaponStat}
+    for name, stat in field(definition, "", "weapons", (dict,), {}).items():
+        presets[name] = check_weapon_stat(stat, where("weapons", name))
+    player = check_object(field(definition, "", "player", (dict,)), "player", PLAYER_KEYS)
+    ships = field(definition, "", "ships", (list,), [])
+    convoys = field(definition, "", "convoys", (list,), [])
+    return {"name": field(definition, "", "name", (str,), ""),
+            "player": {"x": field(player, "player", "x", NUMBER), "y": field(player, "player", "y", NUMBER),
+                       "heading": field(player, "player", "heading", NUMBER, 0)},
+            "ships": [check_ship(entry, where("ships", i), presets) for i, entry in enumerate(ships)],
+            "convoys": [check_convoy(entry, where("convoys", i), presets) for i, entry in enumerate(convoys)]}
+
+def parse(data: bytes | str) -> dict:
+    """Decode and validate a JSON definition."""
+    try:
+        definition = json.loads(data)
+    except ValueError as error: # Also undecodable bytes
+        raise LevelDefinitionError(f"not valid JSON: {error}") from None
+    return validate(definition)
+
+# Building
+
+def convoy_positions(convoy: dict):
+    """(x, y) of every transport of a convoy, row by row from the leading one."""
+    rng = random.Random(convoy["seed"])
+    heading = math.radians(convoy["heading"])
+    forwardX, forwardY = math.sin(heading), math.cos(heading)
+    columns, rows, spacing, jitter = convoy["columns"], convoy["rows"], convoy["spacing"], convoy["jitter"]
+    for row in range(rows):
+        for column in range(columns):
+            along = ((rows - 1) / 2 - row) * spacing + rng.uniform(-jitter, jitter)
+            across = (column - (columns - 1) / 2) * spacing + rng.uniform(-jitter, jitter)
+            # Starboard is forward turned a quarter clockwise
+            yield convoy["x"] + forwardX * along + forwardY * across, convoy["y"] + forwardY * along - forwardX * across
+
+def escort_positions(convoy: dict):
+    """(x, y) of every escort of a convoy, on a ring around its corners starting dead ahead."""
+    escorts = convoy["escorts"]
+    radius = math.hypot(convoy["columns"] - 1, convoy["rows"] - 1) * convoy["spacing"] / 2 + escorts["distance"]
+    for i in range(escorts["count"]):
+        angle = math.radians(convoy["heading"]) + 2 * math.pi * i / escorts["count"]
+        yield convoy["x"] + radius * math.sin(angle), convoy["y"] + radius * math.cos(angle)
+
+def make_ship(entry: dict, x: float, y: float, heading: float) -> ship.enemyShip:
+    entityId = level.registry.next_id()
+    if entry["type"] == "destroyer":
+        made = ship.destroyer(entityId, x, y, heading, entry["weapons"])
+    else:
+        made = ship.transport(entityId, x, y, heading, *entry["cargo"])
+    made.throttle = entry["throttle"]
+    if entry["behaviour"] is not None:
+        made.ai_behaviour = entry["behaviour"]
+    if entry["combat"] is not None:
+        made.ai_combatMode = entry["combat"]
+    return made
+
+def build(definition: dict) -> list[ship.Entity]:
+    """Entities of a validated definition, make them the current level with level.loadEntities."""
+    # Constructors spawn into the level, give them an empty one to fill
+    level.entityList = []
+    level.registry.clear()
+    player = definition["player"]
+    ship.playerShip(level.registry.next_id(), player["x"], player["y"], player["heading"])
+    for entry in definition["ships"]:
+        make_ship(entry, entry["x"], entry["y"], entry["heading"])
+    for convoy in definition["convoys"]:
+        transport = {"type": "transport", "cargo": convoy["cargo"], "throttle": convoy["throttle"],
+                     "behaviour": convoy["behaviour"], "combat": convoy["combat"]}
+        for x, y in convoy_positions(convoy):
+            make_ship(transport, x, y, convoy["heading"])
+        escort = {"type": "destroyer", **convoy["escorts"]}
+        for x, y in escort_positions(convoy):
+            make_ship(escort, x, y, convoy["heading"])
+    return level.entityList
+
+# Cache
+
+codeHash = None # Hash of the code that builds levels, see definition_hash
+
+def definition_hash(data: bytes) -> str:
+    global codeHash
+    if codeHash is None:
+        digest = hashlib.sha256(f"{FORMAT_VERSION} {savefile.VERSION}".encode())
+        for source in BUILD_SOURCES:
+            with open(source, "rb") as file:
+                digest.update(file.read())
+        codeHash = digest.digest()
+    return hashlib.sha256(codeHash + data).hexdigest()
+
+def cache_path(path: str, data: bytes) -> str:
+    return os.path.join(CACHE_DIR, f"{level_stem(path)}-{definition_hash(data)[:16]}.sav")
+
+def level_stem(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+def compile_level(path: str, data: bytes | None = None) -> list[ship.Entity]:
+    """Build a definition file, write the build to the cache and return the built entities."""
+    if data is None:
+        with open(path, "rb") as file:
+            data = file.read()
+    try:
+        definition = parse(data)
+    except LevelDefinitionError as error:
+        raise LevelDefinitionError(f"{path}: {error}") from None
+    entities = build(definition)
+    encoded = savefile.encode(entities)
+    cached = cache_path(path, data)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Drop the builds of earlier versions of this definition
+    for name in os.listdir(CACHE_DIR):
+        if re.fullmatch(re.escape(level_stem(path)) + r"-[0-9a-f]{16}\.sav", name):
+            os.remove(os.path.join(CACHE_DIR, name))
+    savefile.write(encoded, cached)
+    return entities
+
+def load(path: str, progress=None) -> list[ship.Entity]:
+    """Entities of a definition file, from its cached build when the definition hasn't changed."""
+    level.reportProgress(progress, 0.0, "Reading level definition")
+    with open(path, "rb") as file:
+        data = file.read()
+    cached = cache_path(path, data)
+    if os.path.exists(cached):
+        try:
+            level.reportProgress(progress, 0.1, "Reading compiled level")
+            return savefile.load(cached)
+        except savefile.SaveFormatError:
+            pass # Written by another version of the save format, build it again
+    level.reportProgress(progress, 0.1, "Compiling level definition")
+    return compile_level(path, data)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Level definition tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    check_command = commands.add_parser("check", help="validate level definitions")
+    check_command.add_argument("paths", nargs="+")
+    compile_command = commands.add_parser("compile", help="build level definitions into the level cache")
+    compile_command.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+
+    for path in args.paths:
+        with open(path, "rb") as file:
+            data = file.read()
+        try:
+            match args.command:
+                case "check":
+                    definition = parse(data)
+                    ships = 1 + len(definition["ships"]) + sum(convoy["columns"] * convoy["rows"] + convoy["escorts"]["count"] for convoy in definition["convoys"])
+                    print(f"{path}: ok, {ships} ships")
+                case "compile":
+                    compile_level(path, data)
+                    print(f"{path}: {cache_path(path, data)}")
+        except LevelDefinitionError as error:
+            parser.exit(1, f"{error}\n")
@@ -0,0 +1,72 @@
+import threading
+import pygame
+import assets
+import gameui
+import level
+import textcache
+
+# Level loading on a worker thread, while the main loop keeps drawing a progress screen.
+#
+# menu.menu starts a LevelLoader with start() and returns the "loading" gamestate. main.py then draws
+# draw_progress() every frame and switches to "game" once the loader is done. The worker reads the save, makes it
+# the current level (registry, spatial index, sensors, radio and world store, see level.loadSave) and loads the
+# panel's images, so the first game frame only has to create the fonts and convert the images to the display format
+# (see gameui.warm_sprites). Fonts stay on the main thread, which renders the progress text meanwhile. Nothing else
+# touches the level meanwhile: the menu has returned and the game loop doesn't tick while loading.
+
+BAR_COLOR = (0, 128, 255)
+
+class LevelLoader:
+    path: str
+    fraction: float     # Progress from 0 to 1
+    stage: str          # What the worker is doing
+    error: Exception | None  # Why loading failed, None while loading or when it succeeded
+    thread: threading.Thread
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fraction = 0.0
+        self.stage = "Starting"
+        self.error = None
+        self.thread = threading.Thread(target=self.run, name=f"load {path}", daemon=True)
+        self.thread.start()
+
+    @property
+    def done(self) -> bool:
+        return not self.thread.is_alive()
+
+    def report(self, fraction: float, stage: str):
+        self.fraction = fraction
+        self.stage = stage
+
+    def run(self):
+        try:
+            level.loadSave(self.path, self.report)
+            self.report(0.8, "Loading images")
+            assets.load(gameui.asset_keys()[0])
+            self.report(1.0, "Ready")
+        except Exception as error:
+            self.error = error
+
+current = None # Loader of the level being loaded or last loaded, see start
+
+def start(path: str) -> LevelLoader:
+    global current
+    current = LevelLoader(path)
+    return current
+
+def draw_progress(screen, loader: LevelLoader):
+    """Draw the level name, a progress bar and the current stage."""
+    screen.fill((0, 0, 0))
+    width, height = screen.get_size()
+    font = assets.font(None, 36 * max(1, height // 480), system=False)
+    title = textcache.text.render(font, f"Loading {loader.path}", True, (255, 255, 255), static=True)
+    screen.blit(title, title.get_rect(center=(width // 2, height // 2 - 60)))
+    bar = pygame.Rect(0, 0, width * 2 // 3, 24)
+    bar.center = (width // 2, height // 2)
+    pygame.draw.rect(screen, (255, 255, 255), bar, 2)
+    filled = bar.inflate(-8, -8)
+    filled.width = round(filled.width * loader.fraction)
+    screen.fill(BAR_COLOR, filled)
+    stage = textcache.text.render(font, loader.stage, True, (255, 255, 255))
+    screen.blit(stage, stage.get_rect(center=(width // 2, height // 2 + 50)))
@@ -1,17 +1,55 @@
+import argparse
+import sys
+
+# Command line options
+parser = argparse.ArgumentParser(description="Submarine")
+parser.add_argument("--debug-text", action=argparse.BooleanOptionalAction, help="print every entity on each level update (default: on in game, off headless)")
+parser.add_argument("--insta-game", metavar="SAVE", nargs="?", const="test.p", help="skip the menu and load SAVE, a save or a .json level definition (default: test.p)")
+parser.add_argument("--basic-draw", action="store_true", help="draw the level with debugDrawLevel instead of the game UI")
+parser.add_argument("--keyboard-steering", action=argparse.BooleanOptionalAction, default=True, help="steer with WASD, fire with space")
+parser.add_argument("--fps", type=int, default=60, help="render frame rate limit")
+parser.add_argument("--sim-rate", type=float, default=1.0, help="simulation ticks per second, independent of --fps (default: 1)")
+parser.add_argument("--world", action="store_true", help="tick ships through the NumPy world store")
+parser.add_argument("--profile", action="store_true", help="time simulation and drawing sections from the start (F3 toggles the overlay in game)")
+parser.add_argument("--profile-out", metavar="FILE", help="write the section timings to FILE (.csv or .json) on exit, implies --profile")
+parser.add_argument("--autosave", type=float, default=60.0, metavar="SECONDS", help="autosave interval in real seconds, 0 disables it (default: 60)")
+parser.add_argument("--autosave-slots", type=int, default=3, metavar="N", help="number of rotating autosave files in autosaves/ (default: 3)")
+parser.add_argument("--seed", type=int, help="seed for all simulation randomness (default: a new one every run)")
+parser.add_argument("--record", metavar="FILE", help="record the session to FILE on exit, replay it with `python replay.py play FILE`")
+headless_group = parser.add_argument_group("headless", "run the simulation without a window")
+headless_group.add_argument("--headless", metavar="SAVE", help="load SAVE and step it as fast as possible, then print a summary")
+headless_group.add_argument("--ticks", type=int, default=10000, help="maximum number of ticks to run (default: 10000)")
+headless_group.add_argument("--stop-on", nargs="*", choices=["player-dead", "transports-sunk"], default=["player-dead", "transports-sunk"],
+                            help="conditions that end the run early (default: both)")
+args = parser.parse_args()
+
+import profiler
+profiler.request(args.profile or args.profile_out is not None)
+
+if args.headless:
+    import headless
+    headless.print_summary(headless.run(args.headless, args.ticks, args.stop_on, bool(args.debug_text), args.world, args.seed))
+    if args.profile_out:
+        profiler.export(args.profile_out)
+    sys.exit()
+
 import pygame
 import level
 import menu
 import gameui
+import loading
 import settings
+from autosave import AutoSaver
+from timestep import FixedTimestep
 
 # Debug settings
-debugText = True
-debugInstaGame = False
-debugBasicDraw = False
-debugKeyboardSteering = True
+debugText = args.debug_text is not False
+debugInstaGame = args.insta_game is not None
+debugBasicDraw = args.basic_draw
+debugKeyboardSteering = args.keyboard_steering
 
 # Game loop settings
-fps = 60
+fps = args.fps
 
 # Initialize Pygame
 pygame.init()
@@ -19,8 +57,13 @@ clock = pygame.time.Clock()
 screen = pygame.display.set_mode((settings.SCREEN_WIDTH, settings.SCREEN_HEIGHT))
 pygame.display.set_caption("Submarine")
 
-tick = 0
-tickPerLoop = 60
+timestep = FixedTimestep(args.sim_rate)
+dt = 0.0 # Real seconds since the previous frame
+autosaver = AutoSaver(slots=args.autosave_slots, interval=args.autosave)
+level.seedRandom(args.seed)
+if args.record:
+    from replay import Recorder
+    level.recorder = Recorder(args.seed)
 
 # Game loop
 gamestate = "menu"
@@ -28,21 +71,36 @@ running = True
 
 if debugInstaGame:
     gamestate = "game"
-    level.loadSave("test.p")
+    level.loadSave(args.insta_game)
+    gameui.warm_sprites()
+level.enableWorld(args.world)
 
 while running:
-    # Tick management
-    tick = (tick + 1) % tickPerLoop
-    
     # Game logic
     match gamestate:
         case "menu":
             # Menu logic
-            running, gamestate = menu.menu(screen, clock, fps)
+            # Load the game's images and fonts while the menu is shown
+            running, gamestate = menu.menu(screen, clock, fps, gameui.prefetch_assets)
+            timestep.reset()
+            gameui.panel.invalidate()
+        case "loading":
+            # The level loads on a worker thread, the game starts once everything is ready
+            loader = loading.current
+            if loader.done:
+                if loader.error is not None:
+                    print(f"Could not load {loader.path}: {loader.error}")
+                    gamestate = "menu"
+                else:
+                    gameui.warm_sprites()
+                    timestep.reset()
+                    gamestate = "game"
         case "game":
-            # Game logic
-            if tick == 0:
+            # Game logic, run as many fixed sim steps as the real frame time allows
+            for step in range(timestep.advance(dt)):
+                level.snapshotPoses()
                 level.updateLevel(debugText)  # Update the level and all entities
+            autosaver.tick(level.entityList, level.registry.nextId)
             pass
 
 
@@ -55,6 +113,8 @@ while running:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         gameui.switch_screen(gameui.UIScreen.PANEL)
+                    if event.key == pygame.K_F3:
+                        profiler.toggle_overlay()
                     if debugKeyboardSteering:
                         if event.key == pygame.K_w:
                             level.playerShip.throttle = min(level.playerShip.throttle+10, 100)
@@ -74,29 +134,51 @@ while running:
                     if event.key == pygame.K_ESCAPE or event.key == pygame.K_q:
                         gamestate = "game"
                     if event.key == pygame.K_s:
-                        level.saveLevel(level.entityList, "savestate1.p")
+                        autosaver.save(level.entityList, "savestate1.p", level.registry.nextId)
 
         if event.type == pygame.QUIT:
             running = False
 
     # Drawing
+    started = profiler.start()
     match gamestate:
         case "game":
             # Draw game
             if debugBasicDraw:
                 screen.fill((0, 0, 0))
-                level.debugDrawLevel(screen)
+                level.debugDrawLevel(screen, timestep.alpha)
             else:
-                if not gameui.draw_ui(screen, events):
+                if not gameui.draw_ui(screen, events, dt, timestep.alpha):
                     gamestate = "menu"
+            if profiler.overlay:
+                gameui.draw_profiler_overlay(screen)
             pass
+        case "loading":
+            loading.draw_progress(screen, loading.current)
         case "pause":
             # Draw pause menu
             gameui.draw_pause_screen(screen)
+    profiler.stop("ui draw", started)
 
     # Display update
-    clock.tick(fps)
-    pygame.display.update()
+    dt = clock.tick(fps) / 1000
+    started = profiler.start()
+    # The panel only reports the rects it redrew, every other screen is redrawn whole
+    rects = gameui.panel.rects if gamestate == "game" and not debugBasicDraw else None
+    if rects is None:
+        pygame.display.update()
+    else:
+        pygame.display.update(rects)
+    profiler.stop("display flip", started)
+    profiler.flush()
+
+if args.profile_out:
+    profiler.export(args.profile_out)
+
+# Finish a save still being written
+autosaver.wait()
+if level.recorder is not None and level.recorder.levelData is not None:
+    level.recorder.save(args.record)
 
 # Quit Pygame
 pygame.quit()
\ No newline at end of file
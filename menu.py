@@ -1,9 +1,11 @@
 import pygame
-import os
 import random as rand
 import math
 import copy
-import level
+import assets
+import loading
+import sprites
+import textcache
 
 MAX_OPTION = 3  # Max option number in the main menu (from 0 to 3).
 MAX_LVL_SEL_SUBM_OPTION = 1 # Max option in level select submenu (from 0 to 1).
@@ -32,7 +34,8 @@ def level_select_submenu() -> str:
 
 # Return values: First value returns False when whole game is meant to stop running (sets running = False (in "main.py" game loop)).
 #                Second value returns "gamestate" chosen by player in menu.
-def menu(screen: pygame.Surface, clock: pygame.time.Clock, fps: int) -> tuple[bool, str]:
+# on_shown is called once the first menu frame is on screen, e.g. to start loading the game in the background.
+def menu(screen: pygame.Surface, clock: pygame.time.Clock, fps: int, on_shown=None) -> tuple[bool, str]:
 
     gamestate = "menu"
 
@@ -51,19 +54,19 @@ def menu(screen: pygame.Surface, clock: pygame.time.Clock, fps: int) -> tuple[bo
 
     screen_width, screen_height = screen.get_size()
 
-    # Font loading logic
+    # Font loading logic (fonts and rendered texts are kept between menu visits)
     # Fonts and option texts primarly optimized for 480x640 window:
-    font_option = pygame.font.Font(None, 36 * (screen_height//480))
-    font_menu = pygame.font.Font(None, 60 * (screen_height//480))
+    font_option = assets.font(None, 36 * (screen_height//480), system=False)
+    font_menu = assets.font(None, 60 * (screen_height//480), system=False)
     
     # Rendering menu screen logic
 
     # Rendering "Main Menu" main header text on the top
-    main_menu_text_render = font_menu.render("Main Menu", True, (255, 255, 255))  # White "Main Menu" text
+    main_menu_text_render = textcache.text.render(font_menu, "Main Menu", True, (255, 255, 255), static=True)  # White "Main Menu" text
     main_menu_text_rect = main_menu_text_render.get_rect(center=(screen_width//2, screen_height//6))
     # Center in 1/2 of width and 1/6 of window height.
     # Rendering "Level Select" main header text on the top
-    level_select_text_render = font_menu.render("Level Select", True, (255, 255, 255))  # White "Level Select" text
+    level_select_text_render = textcache.text.render(font_menu, "Level Select", True, (255, 255, 255), static=True)  # White "Level Select" text
     level_select_text_rect = level_select_text_render.get_rect(center=(screen_width//2, screen_height//6))
 
     #!Maybe delete reduntant (repeated) code lines later.
@@ -74,13 +77,13 @@ def menu(screen: pygame.Surface, clock: pygame.time.Clock, fps: int) -> tuple[bo
     level_select_option_text_renders = []
     level_select_option_text_rects = []
     for option in options:
-        option_text_renders.append(font_option.render(option, True, (255, 255, 255)))
+        option_text_renders.append(textcache.text.render(font_option, option, True, (255, 255, 255), static=True))
         option_text_rects.append(option_text_renders[option_count].get_rect(center=(screen_width//2, (screen_height//6)*(option_count+2))))
         # Centers of options in 1/2 of window width and spread across 2/6, 3/6, 4/6 and 5/6 of window heights.
         option_count += 1
     option_count = 0
     for option in level_select_submenu_options:
-        level_select_option_text_renders.append(font_option.render(option, True, (255, 255, 255)))
+        level_select_option_text_renders.append(textcache.text.render(font_option, option, True, (255, 255, 255), static=True))
         level_select_option_text_rects.append(level_select_option_text_renders[option_count].get_rect(center=(screen_width//2, (screen_height//6)*(option_count+2))))
         # Centers of options in 1/2 of window width and spread across 2/6 and 3/6 of window heights.
         option_count += 1
@@ -88,16 +91,10 @@ def menu(screen: pygame.Surface, clock: pygame.time.Clock, fps: int) -> tuple[bo
     selected_option = 0
     
     # Submarine "arrow" select indicator image loading
-    base_path = os.path.abspath(os.path.dirname(__file__))
-    imgs_path = os.path.join(base_path, "assets", "img")
-    ship_img_path = os.path.join(imgs_path, "option_selector_ship.png")
-    option_select = pygame.image.load(ship_img_path)
-    option_select = pygame.transform.scale(option_select, (100, 57))
+    option_select = sprites.get("option_selector_ship.png", scale=(100, 57))
 
     # Bubble image loading
-    bubble_img_path = os.path.join(imgs_path, "bubble.png")
-    bubble = pygame.image.load(bubble_img_path)
-    bubble = pygame.transform.scale(bubble, (29, 29))
+    bubble = sprites.get("bubble.png", scale=(29, 29))
     bubbles = {}
 
     rand.seed()
@@ -130,18 +127,18 @@ def menu(screen: pygame.Surface, clock: pygame.time.Clock, fps: int) -> tuple[bo
                             is_level_select = True
                             is_main_menu = False
                         elif is_level_select:
-                            level.loadSave("level1.p") # Load level 1
+                            loading.start("level1.p") # Load level 1 in the background
                             menu_running = False
-                            gamestate = "game"
+                            gamestate = "loading"
                     elif selected_option == 1: # Load Game
                         if is_main_menu:
-                            level.loadSave("savestate1.p")
+                            loading.start("savestate1.p") # Load the save in the background
                             menu_running = False
-                            gamestate = "game"
+                            gamestate = "loading"
                         elif is_level_select:
-                            level.loadSave("level2.p") # Load level 2
+                            loading.start("level2.p") # Load level 2 in the background
                             menu_running = False
-                            gamestate = "game"
+                            gamestate = "loading"
                     elif selected_option == 2: # Settings
                         pass
                     elif selected_option == 3: # Quit Game
@@ -199,6 +196,9 @@ def menu(screen: pygame.Surface, clock: pygame.time.Clock, fps: int) -> tuple[bo
         screen.blit(option_select, (screen_width * 0.15, ((screen_height//6) * (selected_option+2)) - ((screen_height//13) // (screen_height/480))))
         
         pygame.display.flip()
+        if on_shown is not None:
+            on_shown()
+            on_shown = None
 
         clock.tick(fps)
     
@@ -0,0 +1,225 @@
+import argparse
+import itertools
+import json
+import math
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+import level
+import ship
+
+# Batch runner for balance sweeps, run with `python montecarlo.py LEVEL... --set destroyerShipStat.3=10,12 --seeds 100`.
+#
+# Every combination of level file, stat overrides and seed is one engagement, simulated headless in a process pool
+# with the player driven by auto_torpedo. Overrides are applied inside the worker, both to the stat lists in ship.py
+# (for entities created during the run, e.g. torpedoes) and to the matching entities of the loaded level, and undone
+# after the run since workers are reused. Engagements share nothing, so throughput scales with the worker count.
+
+# Stat list in ship.py -> entity type it is applied to and the attribute of each index
+SHIP_STAT_ATTRIBUTES = ("length", "width", "health_max", "speed_max", "speed_min", "speed_acceleration",
+                        "speed_deceleration", "steer_max", "steer_speed", "base_visibility")
+STAT_ATTRIBUTES = {
+    "torpedoStat": ("torpedo", SHIP_STAT_ATTRIBUTES),
+    "playerShipStat": ("playerShip", SHIP_STAT_ATTRIBUTES),
+    "destroyerShipStat": ("destroyer", SHIP_STAT_ATTRIBUTES),
+    "transportShipStat": ("transport", SHIP_STAT_ATTRIBUTES),
+    "playerSubmarineStat": ("playerShip", ("battery_max", "battery_depletion_rate", "battery_recharge_rate",
+                                           "underwater_speed_mult", "torpedo_tubes", "torpedo_time_reload")),
+    "destroyerSensorStat": ("destroyer", ("visual_range", "visual_skill", "noise_range", "noise_skill")),
+    "transportSensorStat": ("transport", ("visual_range", "visual_skill", "noise_range", "noise_skill")),
+    "destroyerRadioStat": ("destroyer", ("radio_range", "radio_skill")),
+    "transportRadioStat": ("transport", ("radio_range", "radio_skill")),
+}
+
+def parse_override(text: str) -> list[tuple[str, int, float]]:
+    """'destroyerShipStat.3=10,12' -> [("destroyerShipStat", 3, 10), ("destroyerShipStat", 3, 12)]"""
+    target, _, values = text.partition("=")
+    stat, _, index = target.partition(".")
+    if stat not in STAT_ATTRIBUTES or not index.isdigit() or int(index) >= len(STAT_ATTRIBUTES[stat][1]) or not values:
+        raise argparse.ArgumentTypeError(f"expected STAT.INDEX=VALUE[,VALUE...] with STAT one of {', '.join(STAT_ATTRIBUTES)}")
+    return [(stat, int(index), json.loads(value)) for value in values.split(",")]
+
+def apply_overrides(overrides: tuple, entityList: list) -> list:
+    """Set the stat list entries and entity attributes, returns what is needed to undo the list and class changes."""
+    undo = []
+    for stat, index, value in overrides:
+        statList = getattr(ship, stat)
+        undo.append((statList, index, statList[index]))
+        statList[index] = value
+        type, attributes = STAT_ATTRIBUTES[stat]
+        name = attributes[index]
+        cls = getattr(ship, type)
+        if name in vars(cls):
+            # Class level stat (sensors, radio), shared by every entity of the class
+            undo.append((cls, name, vars(cls)[name]))
+            setattr(cls, name, value)
+            continue
+        for entity in entityList:
+            if entity.type != type:
+                continue
+            if name == "health_max" and entity.health == entity.health_max:
+                entity.health = value
+            if name == "battery_max" and entity.battery == entity.battery_max:
+                entity.battery = value
+            if name == "torpedo_tubes":
+                # One entry per tube, extra tubes start like the first one
+                for tubes in (entity.torpedo_tube_lastFired, entity.torpedo_tube_targetAngle, entity.torpedo_tube_targetSpeed):
+                    tubes[:] = (tubes + [tubes[0]] * value)[:value]
+            setattr(entity, name, value)
+    return undo
+
+def undo_overrides(undo: list):
+    for target, key, value in reversed(undo):
+        if isinstance(target, list):
+            target[key] = value
+        else:
+            setattr(target, key, value)
+
+# Player policy
+
+def lead_angle(shooter: ship.Ship, target: ship.Ship, speed: float) -> float:
+    """Heading in degrees for a projectile at speed to meet a target holding its course."""
+    vx = target.speed * math.cos(math.radians(target.heading))
+    vy = target.speed * math.sin(math.radians(target.heading))
+    x, y = target.x, target.y
+    for i in range(3):
+        time = math.hypot(x - shooter.x, y - shooter.y) / speed
+        x, y = target.x + vx * time, target.y + vy * time
+    return math.degrees(math.atan2(y - shooter.y, x - shooter.x)) % 360
+
+def auto_torpedo(player: ship.playerShip, maxRange: float) -> int:
+    """Fire a loaded tube at the nearest transport in range, returns the number of torpedoes launched."""
+    targets = [entity for entity in level.registry.of_type("transport") if entity.alive]
+    if not targets:
+        return 0
+    target = min(targets, key=lambda entity: math.hypot(entity.x - player.x, entity.y - player.y))
+    if math.hypot(target.x - player.x, target.y - player.y) > maxRange:
+        return 0
+    for tube in range(player.torpedo_tubes):
+        if player.torpedo_tube_lastFired[tube] > 0:
+            continue
+        player.torpedo_tube_targetAngle[tube] = lead_angle(player, target, player.torpedo_tube_targetSpeed[tube])
+        player.attack_torpedo(tube)
+        # One torpedo per tick, the next one is aimed with the target's new position
+        return 1
+    return 0
+
+# Engagements
+
+def run_engagement(job: tuple) -> dict:
+    """Simulate one (level, overrides, seed) engagement, runs in a worker process."""
+    saveName, overrides, seed, maxTicks, useWorld = job
+    level.loadSave(saveName)
+    undo = apply_overrides(overrides, level.entityList)
+    try:
+        level.enableWorld(useWorld)
+        level.seedRandom(seed)
+        player = level.get_player()
+        transports = list(level.registry.of_type("transport"))
+        # Torpedoes run out after 180 ticks, see torpedo.tick_before
+        torpedoRange = ship.torpedoStat[3] * 180
+        healthStart = player.health
+        torpedoes = 0
+        sunk = 0
+        firstSink = None
+        outcome = "timeout"
+        tick = 0
+        while tick < maxTicks:
+            if not player.alive:
+                outcome = "loss"
+                break
+            if transports and sunk == len(transports):
+                outcome = "win"
+                break
+            torpedoes += auto_torpedo(player, torpedoRange)
+            level.updateLevel(False)
+            tick += 1
+            sunk = sum(1 for entity in transports if not entity.alive)
+            if sunk and firstSink is None:
+                firstSink = tick
+        level.enableWorld(False)
+        return {
+            "level": saveName,
+            "overrides": [list(override) for override in overrides],
+            "seed": seed,
+            "outcome": outcome,
+            "ticks": tick,
+            "first_sink_tick": firstSink,
+            "transports_sunk": sunk,
+            "transports": len(transports),
+            "torpedoes": torpedoes,
+            "player_damage": healthStart - max(player.health, 0),
+        }
+    finally:
+        undo_overrides(undo)
+
+def make_jobs(levels: list[str], overrideOptions: list[list], seeds: list[int], maxTicks: int, useWorld: bool) -> list[tuple]:
+    """Every combination of level, one value per overridden stat and seed."""
+    variants = list(itertools.product(*overrideOptions))
+    return [(saveName, variant, seed, maxTicks, useWorld) for saveName in levels for variant in variants for seed in seeds]
+
+def run_jobs(jobs: list[tuple], workers: int | None = None) -> list[dict]:
+    if workers == 1:
+        return [run_engagement(job) for job in jobs]
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(workers) as pool:
+        # Chunks keep the per-job IPC small next to a simulated engagement
+        return list(pool.map(run_engagement, jobs, chunksize=max(1, len(jobs) // (workers * 8))))
+
+def aggregate(results: list[dict]) -> list[dict]:
+    """Outcome statistics per level and overrides."""
+    groups = {}
+    for result in results:
+        groups.setdefault((result["level"], json.dumps(result["overrides"])), []).append(result)
+    summary = []
+    for (saveName, overrides), runs in groups.items():
+        sinkTicks = [run["first_sink_tick"] for run in runs if run["first_sink_tick"] is not None]
+        wins = [run["ticks"] for run in runs if run["outcome"] == "win"]
+        summary.append({
+            "level": saveName,
+            "overrides": json.loads(overrides),
+            "runs": len(runs),
+            "win_rate": len(wins) / len(runs),
+            "loss_rate": sum(1 for run in runs if run["outcome"] == "loss") / len(runs),
+            "mean_ticks_to_first_sink": statistics.fmean(sinkTicks) if sinkTicks else None,
+            "mean_ticks_to_win": statistics.fmean(wins) if wins else None,
+            "mean_transports_sunk": statistics.fmean(run["transports_sunk"] for run in runs),
+            "mean_torpedoes": statistics.fmean(run["torpedoes"] for run in runs),
+            "mean_player_damage": statistics.fmean(run["player_damage"] for run in runs),
+        })
+    return summary
+
+def print_summary(summary: list[dict]):
+    def number(value, digits=1):
+        return "-" if value is None else f"{value:.{digits}f}"
+    print(f"{'level':<14} {'overrides':<32} {'runs':>5} {'win':>6} {'loss':>6} {'1st sink':>9} {'win tick':>9} {'torps':>6} {'damage':>8}")
+    for entry in summary:
+        overrides = " ".join(f"{stat}.{index}={value}" for stat, index, value in entry["overrides"]) or "-"
+        print(f"{entry['level']:<14} {overrides:<32} {entry['runs']:>5} {entry['win_rate']:>6.1%} {entry['loss_rate']:>6.1%} "
+              f"{number(entry['mean_ticks_to_first_sink']):>9} {number(entry['mean_ticks_to_win']):>9} "
+              f"{entry['mean_torpedoes']:>6.2f} {entry['mean_player_damage']:>8.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo balance sweeps over levels, stat overrides and seeds")
+    parser.add_argument("levels", nargs="+", help="level or save files to simulate")
+    parser.add_argument("--set", dest="overrides", type=parse_override, action="append", default=[], metavar="STAT.INDEX=VALUES",
+                        help="stat list entry to sweep, e.g. destroyerShipStat.3=10,12,14 (repeatable, combinations are crossed)")
+    parser.add_argument("--seeds", type=int, default=100, help="engagements per level and overrides (default: 100)")
+    parser.add_argument("--first-seed", type=int, default=0, help="seed of the first engagement (default: 0)")
+    parser.add_argument("--ticks", type=int, default=3000, help="ticks before an engagement counts as a timeout (default: 3000)")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core, 1 runs in this process)")
+    parser.add_argument("--world", action="store_true", help="tick ships through the NumPy world store")
+    parser.add_argument("--output", help="JSON file for the summary and every engagement's result")
+    args = parser.parse_args()
+
+    jobs = make_jobs(args.levels, args.overrides, list(range(args.first_seed, args.first_seed + args.seeds)), args.ticks, args.world)
+    start = time.perf_counter()
+    results = run_jobs(jobs, args.workers)
+    elapsed = time.perf_counter() - start
+    summary = aggregate(results)
+    print_summary(summary)
+    print(f"{len(jobs)} engagements in {elapsed:.2f} s ({len(jobs) / elapsed:.1f}/s, {sum(result['ticks'] for result in results) / elapsed:.0f} ticks/s)")
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"summary": summary, "results": results}, file, indent=2)
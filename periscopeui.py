@@ -1,21 +1,89 @@
 import pygame
+import numpy as np
 import level
-import ship
-import math
+import sprites
 
-def draw_ship(screen, location, size):
-    width = size
-    height = size // 3
-    rect = pygame.Rect(location[0] - width // 2, location[1] - height // 2, width, height)
-    pygame.draw.rect(screen, (0, 128, 255), rect)
+# Periscope view: every ship is placed by its bearing relative to the periscope and scaled by its range.
+#
+# Bearings and ranges of all candidates are computed in one NumPy pass and culled to the field of view. The ships
+# left are drawn far to near so nearer hulls cover farther ones, each with a silhouette from the sprites cache,
+# pre-rendered per ship type and size bucket, so a frame costs one array pass and one batched blit however many
+# ships are on the horizon. The player and torpedoes are never drawn.
 
-def draw_periscope(screen, events, curr_ang, fov, my_ship):
-    pressed = pygame.key.get_pressed()  # Ensure key states are updated
-    if pressed[pygame.K_LEFT]:
-        level.playerShip.periscope_angle -= 15 * 1/60
-    if pressed[pygame.K_RIGHT]:
-        level.playerShip.periscope_angle += 15 * 1/60
+PERISCOPE_TYPES = ("destroyer", "transport") # Entity types visible through the periscope
+MIN_SIZE = 10     # Sprite width in pixels at MAX_DIST and beyond
+MAX_SIZE = 80     # Sprite width in pixels at MIN_DIST and closer
+MIN_DIST = 10
+MAX_DIST = 1000
+SIZE_BUCKET = 4   # Sprite widths are rounded to this many pixels, bounding the cache to a few sprites per type
+
+HULL_COLOR = (0, 128, 255)
+SUPERSTRUCTURE_COLOR = (0, 90, 190)
+
+poses = {"key": None} # Candidates and their positions before and after the last tick, see tick_poses
+
+def silhouette(type: str, width: int) -> pygame.Surface:
+    """Side view of a ship of the given type, width pixels long and a third of that high, cached."""
+    return sprites.cached(("silhouette", type, width), lambda: draw_silhouette(type, width))
+
+def draw_silhouette(type: str, width: int) -> pygame.Surface:
+    height = max(3, width // 3)
+    sprite = pygame.Surface((width, height), pygame.SRCALPHA)
+    hull = height // 2
+    # Hull, with a raked bow on the right
+    pygame.draw.polygon(sprite, HULL_COLOR, [(0, height - hull), (width - 1, height - hull - hull // 3), (width - width // 8, height - 1), (width // 16, height - 1)])
+    match type:
+        case "destroyer":
+            # Low bridge forward and a funnel amidships
+            pygame.draw.rect(sprite, SUPERSTRUCTURE_COLOR, (width * 5 // 8, height - hull - hull * 2 // 3, width // 6, hull * 2 // 3))
+            pygame.draw.rect(sprite, SUPERSTRUCTURE_COLOR, (width * 3 // 8, 0, max(1, width // 14), height - hull))
+        case _:
+            # Block superstructure aft and two masts
+            pygame.draw.rect(sprite, SUPERSTRUCTURE_COLOR, (width // 6, height - hull - hull * 3 // 4, width // 4, hull * 3 // 4))
+            pygame.draw.line(sprite, SUPERSTRUCTURE_COLOR, (width // 2, 0), (width // 2, height - hull))
+            pygame.draw.line(sprite, SUPERSTRUCTURE_COLOR, (width * 3 // 4, 0), (width * 3 // 4, height - hull))
+    return sprite
+
+def warm_sprites():
+    """Draw the silhouettes of every type and size bucket ahead of the first periscope frame."""
+    for type in PERISCOPE_TYPES:
+        for width in range(SIZE_BUCKET, MAX_SIZE + 1, SIZE_BUCKET):
+            silhouette(type, width)
+
+def tick_poses():
+    """(candidates, previous positions, current positions), gathered once per tick since they only change in ticks."""
+    key = (id(level.entityList), level.tickCount, len(level.entityList))
+    if poses["key"] != key:
+        candidates = [entity for type in PERISCOPE_TYPES for entity in level.registry.of_type(type) if entity.alive]
+        current = np.array([(entity.x, entity.y) for entity in candidates], dtype=np.float64).reshape(-1, 2)
+        # Ships without a previous pose stay put, like level.interpolatedPose
+        previous = current.copy()
+        for i, entity in enumerate(candidates):
+            pose = level.previousPoses.get(id(entity))
+            if pose is not None:
+                previous[i] = pose[:2]
+        poses.update(key=key, candidates=candidates, previous=previous, current=current)
+    return poses["candidates"], poses["previous"], poses["current"]
+
+def visible_ships(curr_ang: float, fov: float, my_x: float, my_y: float, alpha: float = 1.0):
+    """(types, relative bearings, ranges) of the ships in the field of view, ordered far to near."""
+    candidates, previous, current = tick_poses()
+    if not candidates:
+        return [], np.empty(0), np.empty(0)
+    position = current if alpha >= 1 else previous + (current - previous) * alpha
+    dx = position[:, 0] - my_x
+    dy = position[:, 1] - my_y
+    rel_angle = (np.degrees(np.arctan2(dy, dx)) - curr_ang + 180) % 360 - 180
+    inside = np.flatnonzero(np.abs(rel_angle) <= fov / 2)
+    distance = np.hypot(dx[inside], dy[inside])
+    farFirst = np.argsort(-distance, kind="stable")
+    order = inside[farFirst]
+    return [candidates[i].type for i in order.tolist()], rel_angle[order], distance[farFirst]
+
+def render_periscope(screen, curr_ang, fov, my_ship, alpha=1.0):
+    """Draw the periscope view, without handling input."""
     screen_width, screen_height = screen.get_size()
+    my_x, my_y, _ = level.interpolatedPose(my_ship, alpha)
 
     # Calculate the periscope view rectangle
     periscope_rect = pygame.Rect(screen_width // 2 - 200, screen_height // 2 - 150, 400, 300)
@@ -23,39 +91,30 @@ def draw_periscope(screen, events, curr_ang, fov, my_ship):
     # Fill the periscope view area with a dark color
     pygame.draw.rect(screen, (50, 50, 50), periscope_rect)
 
-    # Draw the field of view lines
-    fov_angle_left = curr_ang - fov / 2
-    fov_angle_right = curr_ang + fov / 2
-
-    for sh in level.entityList:
-        if isinstance(sh, ship.Entity) and sh.alive:
-            # Check if the ship is within the field of view
-            angle_to_ship = math.degrees(math.atan2(sh.y - my_ship.y, sh.x - my_ship.x))
-            # Calculate the relative angle between periscope direction and ship
-            rel_angle = angle_to_ship - curr_ang
-            # Normalize to [-180, 180]
-            rel_angle = (rel_angle + 180) % 360 - 180
-
-            # Map relative angle to periscope view width
-            half_fov = fov / 2
-            if -half_fov <= rel_angle <= half_fov:
-                # X position: center + (relative angle / half_fov) * (periscope_rect.width // 2)
-                ship_x = periscope_rect.centerx + (rel_angle / half_fov) * (periscope_rect.width // 2)
-                ship_y = periscope_rect.centery
-                # Normalize the angle to be within 0-360 degrees
-                angle_to_ship = (angle_to_ship + 360) % 360
-                # Check if the ship is within the field of view
-                if fov_angle_left <= angle_to_ship <= fov_angle_right:
-                    distance = math.hypot(sh.x - my_ship.x, sh.y - my_ship.y)
-
-                    min_size = 10
-                    max_size = 80
-
-                    min_dist = 10
-                    max_dist = 1000
-                    # Clamp distance
-                    clamped_dist = max(min_dist, min(distance, max_dist))
-                    # Inverse scale: closer ships are bigger
-                    size = max_size - (clamped_dist - min_dist) / (max_dist - min_dist) * (max_size - min_size)
-                    size = int(size)
-                    draw_ship(screen, (ship_x, ship_y), size)
+    types, rel_angle, distance = visible_ships(curr_ang, fov, my_x, my_y, alpha)
+    if not types:
+        return
+    # X position: center + (relative angle / half_fov) * (periscope_rect.width // 2)
+    ship_x = periscope_rect.centerx + rel_angle / (fov / 2) * (periscope_rect.width // 2)
+    # Inverse scale: closer ships are bigger
+    clamped_dist = np.clip(distance, MIN_DIST, MAX_DIST)
+    size = MAX_SIZE - (clamped_dist - MIN_DIST) / (MAX_DIST - MIN_DIST) * (MAX_SIZE - MIN_SIZE)
+    width = np.maximum(SIZE_BUCKET, np.round(size / SIZE_BUCKET).astype(int) * SIZE_BUCKET)
+
+    blits = []
+    for type, x, w in zip(types, ship_x.tolist(), width.tolist()):
+        sprite = silhouette(type, w)
+        # Waterline on the horizon
+        blits.append((sprite, (x - w // 2, periscope_rect.centery - sprite.get_height() * 2 // 3)))
+    clip = screen.get_clip()
+    screen.set_clip(periscope_rect)
+    screen.blits(blits, doreturn=False)
+    screen.set_clip(clip)
+
+def draw_periscope(screen, events, curr_ang, fov, my_ship, dt=1/60, alpha=1.0):
+    pressed = pygame.key.get_pressed()  # Ensure key states are updated
+    if pressed[pygame.K_LEFT]:
+        level.playerShip.periscope_angle -= 15 * dt
+    if pressed[pygame.K_RIGHT]:
+        level.playerShip.periscope_angle += 15 * dt
+    render_periscope(screen, curr_ang, fov, my_ship, alpha)
@@ -0,0 +1,114 @@
+import csv
+import json
+import time
+from collections import deque
+
+# Low overhead instrumentation for named sections of the frame and the simulation tick.
+#
+#   started = profiler.start()
+#   ...
+#   profiler.stop("movement", started)
+#
+# Time and calls are summed per section until flush() (once per frame, or per tick when headless), then the
+# totals go into a rolling window that percentiles are computed from. While disabled start() returns right away
+# and stop() is a single check, so instrumented code costs next to nothing.
+
+WINDOW = 300 # Flushes kept per section
+
+enabled = False
+requested = False # Whether profiling was asked for from the start (--profile), it then outlives the overlay
+overlay = False # Whether the in-game overlay is shown, see gameui.draw_profiler_overlay
+
+pendingTime = {}  # Section -> seconds since the last flush
+pendingCalls = {} # Section or counter -> calls since the last flush
+times = {}        # Section -> deque of per-flush seconds
+calls = {}        # Section or counter -> deque of per-flush calls
+
+def enable(on=True):
+    global enabled
+    enabled = on
+
+def request(on=True):
+    """Profile the whole run, whether or not the overlay is shown."""
+    global requested
+    requested = on
+    enable(on)
+
+def toggle_overlay():
+    """Show or hide the overlay, profiling runs while it is shown or when it was requested."""
+    global overlay
+    overlay = not overlay
+    enable(overlay or requested)
+
+def reset():
+    pendingTime.clear()
+    pendingCalls.clear()
+    times.clear()
+    calls.clear()
+
+def start() -> float:
+    if not enabled:
+        return 0.0
+    return time.perf_counter()
+
+def stop(name: str, started: float):
+    if not enabled:
+        return
+    elapsed = time.perf_counter() - started
+    pendingTime[name] = pendingTime.get(name, 0.0) + elapsed
+    pendingCalls[name] = pendingCalls.get(name, 0) + 1
+
+def count(name: str, amount: int = 1):
+    """Count calls without timing them, e.g. tick_update calls per entity type."""
+    if not enabled:
+        return
+    pendingCalls[name] = pendingCalls.get(name, 0) + amount
+
+def flush():
+    """Close the current frame or tick, moving the pending totals into the rolling windows."""
+    if not pendingCalls:
+        return
+    for name, elapsed in pendingTime.items():
+        times.setdefault(name, deque(maxlen=WINDOW)).append(elapsed)
+    for name, amount in pendingCalls.items():
+        calls.setdefault(name, deque(maxlen=WINDOW)).append(amount)
+    pendingTime.clear()
+    pendingCalls.clear()
+
+def percentile(samples, p: float) -> float:
+    """Nearest rank percentile of the samples, p from 0 to 100."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+def summary() -> dict[str, dict]:
+    """Per section statistics in milliseconds, counters only report calls."""
+    result = {}
+    for name in sorted(set(times) | set(calls)):
+        samples = times.get(name)
+        amounts = calls.get(name, ())
+        entry = {"samples": len(amounts), "calls": sum(amounts) / len(amounts) if amounts else 0.0}
+        if samples:
+            entry["mean_ms"] = sum(samples) / len(samples) * 1e3
+            entry["p50_ms"] = percentile(samples, 50) * 1e3
+            entry["p90_ms"] = percentile(samples, 90) * 1e3
+            entry["p99_ms"] = percentile(samples, 99) * 1e3
+            entry["max_ms"] = max(samples) * 1e3
+        result[name] = entry
+    return result
+
+def export(path: str):
+    """Write the summary as CSV if the path ends with .csv, JSON otherwise."""
+    data = summary()
+    if path.endswith(".csv"):
+        fields = ["section", "samples", "calls", "mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"]
+        with open(path, "w", newline="") as file:
+            writer = csv.DictWriter(file, fieldnames=fields)
+            writer.writeheader()
+            for name, entry in data.items():
+                writer.writerow({"section": name, **entry})
+    else:
+        with open(path, "w") as file:
+            json.dump(data, file, indent=2)
@@ -0,0 +1,152 @@
+import itertools
+import math
+import numpy as np
+import ship
+
+# Depth charges and hedgehog bombs of every destroyer in one pool of preallocated arrays, ticked by level.scheduler
+# after the entities moved.
+#
+# A depth charge starts out waiting to be dropped: x/y hold its offset from the owner (forward, starboard) until
+# its timer runs out, then it is placed behind or beside the owner's current pose and its timer restarts with the
+# fuse. When a depth charge goes off it damages every ship within its radius, found with a query on the level grid.
+# Hedgehog bombs are placed at their pattern point right away and are contact fused: they only damage a ship whose
+# hull they land on.
+#
+# Timers count down for the whole pool at once. Finished entries are removed by moving entries from the end of the
+# arrays into their rows (swap-remove), so the pool stays packed without shifting. Projectiles in flight are not
+# saved, like radio reports.
+
+DEPTH_CHARGE = 0
+HEDGEHOG = 1
+HEDGEHOG_FLIGHT_TIME = 5  # Ticks from launch until hedgehog bombs reach the water
+DETONATE_CHUNK = 256      # Rows tested against the candidate ships at once, bounds the distance matrix
+
+COLUMNS = {
+    "x": np.float64,        # World position, or the (forward, starboard) offset from the owner while dropping
+    "y": np.float64,
+    "timer": np.int32,      # Ticks until the projectile is dropped or goes off
+    "fuse": np.int32,       # Timer of a depth charge once it is dropped
+    "damage": np.float64,
+    "radius": np.float64,   # Splash radius, 0 for contact fused hedgehog bombs
+    "owner": np.int64,      # Id of the destroyer that launched it
+    "kind": np.int8,        # DEPTH_CHARGE or HEDGEHOG
+    "dropping": bool,       # Still waiting to be dropped from the owner
+}
+
+class ProjectilePool:
+    columns: dict[str, np.ndarray]  # Column name -> array, only the first `count` rows are in use
+    count: int
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = max(1, capacity)
+        self.count = 0
+        self.columns = {name: np.zeros(self.capacity, dtype=dtype) for name, dtype in COLUMNS.items()}
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, column in self.columns.items():
+            grown = np.zeros(self.capacity, dtype=column.dtype)
+            grown[:self.count] = column[:self.count]
+            self.columns[name] = grown
+
+    def clear(self):
+        self.count = 0
+
+    def add(self, kind: int, owner: int, x: float, y: float, timer: int, damage: float, radius: float = 0, fuse: int = 0, dropping: bool = False):
+        if self.count == self.capacity:
+            self._grow()
+        slot = self.count
+        c = self.columns
+        c["x"][slot] = x
+        c["y"][slot] = y
+        c["timer"][slot] = timer
+        c["fuse"][slot] = fuse
+        c["damage"][slot] = damage
+        c["radius"][slot] = radius
+        c["owner"][slot] = owner
+        c["kind"][slot] = kind
+        c["dropping"][slot] = dropping
+        self.count += 1
+
+    def remove(self, rows: np.ndarray):
+        """Swap-remove the given rows (sorted, unique), live rows past the new end fill the holes before it."""
+        n = self.count
+        kept = n - len(rows)
+        holes = rows[rows < kept]
+        tail = np.setdiff1d(np.arange(kept, n), rows, assume_unique=True)
+        for column in self.columns.values():
+            column[holes] = column[tail]
+        self.count = kept
+
+    def update(self):
+        """Count down every timer, drop the depth charges that are due and set off the projectiles that are due."""
+        n = self.count
+        if n == 0:
+            return
+        c = self.columns
+        timer = c["timer"][:n]
+        timer -= 1
+        due = np.flatnonzero(timer <= 0)
+        if not len(due):
+            return
+        dropping = c["dropping"][due]
+        lost = self.drop(due[dropping])
+        detonated = due[~dropping]
+        self.detonate(detonated)
+        # Rows only move once everything due this tick is done
+        self.remove(np.union1d(lost, detonated))
+
+    def drop(self, rows: np.ndarray) -> np.ndarray:
+        """Place depth charges at their offset from the owner's current pose, returns the rows of sunk owners' charges."""
+        from level import registry
+        c = self.columns
+        lost = []
+        for row in rows.tolist():
+            owner = registry.get(int(c["owner"][row]))
+            if owner is None or not owner.alive:
+                lost.append(row)
+                continue
+            forward, starboard = c["x"][row], c["y"][row]
+            heading = math.radians(owner.heading)
+            c["x"][row] = owner.x + forward * math.cos(heading) + starboard * math.sin(heading)
+            c["y"][row] = owner.y + forward * math.sin(heading) - starboard * math.cos(heading)
+        c["timer"][rows] = c["fuse"][rows]
+        c["dropping"][rows] = False
+        return np.array(lost, dtype=np.intp)
+
+    def detonate(self, rows: np.ndarray):
+        """Damage the ships hit by the given rows, in row order."""
+        from level import grid
+        if not len(rows):
+            return
+        c = self.columns
+        xs, ys, radii = c["x"][rows], c["y"][rows], c["radius"][rows]
+        found = [grid.query_radius(x, y, radius) for x, y, radius in zip(xs.tolist(), ys.tolist(), radii.tolist())]
+        # Candidates near any of the rows, each ship's position is read once
+        ships = [entity for entity in dict.fromkeys(itertools.chain.from_iterable(found))
+                 if isinstance(entity, ship.Ship) and entity.type != "torpedo"]
+        if not ships:
+            return
+        shipX = np.fromiter((entity.x for entity in ships), dtype=np.float64, count=len(ships))
+        shipY = np.fromiter((entity.y for entity in ships), dtype=np.float64, count=len(ships))
+        kinds = c["kind"][rows]
+        damages = c["damage"][rows].tolist()
+        for start in range(0, len(rows), DETONATE_CHUNK):
+            end = start + DETONATE_CHUNK
+            dx = shipX - xs[start:end, None]
+            dy = shipY - ys[start:end, None]
+            inside = dx * dx + dy * dy <= (radii[start:end] ** 2)[:, None]
+            inside[kinds[start:end] == HEDGEHOG] = False
+            for k, slot in zip(*np.nonzero(inside)):
+                entity = ships[slot]
+                if entity.alive:
+                    entity.take_damage(damages[start + k])
+            for k in np.flatnonzero(kinds[start:end] == HEDGEHOG).tolist():
+                x, y = xs[start + k].item(), ys[start + k].item()
+                for entity in found[start + k]:
+                    if (isinstance(entity, ship.Ship) and entity.type != "torpedo" and entity.alive
+                            and ship.point_in_rect(x, y, entity.x, entity.y, entity.width, entity.length, entity.heading)):
+                        entity.take_damage(damages[start + k])
@@ -0,0 +1,114 @@
+import heapq
+import itertools
+import math
+import level
+import ship
+
+# Contact sharing between enemy ships over radio, run by level.scheduler after the sensors.
+#
+# Every enemy keeps links to its RADIO_LINKS nearest enemies within its radio_range. The links are found with
+# spatial queries on the level grid that grow until enough enemies are found, and are rebuilt for 1/LINK_PERIOD
+# of the enemies each tick, so no tick checks all pairs and a dense convoy only searches a few cells per enemy.
+#
+# An enemy with a contact newer than its last report (its own sensors or a report it received) sends a report to
+# its links, at most once every REPORT_INTERVAL ticks. The sender's radio_skill sets how long a report takes to
+# arrive and how much error is added to the position and heading. Receivers keep the report if it was observed
+# later than the contact they hold and pass it on, so a contact spreads hop by hop through a convoy while a tick
+# costs at most RADIO_LINKS reports per enemy with something new to tell.
+#
+# Reports only set the lastKnown* attributes. spottedPlayer stays with the ship's own sensors, so ships steer
+# towards a reported position but only open fire once they see or hear the player themselves, and a ship holding
+# its own contact ignores reports until that contact expires. Reports in flight are not saved.
+
+LINK_PERIOD = 30         # Ticks between two link rebuilds of the same enemy
+RADIO_LINKS = 8          # Nearest enemies in range an enemy reports to
+REPORT_INTERVAL = 10     # Ticks between two reports of the same enemy
+RADIO_DELAY_MAX = 20     # Extra ticks a report of a radio_skill 0 sender takes, skill 100 arrives on the next tick
+RADIO_ERROR_MAX = 400    # Standard deviation of the position error added by a radio_skill 0 sender
+RADIO_HEADING_ERROR_MAX = 20  # Standard deviation of the heading error added by a radio_skill 0 sender
+ENEMY_TYPES = ("destroyer", "transport")
+
+links = {}               # Enemy id -> enemies it reports to, nearest first
+reported = {}            # Enemy id -> (lastKnownTime, tick) of its last report
+pending = []             # Heap of (arrival tick, sequence, receiver, report) for reports in flight
+sequence = itertools.count()  # Tie break of reports arriving on the same tick, keeps them in send order
+
+def reset():
+    """Drop the links and reports in flight, called when a level is loaded."""
+    global sequence
+    sequence = itertools.count()
+    links.clear()
+    reported.clear()
+    pending.clear()
+
+def link(enemy: ship.enemyShip):
+    """Rebuild the links of one enemy, searching the level grid outwards until its nearest enemies are found."""
+    reach = enemy.radio_range
+    if reach <= 0:
+        links.pop(enemy.id, None)
+        return
+    x, y = enemy.x, enemy.y
+    radius = min(reach, level.grid.cell_size * 2)
+    while True:
+        inRange = []
+        for other in level.grid.query_radius(x, y, radius):
+            if other is enemy or not isinstance(other, ship.enemyShip) or not other.alive:
+                continue
+            distance = math.hypot(other.x - x, other.y - y)
+            if distance <= radius:
+                inRange.append((distance, other.id, other))
+        # Anything not found yet is farther than radius, so these are the nearest
+        if len(inRange) >= RADIO_LINKS or radius >= reach:
+            break
+        radius = min(reach, radius * 2)
+    links[enemy.id] = [other for distance, id, other in heapq.nsmallest(RADIO_LINKS, inRange)]
+
+def update_links(tick: int, part: int, period: int):
+    """Rebuild the links of this tick's part, run every tick by level.scheduler."""
+    for type in ENEMY_TYPES:
+        for enemy in level.registry.of_type(type):
+            if enemy.id % period == part and enemy.alive:
+                link(enemy)
+    for id in [id for id in links if id % period == part]:
+        enemy = level.registry.get(id)
+        if enemy is None or not enemy.alive:
+            del links[id]
+
+def send(sender: ship.enemyShip, tick: int, rng):
+    lack = (100 - sender.radio_skill) / 100
+    arrival = tick + 1 + round(RADIO_DELAY_MAX * lack)
+    accuracy = round(sender.spottingAccuracy * sender.radio_skill / 100)
+    x, y = sender.lastKnownPosition
+    for receiver in links.get(sender.id, ()):
+        report = ((x + rng.gauss(0, RADIO_ERROR_MAX * lack), y + rng.gauss(0, RADIO_ERROR_MAX * lack)),
+                  (sender.lastKnownHeading + rng.gauss(0, RADIO_HEADING_ERROR_MAX * lack)) % 360,
+                  sender.lastKnownSpeed, sender.lastKnownTime, accuracy)
+        heapq.heappush(pending, (arrival, next(sequence), receiver, report))
+    reported[sender.id] = (sender.lastKnownTime, tick)
+
+def receive(receiver: ship.enemyShip, report: tuple):
+    position, heading, speed, time, accuracy = report
+    if not receiver.alive or receiver.spottedPlayer:
+        return
+    if receiver.lastKnownTime is not None and time <= receiver.lastKnownTime:
+        return
+    receiver.lastKnownPosition = position
+    receiver.lastKnownHeading = heading
+    receiver.lastKnownSpeed = speed
+    receiver.lastKnownTime = time
+    receiver.spottingAccuracy = accuracy
+
+def update(tick: int):
+    """Deliver the reports due this tick, then send the new contacts."""
+    rng = level.randomStream("radio")
+    while pending and pending[0][0] <= tick:
+        arrival, order, receiver, report = heapq.heappop(pending)
+        receive(receiver, report)
+    for id in list(links):
+        sender = level.registry.get(id)
+        if sender is None or not sender.alive or sender.lastKnownTime is None:
+            continue
+        last = reported.get(id)
+        if last is not None and (sender.lastKnownTime <= last[0] or tick - last[1] < REPORT_INTERVAL):
+            continue
+        send(sender, tick, rng)
@@ -0,0 +1,67 @@
+# Index of the level's entities by id and by type, kept up to date by level.spawn and level.despawn.
+#
+# Ids are handed out in increasing order and never reused within a level, so an id stays valid as a reference
+# after its entity is gone. Per-type indexes are dicts (id -> entity) rather than sets so iterating them follows
+# spawn order, which keeps the simulation deterministic (see replay.py).
+
+class Registry:
+    byId: dict[int, object]            # Entity id -> entity
+    byType: dict[str, dict[int, object]]  # Entity type -> (entity id -> entity), in spawn order
+    player: object | None              # The player ship, cached on spawn
+    nextId: int                        # Id given to the next entity that needs one
+
+    def __init__(self):
+        self.byId = {}
+        self.byType = {}
+        self.player = None
+        self.nextId = 0
+
+    def __len__(self):
+        return len(self.byId)
+
+    def __contains__(self, entity):
+        return self.byId.get(entity.id) is entity
+
+    def next_id(self) -> int:
+        id = self.nextId
+        self.nextId += 1
+        return id
+
+    def add(self, entity):
+        """Index an entity, giving it a fresh id if it has none or its id is taken."""
+        if entity.id is None or entity.id in self.byId:
+            entity.id = self.next_id()
+        elif entity.id >= self.nextId:
+            self.nextId = entity.id + 1
+        self.byId[entity.id] = entity
+        self.byType.setdefault(entity.type, {})[entity.id] = entity
+        if entity.type == "playerShip":
+            self.player = entity
+
+    def remove(self, entity):
+        if self.byId.get(entity.id) is not entity:
+            return
+        del self.byId[entity.id]
+        del self.byType[entity.type][entity.id]
+        if entity is self.player:
+            self.player = None
+
+    def clear(self):
+        self.byId.clear()
+        self.byType.clear()
+        self.player = None
+        self.nextId = 0
+
+    def rebuild(self, entities, nextId: int = 0):
+        """Index a loaded level, nextId is the id it was handing out next when it was saved."""
+        self.clear()
+        for entity in entities:
+            self.add(entity)
+        self.nextId = max(self.nextId, nextId)
+
+    def get(self, id: int):
+        return self.byId.get(id)
+
+    def of_type(self, type: str):
+        """Entities of one type in spawn order, e.g. "destroyer", "transport" or "torpedo"."""
+        return self.byType.get(type, {}).values()
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import struct
+import time
+import level
+import profiler
+import savefile
+
+# Input recording and replay.
+#
+# A recording holds the level as it was when recording started (in the savefile format), the seed of the random
+# streams (see level.randomStream) and every change to the player's commands, stamped with the tick it applies
+# before. Since the simulation only depends on these, replaying them headless reproduces the session tick for tick,
+# which the state hash stored at the end of the recording confirms.
+#
+# File layout: MAGIC, u32 header length, JSON header, level in the savefile format.
+
+MAGIC = b"SUBREC\0\0"
+VERSION = 1
+
+# Player attributes that are set from the UI between ticks
+COMMAND_ATTRIBUTES = ("throttle", "steer_target", "torpedo_tube_targetAngle", "torpedo_tube_targetSpeed",
+                      "depth", "periscope_angle", "periscope_active")
+
+class ReplayError(Exception):
+    pass
+
+def state_hash(entityList) -> str:
+    """Hash of the full simulation state, equal for equal states."""
+    return hashlib.sha256(savefile.encode(entityList, level.registry.nextId)).hexdigest()
+
+class Recorder:
+    seed: int | None          # Seed used for the random streams, a new random one per recording if None
+    levelData: bytes | None   # Level at the start of the recording, None until the first tick or command
+    world: bool               # Whether the ships were ticked through the world store
+    ticks: int                # Ticks recorded so far
+    commands: list[list]      # [tick, "set", attribute, value] or [tick, "torpedo", tube]
+    last: dict                # Command attribute -> last recorded value
+
+    def __init__(self, seed: int | None = None):
+        self.seed = seed
+        self.reset()
+
+    def reset(self):
+        """Forget the recording, the next tick starts a new one from the current level."""
+        self.levelData = None
+        self.world = False
+        self.ticks = 0
+        self.commands = []
+        self.last = {}
+
+    def start(self):
+        level.seedRandom(self.seed)
+        self.levelData = savefile.encode(level.entityList, level.registry.nextId)
+        self.world = level.world is not None
+        player = level.get_player()
+        if player is not None:
+            self.last = {name: command_value(player, name) for name in COMMAND_ATTRIBUTES}
+
+    def capture(self):
+        """Record the commands that changed since the last capture."""
+        if self.levelData is None:
+            self.start()
+        player = level.get_player()
+        if player is None:
+            return
+        for name in COMMAND_ATTRIBUTES:
+            value = command_value(player, name)
+            if self.last.get(name) != value:
+                self.commands.append([self.ticks, "set", name, value])
+                self.last[name] = value
+
+    def tick(self):
+        """Called by level.updateLevel before every tick."""
+        self.capture()
+        self.ticks += 1
+
+    def launch(self, player, tube: int):
+        """Called by playerShip.attack_torpedo before the torpedo is created."""
+        self.capture()
+        self.commands.append([self.ticks, "torpedo", tube])
+
+    def save(self, path: str):
+        """Write the recording, ending with the hash of the current state."""
+        if self.levelData is None:
+            raise ReplayError("Nothing recorded yet")
+        # Commands given after the last tick are part of the final state
+        self.capture()
+        header = {
+            "version": VERSION,
+            "seed": level.randomSeed,
+            "world": self.world,
+            "ticks": self.ticks,
+            "hash": state_hash(level.entityList),
+            "commands": self.commands,
+        }
+        data = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        savefile.write(MAGIC + struct.pack("<I", len(data)) + data + self.levelData, path)
+
+def command_value(player, name):
+    value = getattr(player, name)
+    return list(value) if isinstance(value, list) else value
+
+def load(path: str) -> tuple[dict, bytes]:
+    """Header and level data of a recording."""
+    with open(path, "rb") as file:
+        data = file.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ReplayError(f"{path} is not a recording")
+    size, = struct.unpack_from("<I", data, len(MAGIC))
+    start = len(MAGIC) + 4
+    header = json.loads(data[start:start + size])
+    if header["version"] != VERSION:
+        raise ReplayError(f"Unsupported recording version {header['version']}")
+    return header, data[start + size:]
+
+def apply(player, command: list):
+    match command[1]:
+        case "set":
+            value = command[3]
+            setattr(player, command[2], list(value) if isinstance(value, list) else value)
+        case "torpedo":
+            player.attack_torpedo(command[2])
+
+def replay(path: str) -> dict:
+    """Re-run a recording as fast as possible and compare the final state with the recorded one."""
+    header, levelData = load(path)
+    recorder = level.recorder
+    level.recorder = None
+    try:
+        entities, nextId = savefile.decode_level(levelData)
+        level.loadEntities(entities, nextId=nextId)
+        level.enableWorld(header["world"])
+        level.seedRandom(header["seed"])
+        commands = {}
+        for command in header["commands"]:
+            commands.setdefault(command[0], []).append(command)
+
+        start = time.perf_counter()
+        for tick in range(header["ticks"] + 1):
+            for command in commands.get(tick, ()):
+                apply(level.get_player(), command)
+            if tick < header["ticks"]:
+                level.updateLevel(False)
+                profiler.flush()
+        elapsed = time.perf_counter() - start
+
+        result = state_hash(level.entityList)
+        level.enableWorld(False)
+    finally:
+        level.recorder = recorder
+    return {
+        "recording": path,
+        "ticks": header["ticks"],
+        "seconds": elapsed,
+        "ticks_per_second": header["ticks"] / elapsed if elapsed > 0 else float("inf"),
+        "hash": result,
+        "match": result == header["hash"],
+    }
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    parser = argparse.ArgumentParser(description="Replay recorded sessions (record with main.py --record FILE)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    play_command = commands.add_parser("play", help="re-run a recording headless and check its final state")
+    play_command.add_argument("path")
+    play_command.add_argument("--profile-out", metavar="FILE", help="write the section timings to FILE (.csv or .json)")
+    info_command = commands.add_parser("info", help="print a recording's header")
+    info_command.add_argument("path")
+    args = parser.parse_args()
+
+    match args.command:
+        case "play":
+            profiler.request(args.profile_out is not None)
+            result = replay(args.path)
+            print(f"{result['recording']}: {result['ticks']} ticks in {result['seconds']:.3f} s ({result['ticks_per_second']:.0f} ticks/s)")
+            print(f"  final state {'matches' if result['match'] else 'DIFFERS from'} the recording")
+            if args.profile_out:
+                profiler.export(args.profile_out)
+            sys.exit(0 if result["match"] else 1)
+        case "info":
+            header, levelData = load(args.path)
+            print(f"{args.path}: {header['ticks']} ticks, seed {header['seed']}, {'world' if header['world'] else 'per-object'} ticking")
+            print(f"  {len(header['commands'])} commands, level {len(levelData)} bytes, final hash {header['hash']}")
@@ -0,0 +1,489 @@
+import array
+import gc
+import os
+import struct
+import sys
+from enum import IntEnum
+from operator import itemgetter
+import ship
+
+# Versioned binary save format.
+#
+# Entities are stored per class as packed columns, one column per attribute:
+#   header      MAGIC, u16 version
+#   strings     u32 count, then u32 length + UTF-8 bytes each. Attribute names, class names and string values are
+#               interned here and referenced by index.
+#   classes     u16 count, then (u32 class name, u32 rows) for each class
+#   order       u32 count, then the class (u16 array) and row (u32 array) of each entity in entityList order
+#   next id     u64, the id the level hands out next (see registry.py), so ids of despawned entities stay unused
+#   columns     for each class, u16 count, then (u32 name, u8 kind, data) for each attribute
+#
+# Column kinds:
+#   CONST   one encoded value shared by every row, used for immutable values like ship and weapon stats
+#   FLOAT   float64 per row        INT   int64 per row        BOOL   one byte per row
+#   STR     i32 string index per row, -1 for None
+#   VALUE   one encoded value per row, for lists, tuples, depth charges and references to other entities
+#   COPY    one encoded list shared by every row, each row gets its own copy (empty depth charge stacks, torpedo tubes)
+#
+# Loading never runs code from the file: classes are looked up in SAVE_CLASSES and objects are created without
+# calling __init__. Files of older versions are upgraded by MIGRATIONS, legacy pickles with convert_pickle().
+
+MAGIC = b"SUBSAVE\0"
+VERSION = 2
+
+class Column(IntEnum):
+    CONST = 0
+    FLOAT = 1
+    INT = 2
+    BOOL = 3
+    STR = 4
+    VALUE = 5
+    COPY = 6
+
+# Classes that may appear in a save file
+SAVE_CLASSES = {cls.__name__: cls for cls in (ship.Entity, ship.Ship, ship.torpedo, ship.playerShip, ship.enemyShip,
+                                                ship.destroyer, ship.transport, ship.preDepthCharge, ship.depthCharge)}
+
+# Version -> function upgrading the decoded classes of that version to the next one.
+# Decoded classes are a list of {"class": name, "rows": count, "columns": {attribute: (kind, values)}}, where values
+# is a single value for CONST columns and a list with one value per row otherwise.
+MIGRATIONS = {
+    1: lambda classes: classes, # Version 2 added the next id, loading falls back to the highest id + 1
+}
+
+class SaveFormatError(Exception):
+    pass
+
+MISSING = object() # Attribute not set on a row, stored so the row loads without it
+
+def is_save_file(path: str) -> bool:
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+# Writing
+
+class Writer:
+    strings: dict[str, int]   # Interned string -> index
+    chunks: list[bytes]
+    refs: dict[int, int]      # id(entity) -> index in the saved entity list
+
+    def __init__(self, refs: dict[int, int]):
+        self.strings = {}
+        self.chunks = []
+        self.refs = refs
+
+    def intern(self, text: str) -> int:
+        index = self.strings.get(text)
+        if index is None:
+            index = self.strings[text] = len(self.strings)
+        return index
+
+    def pack(self, fmt: str, *values):
+        self.chunks.append(struct.pack("<" + fmt, *values))
+
+    def value(self, value):
+        """Tagged encoding for anything that does not fit a packed column."""
+        if value is None:
+            self.chunks.append(b"N")
+        elif value is MISSING:
+            self.chunks.append(b"M")
+        elif value is True:
+            self.chunks.append(b"T")
+        elif value is False:
+            self.chunks.append(b"F")
+        elif isinstance(value, int):
+            self.chunks.append(b"i" + struct.pack("<q", value))
+        elif isinstance(value, float):
+            self.chunks.append(b"d" + struct.pack("<d", value))
+        elif isinstance(value, str):
+            self.chunks.append(b"s" + struct.pack("<I", self.intern(value)))
+        elif isinstance(value, (list, tuple)):
+            self.chunks.append((b"l" if isinstance(value, list) else b"t") + struct.pack("<I", len(value)))
+            for item in value:
+                self.value(item)
+        elif isinstance(value, ship.Entity):
+            # Entities are stored once and referenced by their position in the entity list
+            index = self.refs.get(id(value))
+            if index is None:
+                self.chunks.append(b"N")
+            else:
+                self.chunks.append(b"e" + struct.pack("<I", index))
+        elif type(value).__name__ in SAVE_CLASSES:
+            state = value.__dict__
+            self.chunks.append(b"o" + struct.pack("<II", self.intern(type(value).__name__), len(state)))
+            for key, item in state.items():
+                self.chunks.append(struct.pack("<I", self.intern(key)))
+                self.value(item)
+        elif hasattr(value, "item"):
+            # NumPy scalar, e.g. from a world column
+            self.value(value.item())
+        else:
+            raise SaveFormatError(f"Cannot save value of type {type(value).__name__}")
+
+IMMUTABLE = (bool, int, float, str, type(None))
+IMMUTABLE_TYPES = frozenset(IMMUTABLE)
+
+def column_kind(values: list) -> int:
+    types = set(map(type, values))
+    first = values[0]
+    if len(types) == 1 and values.count(first) == len(values):
+        if isinstance(first, IMMUTABLE):
+            return Column.CONST
+        if type(first) is list and all(isinstance(item, IMMUTABLE) for item in first):
+            return Column.COPY
+    if types == {bool}:
+        return Column.BOOL
+    if types == {int} and all(-2**63 <= value < 2**63 for value in values):
+        return Column.INT
+    if types <= {int, float}:
+        return Column.FLOAT
+    if types <= {str, type(None)}:
+        return Column.STR
+    return Column.VALUE
+
+def copy_value(value):
+    """Copy of the mutable containers in a value, entities are kept as references."""
+    if isinstance(value, IMMUTABLE) or isinstance(value, ship.Entity):
+        return value
+    if isinstance(value, list):
+        if IMMUTABLE_TYPES.issuperset(map(type, value)):
+            return value.copy()
+        return [copy_value(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(copy_value(item) for item in value)
+    if type(value).__name__ in SAVE_CLASSES:
+        copied = object.__new__(type(value))
+        copied.__dict__ = {key: copy_value(item) for key, item in value.__dict__.items()}
+        return copied
+    return value
+
+class Snapshot:
+    """Entity states copied at one point of the simulation, encoded later by encode_snapshot."""
+    classes: dict[str, list[dict]]  # Class name -> state of each of its entities
+    groupOrder: array.array         # Class index of each entity in entity list order
+    rowOrder: array.array           # Row in its class of each entity
+    refs: dict[int, int]            # id(entity) -> index in the entity list
+    entities: list[ship.Entity]
+    nextId: int                     # Id the level hands out next
+
+    def __init__(self, entities: list[ship.Entity], nextId: int | None = None):
+        self.classes = {}
+        self.nextId = next_free_id(entities) if nextId is None else nextId
+        self.groupOrder = array.array("H")
+        self.rowOrder = array.array("I")
+        self.refs = {id(entity): index for index, entity in enumerate(entities)}
+        # Entities are only referenced through refs, keep them alive so their ids stay unique
+        self.entities = list(entities)
+        groupIndex = {}
+        for entity in entities:
+            name = type(entity).__name__
+            if name not in SAVE_CLASSES:
+                raise SaveFormatError(f"Cannot save entity of class {name}")
+            if name not in self.classes:
+                self.classes[name] = []
+                groupIndex[name] = len(groupIndex)
+            rows = self.classes[name]
+            self.groupOrder.append(groupIndex[name])
+            self.rowOrder.append(len(rows))
+            state = entity.__dict__.copy()
+            # Attached ships keep their values in the dict too, only the link to the world is left out
+            if "_world" in state:
+                del state["_world"], state["_slot"]
+            if not IMMUTABLE_TYPES.issuperset(map(type, state.values())):
+                for key in [key for key, value in state.items() if type(value) not in IMMUTABLE_TYPES]:
+                    state[key] = copy_value(state[key])
+            rows.append(state)
+
+def next_free_id(entities: list[ship.Entity]) -> int:
+    """Next id when the level's own counter isn't known: one past the highest id in use."""
+    return max((entity.id for entity in entities if entity.id is not None), default=-1) + 1
+
+def encode(entities: list[ship.Entity], nextId: int | None = None) -> bytes:
+    return encode_snapshot(Snapshot(entities, nextId))
+
+def encode_snapshot(snapshot: Snapshot) -> bytes:
+    """Encode a snapshot, safe to call from another thread while the simulation goes on."""
+    if sys.byteorder != "little":
+        raise SaveFormatError("Save files can only be written on little-endian machines")
+    writer = Writer(snapshot.refs)
+    classes = snapshot.classes
+
+    writer.pack("H", len(classes))
+    for name, rows in classes.items():
+        writer.pack("II", writer.intern(name), len(rows))
+    writer.pack("I", len(snapshot.groupOrder))
+    writer.chunks.append(snapshot.groupOrder.tobytes())
+    writer.chunks.append(snapshot.rowOrder.tobytes())
+    writer.pack("Q", snapshot.nextId)
+
+    for rows in classes.values():
+        keys = list(rows[0])
+        if all(len(row) == len(keys) and list(row) == keys for row in rows):
+            # Usual case, every row has the same attributes in the same order
+            columns = zip(*(row.values() for row in rows))
+        else:
+            keys = list(dict.fromkeys(key for row in rows for key in row))
+            columns = ([row.get(key, MISSING) for row in rows] for key in keys)
+        writer.pack("H", len(keys))
+        # Sorted so equal states encode to equal bytes whatever order their attributes were set in
+        for key, values in sorted(zip(keys, columns), key=itemgetter(0)):
+            values = list(values)
+            kind = Column.VALUE if MISSING in values else column_kind(values)
+            writer.pack("IB", writer.intern(key), kind)
+            match kind:
+                case Column.CONST | Column.COPY:
+                    writer.value(values[0])
+                case Column.FLOAT:
+                    writer.chunks.append(array.array("d", values).tobytes())
+                case Column.INT:
+                    writer.chunks.append(array.array("q", values).tobytes())
+                case Column.BOOL:
+                    writer.chunks.append(bytes(values))
+                case Column.STR:
+                    writer.chunks.append(array.array("i", [-1 if value is None else writer.intern(value) for value in values]).tobytes())
+                case Column.VALUE:
+                    for value in values:
+                        writer.value(value)
+
+    header = [MAGIC, struct.pack("<HI", VERSION, len(writer.strings))]
+    for text in writer.strings:
+        data = text.encode("utf-8")
+        header.append(struct.pack("<I", len(data)))
+        header.append(data)
+    return b"".join(header) + b"".join(writer.chunks)
+
+def save(entities: list[ship.Entity], path: str, nextId: int | None = None):
+    write(encode(entities, nextId), path)
+
+def write(data: bytes, path: str):
+    """Write through a temporary file and rename it, a crash never leaves a half written save behind."""
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+# Reading
+
+class Reader:
+    data: memoryview
+    pos: int
+    strings: list[str]
+    entities: list[ship.Entity]   # Entity list being loaded, for resolving references
+
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.pos = 0
+        self.strings = []
+        self.entities = []
+
+    def unpack(self, fmt: str):
+        fmt = "<" + fmt
+        size = struct.calcsize(fmt)
+        if self.pos + size > len(self.data):
+            raise SaveFormatError("Unexpected end of save file")
+        values = struct.unpack_from(fmt, self.data, self.pos)
+        self.pos += size
+        return values
+
+    def take(self, size: int) -> memoryview:
+        chunk = self.data[self.pos:self.pos + size]
+        if len(chunk) != size:
+            raise SaveFormatError("Unexpected end of save file")
+        self.pos += size
+        return chunk
+
+    def string(self) -> str:
+        """Interned string referenced by the next u32."""
+        index = self.unpack("I")[0]
+        if index >= len(self.strings):
+            raise SaveFormatError(f"String {index} out of range")
+        return self.strings[index]
+
+    def value(self):
+        tag = self.take(1).tobytes()
+        match tag:
+            case b"N":
+                return None
+            case b"M":
+                return MISSING
+            case b"T":
+                return True
+            case b"F":
+                return False
+            case b"i":
+                return self.unpack("q")[0]
+            case b"d":
+                return self.unpack("d")[0]
+            case b"s":
+                return self.string()
+            case b"l" | b"t":
+                items = [self.value() for _ in range(self.unpack("I")[0])]
+                return items if tag == b"l" else tuple(items)
+            case b"e":
+                index = self.unpack("I")[0]
+                if index >= len(self.entities):
+                    raise SaveFormatError(f"Entity {index} out of range")
+                return self.entities[index]
+            case b"o":
+                cls = save_class(self.string())
+                obj = cls.__new__(cls)
+                for _ in range(self.unpack("I")[0]):
+                    key = self.string()
+                    obj.__dict__[key] = self.value()
+                return obj
+        raise SaveFormatError(f"Unknown value tag {tag!r}")
+
+    def column(self, kind: int, rows: int):
+        match kind:
+            case Column.CONST:
+                return self.value()
+            case Column.COPY:
+                value = self.value()
+                if type(value) is not list:
+                    raise SaveFormatError("Copied column is not a list")
+                return [value.copy() for _ in range(rows)]
+            case Column.FLOAT:
+                return read_array("d", self.take(rows * 8)).tolist()
+            case Column.INT:
+                return read_array("q", self.take(rows * 8)).tolist()
+            case Column.BOOL:
+                return [value != 0 for value in self.take(rows)]
+            case Column.STR:
+                strings = self.strings
+                indices = read_array("i", self.take(rows * 4))
+                if indices and max(indices) >= len(strings):
+                    raise SaveFormatError(f"String {max(indices)} out of range")
+                return [None if index < 0 else strings[index] for index in indices]
+            case Column.VALUE:
+                return [self.value() for _ in range(rows)]
+        raise SaveFormatError(f"Unknown column kind {kind}")
+
+def read_array(typecode: str, chunk: memoryview) -> array.array:
+    values = array.array(typecode)
+    values.frombytes(chunk)
+    return values
+
+def save_class(name: str) -> type:
+    cls = SAVE_CLASSES.get(name)
+    if cls is None:
+        raise SaveFormatError(f"Unknown class {name}")
+    return cls
+
+def decode(data: bytes) -> list[ship.Entity]:
+    return decode_level(data)[0]
+
+def decode_level(data: bytes) -> tuple[list[ship.Entity], int]:
+    """Entities and the next id of the level."""
+    # Nothing is freed while loading, pausing the cyclic collector avoids rescanning the new objects many times over
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        return decode_entities(data)
+    finally:
+        if collecting:
+            gc.enable()
+
+def decode_entities(data: bytes) -> tuple[list[ship.Entity], int]:
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise SaveFormatError("Not a save file")
+    reader = Reader(data)
+    reader.pos = len(MAGIC)
+    version, count = reader.unpack("HI")
+    if version > VERSION:
+        raise SaveFormatError(f"Save file version {version} is newer than the supported version {VERSION}")
+    if version not in MIGRATIONS and version != VERSION:
+        raise SaveFormatError(f"Unknown save file version {version}")
+    try:
+        for _ in range(count):
+            reader.strings.append(reader.take(reader.unpack("I")[0]).tobytes().decode("utf-8"))
+    except UnicodeDecodeError as error:
+        raise SaveFormatError(f"Invalid string in save file: {error}") from None
+
+    # Objects are created up front so references between entities can be resolved while reading the columns
+    classes = []
+    objects = []
+    for _ in range(reader.unpack("H")[0]):
+        name = reader.string()
+        rows = reader.unpack("I")[0]
+        if rows > len(data):
+            raise SaveFormatError(f"{rows} rows of {name} do not fit in the save file")
+        cls = save_class(name)
+        classes.append({"class": name, "rows": rows, "columns": {}})
+        objects.append([cls.__new__(cls) for _ in range(rows)])
+    total = reader.unpack("I")[0]
+    groupOrder = read_array("H", reader.take(total * 2))
+    rowOrder = read_array("I", reader.take(total * 4))
+    try:
+        reader.entities = [objects[group][row] for group, row in zip(groupOrder, rowOrder)]
+    except IndexError:
+        raise SaveFormatError("Entity order refers to a missing class or row") from None
+    nextId = reader.unpack("Q")[0] if version >= 2 else None
+
+    for group in classes:
+        for _ in range(reader.unpack("H")[0]):
+            key = reader.string()
+            kind = reader.unpack("B")[0]
+            group["columns"][key] = (kind, reader.column(kind, group["rows"]))
+
+    while version < VERSION:
+        classes = MIGRATIONS[version](classes)
+        version += 1
+
+    for group, groupObjects in zip(classes, objects):
+        fill(groupObjects, group["columns"])
+    if nextId is None:
+        nextId = next_free_id(reader.entities)
+    return reader.entities, nextId
+
+def fill(objects: list, columns: dict[str, tuple[int, object]]):
+    """Set the instance dicts of a class's objects from its decoded columns."""
+    template = {key: values for key, (kind, values) in columns.items() if kind == Column.CONST}
+    keys = [key for key, (kind, _) in columns.items() if kind != Column.CONST]
+    if not keys:
+        for obj in objects:
+            obj.__dict__ = template.copy()
+        return
+    # Attributes only some rows have, e.g. the AI modes a level definition sets on part of a class
+    sparse = [key for key, (kind, values) in columns.items() if kind == Column.VALUE and MISSING in values]
+    for obj, row in zip(objects, zip(*(columns[key][1] for key in keys))):
+        state = template.copy()
+        state.update(zip(keys, row))
+        for key in sparse:
+            if state[key] is MISSING:
+                del state[key]
+        obj.__dict__ = state
+
+def load(path: str) -> list[ship.Entity]:
+    return load_level(path)[0]
+
+def load_level(path: str) -> tuple[list[ship.Entity], int]:
+    with open(path, "rb") as file:
+        return decode_level(file.read())
+
+def convert_pickle(source: str, destination: str):
+    """Convert a legacy pickle save (level1.p, savestate1.p, ...) to the binary format.
+    Unpickling runs code from the file, only convert files you trust."""
+    import pickle
+    with open(source, "rb") as file:
+        entities = pickle.load(file)
+    save(entities, destination)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Binary save file tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert_command = commands.add_parser("convert", help="convert a legacy pickle save to the binary format")
+    convert_command.add_argument("source")
+    convert_command.add_argument("destination")
+    info_command = commands.add_parser("info", help="list the entities of a binary save")
+    info_command.add_argument("path")
+    args = parser.parse_args()
+
+    match args.command:
+        case "convert":
+            convert_pickle(args.source, args.destination)
+        case "info":
+            for entity in load(args.path):
+                print(entity)
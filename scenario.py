@@ -0,0 +1,59 @@
+import math
+import random
+import level
+import ship
+
+# Procedural scenarios for benchmarks and batch runs.
+# A convoy of transports in columns heading north, destroyers screening it, the player south of it and torpedoes in flight.
+
+# Gun, depth charge and hedgehog stats as used by the shipped levels, see destroyer.__init__ for the layout
+destroyerWeaponStat = [[8000, 200, 4, 10], [5, 500, 15, 2, 1, "behind", 5, 3], [150, 500, 120, 24, 30]]
+
+def build_scenario(destroyers: int, transports: int, torpedoes: int = 0, weaponStat: list = destroyerWeaponStat,
+                   seed: int = 0, torpedoType: type = ship.torpedo, spacing: float = 400) -> list[ship.Entity]:
+    """Replace the current level with a generated one and return its entity list."""
+    rng = random.Random(seed)
+    level.loadEntities([])
+    next_id = 0
+
+    player = ship.playerShip(next_id, 0, 0, 0)
+    next_id += 1
+
+    # Convoy in columns, centred ahead of the player
+    columns = max(1, math.ceil(math.sqrt(transports)))
+    rows = max(1, math.ceil(transports / columns))
+    centre_y = spacing * (rows + 4)
+    for i in range(transports):
+        row, column = divmod(i, columns)
+        x = (column - (columns - 1) / 2) * spacing + rng.uniform(-spacing / 8, spacing / 8)
+        y = centre_y + (row - (rows - 1) / 2) * spacing + rng.uniform(-spacing / 8, spacing / 8)
+        convoy_ship = ship.transport(next_id, x, y, 0, "cargo", 1, 1)
+        convoy_ship.throttle = 50
+        next_id += 1
+
+    # Escort screen on a ring around the convoy
+    radius = spacing * (max(columns, rows) / 2 + 2)
+    for i in range(destroyers):
+        angle = 2 * math.pi * i / max(1, destroyers)
+        ship.destroyer(next_id, radius * math.cos(angle), centre_y + radius * math.sin(angle), rng.uniform(0, 360), [list(stat) for stat in weaponStat])
+        next_id += 1
+
+    # Torpedoes between the player and the convoy, heading for it
+    for i in range(torpedoes):
+        angle = 90 + rng.uniform(-15, 15)
+        torp = torpedoType(next_id, angle, ship.torpedoStat[3], player)
+        distance = rng.uniform(player.length, centre_y - radius)
+        torp.x = distance * math.cos(math.radians(torp.heading))
+        torp.y = distance * math.sin(math.radians(torp.heading))
+        torp.speed = ship.torpedoStat[3]
+        next_id += 1
+
+    level.loadEntities(level.entityList)
+    return level.entityList
+
+def split_entities(total: int) -> tuple[int, int, int]:
+    """Split an entity count into (destroyers, transports, torpedoes) in a typical convoy mix."""
+    destroyers = max(1, total // 5)
+    torpedoes = max(1, total // 20)
+    transports = max(1, total - 1 - destroyers - torpedoes)
+    return destroyers, transports, torpedoes
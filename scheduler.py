@@ -0,0 +1,92 @@
+import time
+from collections import deque
+import profiler
+
+# Multi-rate tick scheduler, level.updateLevel runs one tick of every registered task in registration order.
+#
+# A task runs every `period` ticks, on the ticks where (tick - phase) % period == 0. A staggered task runs every
+# tick instead, but only on one part of its entities: it is called with (tick, part, period) and handles the
+# entities with entity.id % period == part, so each entity is visited once per period and the cost of a tick
+# stays flat instead of spiking every period ticks. Ids are stable (see registry.py), so an entity keeps its part.
+#
+# While the profiler is enabled every task is timed per tick, budgets() compares the timings with the task's
+# budget for the overlay (see gameui.draw_scheduler_overlay).
+
+class Task:
+    name: str
+    func: object       # func(tick), or func(tick, part, period) when staggered
+    period: int        # Ticks between runs, or ticks for a staggered task to visit every entity
+    phase: int         # Tick offset of the runs or parts, lets tasks with the same period use different ticks
+    staggered: bool
+    budget_ms: float   # Time the task should stay under per tick
+    samples: deque     # Seconds per tick while profiling
+
+    def __init__(self, name: str, func, period: int, phase: int, staggered: bool, budget_ms: float):
+        if period < 1:
+            raise ValueError(f"period of {name} must be at least 1, got {period}")
+        self.name = name
+        self.func = func
+        self.period = period
+        self.phase = phase
+        self.staggered = staggered
+        self.budget_ms = budget_ms
+        self.samples = deque(maxlen=profiler.WINDOW)
+
+    def part(self, tick: int) -> int:
+        return (tick - self.phase) % self.period
+
+    def run(self, tick: int):
+        part = self.part(tick)
+        if self.staggered:
+            self.func(tick, part, self.period)
+        elif part == 0:
+            self.func(tick)
+
+class Scheduler:
+    tasks: list[Task]
+
+    def __init__(self):
+        self.tasks = []
+
+    def register(self, name: str, func, period: int = 1, phase: int = 0, staggered: bool = False, budget_ms: float = 1.0) -> Task:
+        """Add a task after the existing ones, a task with the same name is replaced in place."""
+        task = Task(name, func, period, phase, staggered, budget_ms)
+        for i, existing in enumerate(self.tasks):
+            if existing.name == name:
+                self.tasks[i] = task
+                return task
+        self.tasks.append(task)
+        return task
+
+    def unregister(self, name: str):
+        self.tasks = [task for task in self.tasks if task.name != name]
+
+    def get(self, name: str) -> Task | None:
+        for task in self.tasks:
+            if task.name == name:
+                return task
+        return None
+
+    def run(self, tick: int):
+        if not profiler.enabled:
+            for task in self.tasks:
+                task.run(tick)
+            return
+        for task in self.tasks:
+            started = time.perf_counter()
+            task.run(tick)
+            profiler.stop(task.name, started)
+            task.samples.append(time.perf_counter() - started)
+
+    def budgets(self) -> list[dict]:
+        """Per task rate and per tick timings in milliseconds against its budget."""
+        result = []
+        for task in self.tasks:
+            samples = task.samples
+            entry = {"name": task.name, "period": task.period, "staggered": task.staggered, "budget_ms": task.budget_ms,
+                     "mean_ms": sum(samples) / len(samples) * 1e3 if samples else 0.0,
+                     "p99_ms": profiler.percentile(samples, 99) * 1e3,
+                     "max_ms": max(samples) * 1e3 if samples else 0.0}
+            entry["over_budget"] = entry["p99_ms"] > task.budget_ms
+            result.append(entry)
+        return result
@@ -0,0 +1,103 @@
+import math
+import level
+import ship
+
+# Enemy detection of the player and of torpedoes, staggered by level.scheduler so every target is looked for once
+# per level.SENSOR_PERIOD ticks, on the tick of its part (target id % SENSOR_PERIOD).
+#
+# Each enemy scores a contact from 0 to 1 with its lookouts and its hydrophones and keeps the better one:
+#   visual  visual_skill/100 * (1 - distance / seen), seen = min(visual_range, target visibility)
+#   noise   noise_skill/100 * (1 - distance / heard), heard = noise_range * target noise / 100
+# The player's visibility and noise already follow its depth and speed (playerShip.tick_after), a deep submarine
+# can only be heard. A contact is made when a roll from the "sensors" random stream is below the score.
+#
+# Only enemies returned by a spatial query around each target are scored, so the cost follows the number of nearby
+# pairs. Results are written to the enemy's spottedPlayer / lastKnown* / spottedTorpedoes attributes, which the AI
+# reads between updates without any further work.
+
+CONTACT_MEMORY = 60   # Ticks a player contact is kept without being detected again
+
+tracking = {}         # Enemy id -> enemy whose spottedPlayer is set, for expiring contacts
+torpedoWatchers = {}  # Torpedo id -> enemies that spotted it on its last look
+
+def contact_score(enemy: ship.enemyShip, target: ship.Ship, distance: float) -> float:
+    score = 0.0
+    seen = min(enemy.visual_range, target.visibility)
+    if distance < seen:
+        score = enemy.visual_skill / 100 * (1 - distance / seen)
+    heard = enemy.noise_range * target.noise / 100
+    if distance < heard:
+        score = max(score, enemy.noise_skill / 100 * (1 - distance / heard))
+    return score
+
+def detection_radius(target: ship.Ship) -> float:
+    """Farthest distance any enemy class could detect the target from."""
+    classes = (ship.destroyer, ship.transport)
+    return max(min(max(cls.visual_range for cls in classes), target.visibility),
+               max(cls.noise_range for cls in classes) * target.noise / 100)
+
+def nearby_contacts(target: ship.Ship):
+    """(enemy, score) for the enemies with a chance to detect the target."""
+    radius = detection_radius(target)
+    if radius <= 0:
+        return
+    for entity in level.grid.query_radius(target.x, target.y, radius):
+        if isinstance(entity, ship.enemyShip) and entity.alive:
+            score = contact_score(entity, target, math.hypot(entity.x - target.x, entity.y - target.y))
+            if score > 0:
+                yield entity, score
+
+def reset():
+    """Rebuild the bookkeeping from the loaded entities' sensor state."""
+    tracking.clear()
+    torpedoWatchers.clear()
+    for entity in level.entityList:
+        if isinstance(entity, ship.enemyShip):
+            if entity.lastKnownTime is not None:
+                # Ticks restart from 0 on load
+                entity.lastKnownTime = min(entity.lastKnownTime, level.tickCount)
+            if entity.spottedPlayer:
+                tracking[entity.id] = entity
+            if None in entity.spottedTorpedoes:
+                # Older saves kept torpedoes that were gone, their references load as None
+                entity.spottedTorpedoes = tuple(torp for torp in entity.spottedTorpedoes if torp is not None)
+            for torp in entity.spottedTorpedoes:
+                torpedoWatchers.setdefault(torp.id, []).append(entity)
+
+def forget(torp: ship.torpedo):
+    """Drop a torpedo from the enemies that spotted it, called by level.despawn."""
+    for enemy in torpedoWatchers.pop(torp.id, ()):
+        enemy.spottedTorpedoes = tuple(spotted for spotted in enemy.spottedTorpedoes if spotted is not torp)
+
+def update(tick: int, part: int = 0, period: int = 1):
+    """Look for the targets in this tick's part, run every tick by level.scheduler."""
+    rng = level.randomStream("sensors")
+
+    # Player
+    player = level.get_player()
+    if player is not None and player.alive and player.id % period == part:
+        for enemy, score in nearby_contacts(player):
+            if rng.random() < score:
+                enemy.spottedPlayer = True
+                enemy.spottingAccuracy = round(score * 100)
+                enemy.lastKnownPosition = (player.x, player.y)
+                enemy.lastKnownTime = tick
+                enemy.lastKnownHeading = player.heading
+                enemy.lastKnownSpeed = player.speed
+                tracking[enemy.id] = enemy
+    for id, enemy in list(tracking.items()):
+        if tick - enemy.lastKnownTime > CONTACT_MEMORY or not enemy.alive:
+            enemy.spottedPlayer = False
+            del tracking[id]
+
+    # Torpedoes, the contacts of a torpedo are replaced on its next look or dropped once it is gone
+    for id in [id for id in torpedoWatchers if id % period == part]:
+        for enemy in torpedoWatchers.pop(id):
+            enemy.spottedTorpedoes = tuple(torp for torp in enemy.spottedTorpedoes if torp.id != id)
+    for torp in level.registry.of_type("torpedo"):
+        if torp.id % period != part:
+            continue
+        for enemy, score in nearby_contacts(torp):
+            if rng.random() < score:
+                torpedoWatchers.setdefault(torp.id, []).append(enemy)
+                enemy.spottedTorpedoes = (*enemy.spottedTorpedoes, torp)
@@ -1,5 +1,5 @@
 import math
-import random
+import profiler
 
 # Predefined ship statistics
 # 0 - Length, 1 - Width, 2 - Health, 3 - Speed Max, 4 - Speed Min, # 5 - Speed Acceleration, 6 - Speed Deceleration, 7 - Steer Max, 8 - Steer Speed, 9 - Base Visibility
@@ -9,6 +9,12 @@ destroyerShipStat = [115, 12, 2500, 10, 6, 1, 1, 10, 2, 8000] # Example stats fo
 transportShipStat = [135, 17, 5000, 6, 2, 1, 1, 5, 1, 12000] # Example stats for transport ship
 # 0 - Battery Max, 1 - Battery Depletion Rate, 2 - Battery Recharge Rate, 3 - Underwater Speed Multiplier 4 - Torpedo Tube Amount 5 - Torpedo Reload Time
 playerSubmarineStat = [1000, 1, 2, 0.5, 4, 60]  # Example stats for player submarine
+# 0 - Visual Range, 1 - Visual Skill, 2 - Noise Range, 3 - Noise Skill (see sensors.py)
+destroyerSensorStat = [6000, 70, 4000, 60]  # Example stats for destroyer lookouts and hydrophones
+transportSensorStat = [5000, 50, 0, 0]  # Example stats for transport lookouts
+# 0 - Radio Range, 1 - Radio Skill (see radio.py)
+destroyerRadioStat = [12000, 70]  # Example stats for destroyer radio
+transportRadioStat = [10000, 40]  # Example stats for transport radio
 
 # Helper functions
 def point_in_rect(px: int, py: int, rx: int, ry: int, rw: int, rh: int, rr:int) -> bool:
@@ -25,6 +31,71 @@ def point_in_rect(px: int, py: int, rx: int, ry: int, rw: int, rh: int, rr:int)
     # Check if the point is within the rectangle bounds
     return -rw/2 <= rotated_x <= rw/2 and -rh/2 <= rotated_y <= rh/2
 
+def segment_rect_intersection(x0: float, y0: float, x1: float, y1: float, rx: float, ry: float, rw: float, rh: float, rcos: float, rsin: float) -> tuple[float, float, float] | None:
+    """Find where the segment (x0, y0) -> (x1, y1) first enters the rectangle (rx, ry, rw, rh) used by point_in_rect.
+    The rectangle's rotation is passed as rcos, rsin = cos and sin of its heading so it can be computed once per target.
+    Returns (time of impact along the segment from 0 to 1, entry x, entry y), or None if the segment misses."""
+    # Segment start and direction in the rectangle's frame, u along the heading (length), v across it (width)
+    tx = x0 - rx
+    ty = y0 - ry
+    dx = x1 - x0
+    dy = y1 - y0
+    pu = tx * rcos + ty * rsin
+    pv = ty * rcos - tx * rsin
+    du = dx * rcos + dy * rsin
+    dv = dy * rcos - dx * rsin
+
+    # Clip the segment against both slabs (Liang-Barsky)
+    t_enter = 0.0
+    t_exit = 1.0
+    for p, d, half in ((pu, du, rh/2), (pv, dv, rw/2)):
+        if d == 0:
+            if p < -half or p > half:
+                return None
+            continue
+        t_near = (-half - p) / d
+        t_far = (half - p) / d
+        if t_near > t_far:
+            t_near, t_far = t_far, t_near
+        t_enter = max(t_enter, t_near)
+        t_exit = min(t_exit, t_far)
+        if t_enter > t_exit:
+            return None
+    return (t_enter, x0 + dx * t_enter, y0 + dy * t_enter)
+
+# World columns
+# Attributes that can live in a world.World structure-of-arrays store instead of the instance dict.
+ENTITY_COLUMNS = ("x", "y", "heading", "speed")
+SHIP_COLUMNS = ENTITY_COLUMNS + ("throttle", "steer", "steer_target",
+                                 "length", "width", "health_max", "speed_max", "speed_min", "speed_acceleration",
+                                 "speed_deceleration", "steer_max", "steer_speed", "base_visibility",
+                                 "alive", "health", "noise", "visibility")
+# Gun attributes used by the batched destroyer AI (see world.World.gun_ai) and the reload timers World.countdown runs
+DESTROYER_COLUMNS = ("has_gun", "gun_range", "gun_damage", "gun_time_reload", "gun_accuracy", "gun_time_lastFired",
+                     "has_depthCharge", "depthCharge_time_lastDropped", "has_hedgehog", "hedgehog_time_lastFired")
+
+class WorldColumn:
+    """Attribute kept in the instance dict and, while the entity is attached to a world, in the world's column too.
+    Reads always come from the dict, so sensors, radio, the spatial index and the torpedo sweep cost the same with or
+    without a world. The world copies what its vectorised passes change back into the dicts (see world.py)."""
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        try:
+            return obj.__dict__[self.name]
+        except KeyError:
+            raise AttributeError(self.name) from None
+
+    def __set__(self, obj, value):
+        state = obj.__dict__
+        state[self.name] = value
+        world = state.get("_world")
+        if world is not None:
+            world.columns[self.name][state["_slot"]] = value
+
 # Basic entity class
 class Entity:
     id: int
@@ -38,7 +109,7 @@ class Entity:
     speed: int
 
     def __init__(self, id: int, type: str, name: str, x: int, y: int, heading: int, speed: int):
-        from level import entityList
+        from level import spawn
         self.id = id
         self.type = type
         self.name = name
@@ -46,16 +117,26 @@ class Entity:
         self.y = y
         self.heading = (360 - heading + 90) % 360
         self.speed = speed
-        entityList.append(self)
+        spawn(self) # Takes a new id if this one is None or already in use
 
     def tick_update(self):
         # Position
         self.x += self.speed * math.cos(math.radians(self.heading))
         self.y += self.speed * math.sin(math.radians(self.heading))
 
+    def __getstate__(self):
+        # Pickle and copy plain values, never the world the entity is attached to
+        state = self.__dict__.copy()
+        state.pop("_world", None)
+        state.pop("_slot", None)
+        return state
+
     def __str__(self):
         return f"{self.type} {self.name} at ({self.x}, {self.y}) heading {(360 - self.heading + 90) % 360}° with speed {self.speed}"
 
+for _name in ENTITY_COLUMNS:
+    setattr(Entity, _name, WorldColumn(_name))
+
 # Base class for all ships
 class Ship(Entity):
     # Control attributes
@@ -106,7 +187,24 @@ class Ship(Entity):
         self.noise = 0
         self.visibility = self.base_visibility
 
+    # A tick is split into tick_before, tick_motion and tick_after so a world.World can run the motion step for all ships at once
     def tick_update(self):
+        if not self.tick_before():
+            return
+        started = profiler.start()
+        self.tick_motion()
+        profiler.stop("movement", started)
+        self.tick_after()
+
+    def tick_before(self) -> bool:
+        """Per-class work before the motion step, returns False when the ship left the level."""
+        return True
+
+    def tick_after(self):
+        """Per-class work after the motion step."""
+        pass
+
+    def tick_motion(self):
         # Position and heading
         if self.speed >= 0:
             self.x += (self.speed + (self.length * 1/6 * self.speed/self.speed_max)) * math.cos(math.radians(self.heading))
@@ -167,6 +265,10 @@ class Ship(Entity):
             self.alive = False
             self.throttle = 0
 
+Ship.world_columns = SHIP_COLUMNS # Attributes moved into the world store, subclasses may add their own
+for _name in SHIP_COLUMNS:
+    setattr(Ship, _name, WorldColumn(_name))
+
 # Class for the torpedoes fired by the player
 class torpedo(Ship):
     # Technical attributes (dont change during gameplay)
@@ -210,24 +312,36 @@ class torpedo(Ship):
         self.timeSinceShot = 0
 
     def destroy(self):
-        from level import entityList
-        entityList.remove(self)
+        from level import despawn
+        despawn(self)
 
     def check_attack(self):
-        from level import entityList
-        for entity in entityList:
-            if entity != self and math.sqrt((entity.x - self.y)**2 + (entity.y - self.y)**2) < 500:
-                for i in range(-round(self.speed)+math.floor(self.length/2),math.ceil(self.length/2)):
-                    if(point_in_rect(self.x + i*math.cos(math.radians(self.heading)), self.y + i*math.sin(math.radians(self.heading)), entity.x, entity.y, entity.width, entity.length, entity.heading)):
-                        entity.take_damage(self.damage)
-                        self.destroy()
-                        return
+        from level import grid
+        # Path swept by the nose this tick, hits are resolved in order of time of impact
+        dx = math.cos(math.radians(self.heading))
+        dy = math.sin(math.radians(self.heading))
+        x1 = self.x + self.length/2 * dx
+        y1 = self.y + self.length/2 * dy
+        x0 = x1 - self.speed * dx
+        y0 = y1 - self.speed * dy
+        hit = None
+        hit_time = 2
+        for entity in grid.query_segment(x0, y0, x1, y1):
+            if entity != self:
+                heading = math.radians(entity.heading)
+                impact = segment_rect_intersection(x0, y0, x1, y1, entity.x, entity.y, entity.width, entity.length, math.cos(heading), math.sin(heading))
+                if impact is not None and impact[0] < hit_time:
+                    hit = entity
+                    hit_time = impact[0]
+        if hit is not None:
+            hit.take_damage(self.damage)
+            self.destroy()
 
-    def tick_update(self):
+    def tick_before(self):
         self.timeSinceShot += 1
         if self.timeSinceShot >= 180:
             self.destroy()
-            return
+            return False
         if self.targetAngle - self.heading < -180 or self.targetAngle - self.heading > 180:
             if self.targetAngle - self.heading < -180:
                 self.steer_target = ((self.targetAngle + 360) - self.heading)
@@ -241,8 +355,12 @@ class torpedo(Ship):
             self.steer_target = self.steer_max
         elif self.steer_target < -self.steer_max:
             self.steer_target = -self.steer_max
-        super().tick_update()
+        return True
+
+    def tick_after(self):
+        started = profiler.start()
         self.check_attack()
+        profiler.stop("torpedoes", started)
 
 # Class for the player-controlled ship
 class playerShip(Ship):
@@ -294,9 +412,9 @@ class playerShip(Ship):
         self.torpedo_tube_targetAngle = [0] * self.torpedo_tubes
         self.torpedo_tube_targetSpeed = [torpedoStat[3]] * self.torpedo_tubes
 
-    def tick_update(self):
-        # Speed
-        temp_speed = self.speed_max
+    def tick_before(self):
+        # Speed (restored in tick_after)
+        self._speed_max_surface = self.speed_max
         if self.depth != "surface":
             self.speed_max = self.speed_max * self.underwater_speed_mult
 
@@ -309,9 +427,9 @@ class playerShip(Ship):
         if self.battery <= 0:
             self.depth = "surface"
             self.periscope_active = False
+        return True
 
-        super().tick_update()
-
+    def tick_after(self):
         # Visiblity and noise
         match self.depth:
             case "surface":
@@ -331,13 +449,15 @@ class playerShip(Ship):
                 tube_lastFired -= 1
 
         # Speed
-        self.speed_max = temp_speed
+        self.speed_max = self._speed_max_surface
     
     def attack_torpedo(self, tube: int):
-        from level import entityList
+        from level import registry, recorder
         if self.torpedo_tube_lastFired[tube] > 0:
             return
-        torpedo(len(entityList), self.torpedo_tube_targetAngle[tube], self.torpedo_tube_targetSpeed[tube], self)
+        if recorder is not None:
+            recorder.launch(self, tube)
+        torpedo(registry.next_id(), self.torpedo_tube_targetAngle[tube], self.torpedo_tube_targetSpeed[tube], self)
         self.torpedo_tube_lastFired[tube] = self.torpedo_time_reload  # Reset the reload time
 
 # Base class for enemy ships
@@ -345,29 +465,30 @@ class enemyShip(Ship):
     # AI attributes
     ai_behaviour: str               # e.g., "careless", "safe", "aware", "combat"
     ai_combatMode: str              # e.g., "aggressive", "defensive", "evasive"
-    visual_range: int               # Range at which the enemy can visually detect the player ship
-    visual_skill: int               # Skill level of the enemy in visually detecting the player ship
-    noise_range: int                # Range at which the enemy can detect the player ship based on noise
-    noise_skill: int                # Skill level of the enemy in detecting the player ship based on noise
+    visual_range: int = 0           # Range at which the enemy can visually detect the player ship
+    visual_skill: int = 0           # Skill level of the enemy in visually detecting the player ship
+    noise_range: int = 0            # Range at which the enemy can detect the player ship based on noise
+    noise_skill: int = 0            # Skill level of the enemy in detecting the player ship based on noise
 
     # Technical attributes (dont change during gameplay)
-    radio_range: int                # Range at which the enemy can share information with other enemy ships
-    radio_skill: int                # Skill level of the enemy in sharing information with other enemy ships (accuracy and speed of information sharing)
+    radio_range: int = 0            # Range at which the enemy can share information with other enemy ships
+    radio_skill: int = 0            # Skill level of the enemy in sharing information with other enemy ships (accuracy and speed of information sharing)
 
     # Target attributes
         # Default navigation target
     objectivePosition: tuple[int, int]  # Final target position the enemy ship is trying to reach
+    # Set by sensors.update and radio reports, the class values are the state before the first contact
         # Offensive
-    spottedPlayer: bool             # Whether the enemy ship has spotted the player ship
-    spottingAccuracy: int           # Accuracy of information about the player
-    lastKnownPosition: tuple[int, int]  # Last known position of the player ship
-    lastKnownTime: int              # Last time the enemy ship spotted the player ship
-    lastKnownHeading: int           # Last known heading of the player ship
-    lastKnownSpeed: int             # Last known speed of the player ship
+    spottedPlayer: bool = False     # Whether the enemy ship has spotted the player ship
+    spottingAccuracy: int = 0       # Accuracy of information about the player
+    lastKnownPosition: tuple[int, int] | None = None  # Last known position of the player ship
+    lastKnownTime: int | None = None  # Last time the enemy ship spotted the player ship
+    lastKnownHeading: int | None = None  # Last known heading of the player ship
+    lastKnownSpeed: int | None = None  # Last known speed of the player ship
         # Defensive
-    spottedTorpedoes: list[torpedo] # List of torpedoes spotted by the enemy ship
+    spottedTorpedoes: tuple[torpedo, ...] = () # Torpedoes spotted by the enemy ship, replaced on every sensor update
 
-# Class for depth charges used by enemy ships
+# Depth charges before projectiles.py, kept so saves that still hold them load
 class preDepthCharge:
     x: int                          # X offset of the depth charge from the ship
     y: int                          # Y offset of the depth charge from the ship
@@ -384,7 +505,7 @@ class preDepthCharge:
         if self.time > 0:
             self.time -= 1
 
-# Class for depth charges used by enemy ships
+# Depth charges before projectiles.py, kept so saves that still hold them load
 class depthCharge:
     x: int                          # X position of the depth charge
     y: int                          # Y position of the depth charge
@@ -413,6 +534,14 @@ class depthCharge:
 
 # Enemy ship capable of combat
 class destroyer(enemyShip):
+    # Sensors and radio, class values so older saves get them too
+    visual_range = destroyerSensorStat[0]
+    visual_skill = destroyerSensorStat[1]
+    noise_range = destroyerSensorStat[2]
+    noise_skill = destroyerSensorStat[3]
+    radio_range = destroyerRadioStat[0]
+    radio_skill = destroyerRadioStat[1]
+
     # Combat attributes
         # Gun
     has_gun: bool                   # Whether the destroyer has a gun
@@ -441,8 +570,6 @@ class destroyer(enemyShip):
     # Status attributes
     gun_time_lastFired: int      # Time when the last shot was fired
     depthCharge_time_lastDropped: int # Time when the last depth charge was dropped
-    depthCharge_stack_dropping: list[preDepthCharge]  # List of depth charges left to drop
-    depthCharge_stack_dropped: list[depthCharge]  # List of depth charges that have been dropped
     hedgehog_time_lastFired: int    # Time when the last hedgehog was fired
 
     def __init__(self, id: int, x: int, y: int, heading: int, destroyerWeaponStat: list[list[int]]):
@@ -456,9 +583,6 @@ class destroyer(enemyShip):
         self.depthCharge_time_lastDropped = 0
         self.hedgehog_time_lastFired = 0
 
-        self.depthCharge_stack_dropping = []
-        self.depthCharge_stack_dropped = []
-
         # Imported attributes
             # Gun
         self.has_gun = len(destroyerWeaponStat[0]) == 4
@@ -484,10 +608,7 @@ class destroyer(enemyShip):
         self.hedgehog_burst_amount = destroyerWeaponStat[2][3]
         self.hedgehog_pattern_size = destroyerWeaponStat[2][4]
 
-    def tick_update(self):
-        from level import get_player 
-        super().tick_update()
-
+    def tick_after(self):
         # Gun
         if self.has_gun and self.gun_time_lastFired > 0:
             self.gun_time_lastFired -= 1
@@ -495,33 +616,21 @@ class destroyer(enemyShip):
         # Depth charge
         if self.has_depthCharge and self.depthCharge_time_lastDropped > 0:
             self.depthCharge_time_lastDropped -= 1
-        
-        if len(self.depthCharge_stack_dropping) > 0:
-            for preCharge in self.depthCharge_stack_dropping:
-                preCharge.tick_update()
-                if preCharge.time <= 0:
-                    self.stack_drop_depthCharge(preCharge)
-                    self.depthCharge_stack_dropping.remove(preCharge)
-
-        if len(self.depthCharge_stack_dropped) > 0:
-            for charge in self.depthCharge_stack_dropped:
-                charge.tick_update()
-                if charge.explosion_time <= 0:
-                    self.depthCharge_stack_dropped.remove(charge)
 
         # Hedgehog
         if self.has_hedgehog and self.hedgehog_time_lastFired > 0:
             self.hedgehog_time_lastFired -= 1
 
-        # Player check needed for ai_combat_behavior method.
-        player = get_player()
-        if player and player.alive:
-            self.ai_combat_behavior(player)    
+        # ai_combat_behavior and ai_gun_behavior run in separate stages once every entity has ticked, see level.updateCombatAI
 
+    # Course towards the contact, re-planned every level.AI_PERIOD ticks
     def ai_combat_behavior(self, player: Ship):
-        # Step 1: Calculate direction to player
-        dx = player.x - self.x
-        dy = player.y - self.y
+        # Nothing to go on until the sensors found the player (see sensors.py)
+        if self.lastKnownPosition is None:
+            return
+        # Step 1: Calculate direction to where the player was last detected
+        dx = self.lastKnownPosition[0] - self.x
+        dy = self.lastKnownPosition[1] - self.y
         target_angle = math.degrees(math.atan2(dy, dx)) % 360  # [0, 360)
         # Step 2: Adjust heading
         angle_diff = (target_angle - self.heading + 360) % 360
@@ -531,59 +640,77 @@ class destroyer(enemyShip):
             self.steer_target = max(-self.steer_max, min(self.steer_max, angle_diff))
         # Step 3: Move forward
         self.throttle = 100  # Max throttle to charge
-        # Step 4: Attack if in range and ready
-        if self.has_gun and self.gun_time_lastFired <= 0:
-            distance = math.sqrt(dx ** 2 + dy ** 2)
+
+    # Gun, checked every tick
+    def ai_gun_behavior(self, player: Ship):
+        # Attack if the player is in sight, in range and the gun is ready
+        if self.spottedPlayer and self.has_gun and self.gun_time_lastFired <= 0:
+            distance = math.sqrt((player.x - self.x) ** 2 + (player.y - self.y) ** 2)
             if distance <= self.gun_range:
                 self.attack_gun(player)
 
+    # Depth charges and hedgehog, checked every tick for the destroyers near the player (see level.updateAntiSubmarine)
+    def ai_antisubmarine_behavior(self, player: Ship):
+        if not self.spottedPlayer:
+            return
+        # Depth charges once the player is close enough to pass under the drop points
+        if self.has_depthCharge and self.depthCharge_time_lastDropped <= 0:
+            distance = math.sqrt((player.x - self.x) ** 2 + (player.y - self.y) ** 2)
+            if distance <= self.length/2 + self.depthCharge_pattern_size + self.depthCharge_splash_radius:
+                self.attack_depth_charge(player)
+        # Hedgehog once the player is inside the pattern it throws ahead of the bow
+        if self.has_hedgehog and self.hedgehog_time_lastFired <= 0:
+            reach = self.length/2 + self.hedgehog_range
+            aimX = self.x + reach * math.cos(math.radians(self.heading))
+            aimY = self.y + reach * math.sin(math.radians(self.heading))
+            if math.sqrt((player.x - aimX) ** 2 + (player.y - aimY) ** 2) <= self.hedgehog_pattern_size/2 + player.length/2:
+                self.attack_hedgehog(player)
+
     # Gun functions
     def attack_gun(self, target: Ship):
+        from level import randomStream
         if not self.has_gun:
             return
         # Calculate distance to target
         distance = math.sqrt((self.x - target.x) ** 2 + (self.y - target.y) ** 2)
         if distance <= self.gun_range:
             # Calculate hit chance based on accuracy and distance
-            if ((2 - distance / self.gun_range) * self.gun_accuracy) > random.randint(0, 100):
+            if ((2 - distance / self.gun_range) * self.gun_accuracy) > randomStream("gun").randint(0, 100):
                 # Hit the target
                 target.take_damage(self.gun_damage)
             '''play sound?'''
         self.gun_time_lastFired = self.gun_time_reload  # Reset the reload time
 
-    # Depth charge functions
+    # Depth charge functions, the charges are dropped and go off in level.projectiles
     def attack_depth_charge(self, target: Ship):
         if not self.has_depthCharge:
             return
+        behind = -self.length/2 - self.depthCharge_pattern_size
+        side = self.width/2 + self.depthCharge_pattern_size
         match self.depthCharge_pattern:
             case "behind": # Drop depth charges behind the ships
-                for i in range(self.depthCharge_burst_amount):
-                    self.stack_add_depthCharge(0, -self.length/2 - self.depthCharge_pattern_size, i * self.depthCharge_burst_interval, target)
+                offsets = [(behind, 0)]
             case "sides": # Drop depth charges on both sides of the ship
-                for i in range(self.depthCharge_burst_amount):
-                    self.stack_add_depthCharge(-self.width/2 - self.depthCharge_pattern_size, 0, i * self.depthCharge_burst_interval, target)
-                    self.stack_add_depthCharge(self.width/2 + self.depthCharge_pattern_size, 0, i * self.depthCharge_burst_interval, target)
+                offsets = [(0, -side), (0, side)]
             case "all": # Drop depth charges behind and both sides of the ship
-                for i in range(self.depthCharge_burst_amount):
-                    self.stack_add_depthCharge(0, -self.length/2 - self.depthCharge_pattern_size, i * self.depthCharge_burst_interval, target)
-                    self.stack_add_depthCharge(-self.width/2 - self.depthCharge_pattern_size, 0, i * self.depthCharge_burst_interval, target)
-                    self.stack_add_depthCharge(self.width/2 + self.depthCharge_pattern_size, 0, i * self.depthCharge_burst_interval, target)
+                offsets = [(behind, 0), (0, -side), (0, side)]
+            case _:
+                offsets = []
+        for i in range(self.depthCharge_burst_amount):
+            for forward, starboard in offsets:
+                self.stack_add_depthCharge(forward, starboard, i * self.depthCharge_burst_interval)
         self.depthCharge_time_lastDropped = self.depthCharge_time_reload  # Reset the reload time
 
-    def stack_add_depthCharge(self, xOff, yOff, delay, target: Ship):
-        new_charge = preDepthCharge(x=xOff, y=yOff, target=target, time=delay)
-        self.depthCharge_stack_dropping.append(new_charge)
-
-    def stack_drop_depthCharge(self, preDepthCharge: preDepthCharge):
-        offDis = math.sqrt(preDepthCharge.x ** 2 + preDepthCharge.y ** 2)
-        offAngle = math.degrees(math.atan2(preDepthCharge.y, preDepthCharge.x))
-        xOffset = self.x + offDis * math.cos(math.radians(self.heading) + offAngle)
-        yOffset = self.y + offDis * math.sin(math.radians(self.heading) + offAngle)
-        new_charge = depthCharge(xOffset, yOffset, preDepthCharge.target, self.depthCharge_explosion_time, self.depthCharge_damage, self.depthCharge_splash_radius)
-        self.depthCharge_stack_dropped.append(new_charge)
+    def stack_add_depthCharge(self, forward, starboard, delay):
+        from level import projectiles
+        from projectiles import DEPTH_CHARGE
+        projectiles.add(DEPTH_CHARGE, self.id, forward, starboard, delay, self.depthCharge_damage,
+                        self.depthCharge_splash_radius, fuse=self.depthCharge_explosion_time, dropping=True)
 
-    # Hedgehog functions
+    # Hedgehog functions, the bombs land in level.projectiles
     def attack_hedgehog(self, target: Ship):
+        from level import projectiles
+        from projectiles import HEDGEHOG, HEDGEHOG_FLIGHT_TIME
         if not self.has_hedgehog:
             return
         offMainDis = math.sqrt(0 ** 2 + (self.length/2) ** 2) + self.hedgehog_range
@@ -594,13 +721,23 @@ class destroyer(enemyShip):
             offSecDis = self.hedgehog_pattern_size/2
             xOffsetSec = xOffset + offSecDis * math.cos(math.radians(self.heading + offAngle * i))
             yOffsetSec = yOffset + offSecDis * math.sin(math.radians(self.heading + offAngle * i))
-            if point_in_rect(xOffsetSec, yOffsetSec, target.x, target.y, target.width, target.length, target.heading):
-                target.take_damage(self.hedgehog_damage)
+            projectiles.add(HEDGEHOG, self.id, xOffsetSec, yOffsetSec, HEDGEHOG_FLIGHT_TIME, self.hedgehog_damage)
         self.hedgehog_time_lastFired = self.hedgehog_time_reload  # Reset the reload time
-        
+
+destroyer.world_columns = SHIP_COLUMNS + DESTROYER_COLUMNS
+for _name in DESTROYER_COLUMNS:
+    setattr(destroyer, _name, WorldColumn(_name))
 
 # Enemy ship incapable of combat, objective for player to destroy
 class transport(enemyShip):
+    # Sensors and radio, class values so older saves get them too
+    visual_range = transportSensorStat[0]
+    visual_skill = transportSensorStat[1]
+    noise_range = transportSensorStat[2]
+    noise_skill = transportSensorStat[3]
+    radio_range = transportRadioStat[0]
+    radio_skill = transportRadioStat[1]
+
     # Cargo attributes (???)
     cargo_type: str                 # Type of cargo the transport is carrying
     cargo_amount: int               # Amount of cargo the transport is carrying
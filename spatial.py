@@ -0,0 +1,111 @@
+import math
+
+# Uniform grid spatial hash used as a broad phase for hit detection and range queries.
+# Entities are bucketed by their centre, so queries are padded by the largest half-diagonal seen so far.
+# The index is refreshed once per tick (see level.updateLevel), the padding also covers one tick of movement
+# so entities that already moved this tick are still found.
+
+DEFAULT_CELL_SIZE = 250
+
+class SpatialHash:
+    cell_size: float
+    cells: dict[tuple[int, int], list]    # Cell key -> entities whose centre lies in the cell
+    keys: dict[int, tuple[int, int]]      # id(entity) -> cell key the entity is stored under
+    max_extent: float                     # Largest half-diagonal of any inserted entity plus its top speed
+
+    def __init__(self, cell_size: float = DEFAULT_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.keys = {}
+        self.max_extent = 0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, entity):
+        return id(entity) in self.keys
+
+    def key(self, x: float, y: float) -> tuple[int, int]:
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def clear(self):
+        self.cells.clear()
+        self.keys.clear()
+        self.max_extent = 0
+
+    def rebuild(self, entities):
+        self.clear()
+        for entity in entities:
+            self.insert(entity)
+
+    def insert(self, entity):
+        key = self.key(entity.x, entity.y)
+        self.cells.setdefault(key, []).append(entity)
+        self.keys[id(entity)] = key
+        extent = math.hypot(getattr(entity, "length", 0) / 2, getattr(entity, "width", 0) / 2) + getattr(entity, "speed_max", 0)
+        if extent > self.max_extent:
+            self.max_extent = extent
+
+    def remove(self, entity):
+        key = self.keys.pop(id(entity), None)
+        if key is None:
+            return
+        cell = self.cells[key]
+        cell.remove(entity)
+        if not cell:
+            del self.cells[key]
+
+    def move(self, entity):
+        """Re-bucket the entity after it moved, inserting it if it is not indexed yet."""
+        key = self.key(entity.x, entity.y)
+        old = self.keys.get(id(entity))
+        if old == key:
+            return
+        if old is None:
+            self.insert(entity)
+            return
+        cell = self.cells[old]
+        cell.remove(entity)
+        if not cell:
+            del self.cells[old]
+        self.cells.setdefault(key, []).append(entity)
+        self.keys[id(entity)] = key
+
+    def update(self, entities):
+        """Re-bucket every entity of the list and drop indexed entities that are no longer in it."""
+        present = set()
+        for entity in entities:
+            present.add(id(entity))
+            self.move(entity)
+        if len(present) != len(self.keys):
+            for cell in list(self.cells.values()):
+                for entity in list(cell):
+                    if id(entity) not in present:
+                        self.remove(entity)
+
+    def query_rect(self, x0: float, y0: float, x1: float, y1: float) -> list:
+        """Entities that may overlap the axis-aligned rectangle, including ones whose hull only reaches into it."""
+        pad = self.max_extent
+        cx0, cy0 = self.key(min(x0, x1) - pad, min(y0, y1) - pad)
+        cx1, cy1 = self.key(max(x0, x1) + pad, max(y0, y1) + pad)
+        found = []
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            # Query larger than the populated area, walking the occupied cells is cheaper
+            for (cx, cy), cell in self.cells.items():
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1:
+                    found.extend(cell)
+            return found
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = self.cells.get((cx, cy))
+                if cell:
+                    found.extend(cell)
+        return found
+
+    def query_segment(self, x0: float, y0: float, x1: float, y1: float) -> list:
+        """Entities that may be touched by the segment from (x0, y0) to (x1, y1)."""
+        return self.query_rect(x0, y0, x1, y1)
+
+    def query_radius(self, x: float, y: float, radius: float) -> list:
+        """Entities that may be within radius of (x, y)."""
+        return self.query_rect(x - radius, y - radius, x + radius, y + radius)
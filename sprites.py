@@ -0,0 +1,73 @@
+import os
+import pygame
+
+# Cache of UI images, shared by gameui, menu and periscopeui (see assets.py for fonts and prefetching).
+#
+#   image = sprites.get("arrow.png", angle=90, scale=0.5)
+#
+# Images from assets/img are loaded once and every transformed copy is kept per (image, angle, scale), so nothing
+# is rotated or scaled while drawing. Surfaces are converted to the display's pixel format (convert_alpha for
+# images with per pixel alpha), which lets blits skip the per pixel format conversion. Images loaded before the
+# display mode is set, or by prepare() on the prefetch thread, are kept as loaded and converted on first use on the
+# main thread once the display exists, or by warm(), which gameui calls when a level starts.
+
+IMG_PATH = os.path.join(os.path.abspath(os.path.dirname(__file__)), "assets", "img")
+
+images = {}       # File name -> image as loaded
+cache = {}        # Key -> transformed surface, in display format unless the key is in unconverted
+unconverted = set()  # Keys cached before the display mode was set or by prepare()
+
+def load(name: str) -> pygame.Surface:
+    image = images.get(name)
+    if image is None:
+        image = images[name] = pygame.image.load(os.path.join(IMG_PATH, name))
+    return image
+
+def convert(surface: pygame.Surface) -> pygame.Surface:
+    if surface.get_flags() & pygame.SRCALPHA:
+        return surface.convert_alpha()
+    return surface.convert()
+
+def cached(key, make, convert_now: bool = True) -> pygame.Surface:
+    """The surface cached under key, created with make() on the first call."""
+    surface = cache.get(key)
+    if surface is None:
+        surface = cache[key] = make()
+        unconverted.add(key)
+    if convert_now and key in unconverted and pygame.display.get_surface() is not None:
+        surface = cache[key] = convert(surface)
+        unconverted.discard(key)
+    return surface
+
+def transformed(name: str, angle: float, scale: float | tuple[int, int]) -> pygame.Surface:
+    image = load(name)
+    if angle:
+        image = pygame.transform.rotate(image, angle)
+    if isinstance(scale, tuple):
+        image = pygame.transform.scale(image, scale)
+    elif scale != 1:
+        image = pygame.transform.scale_by(image, scale)
+    return image
+
+def get(name: str, angle: float = 0, scale: float | tuple[int, int] = 1) -> pygame.Surface:
+    """Image file name rotated by angle degrees counterclockwise, then scaled by a factor or to a (width, height)."""
+    return cached((name, angle, scale), lambda: transformed(name, angle, scale))
+
+def prepare(name: str, angle: float = 0, scale: float | tuple[int, int] = 1):
+    """Load and transform an image without converting it, safe to call from another thread."""
+    cached((name, angle, scale), lambda: transformed(name, angle, scale), convert_now=False)
+
+def warm(keys=()):
+    """Convert every cached surface still in its loaded format and cache the given (name, angle, scale) keys."""
+    for key in keys:
+        get(*key)
+    if pygame.display.get_surface() is None:
+        return
+    for key in list(unconverted):
+        cache[key] = convert(cache[key])
+        unconverted.discard(key)
+
+def clear():
+    images.clear()
+    cache.clear()
+    unconverted.clear()
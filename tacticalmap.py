@@ -0,0 +1,189 @@
+import math
+import numpy as np
+import pygame
+import level
+import profiler
+import ship
+
+# Top-down tactical map, the UIScreen.TOPDOWN view.
+#
+# A Camera follows the player and maps world units (y up) to screen pixels (y down) at its zoom, the arrow keys pan
+# it, the mouse wheel or +/- zoom and Home recentres it on the player. Only the world rectangle on screen is
+# queried from level.grid, so entities far off screen are never touched.
+#
+# Hulls are built from the corners of a unit square scaled to every visible ship's length and width and rotated by
+# its heading in one NumPy pass. Ships shorter than ICON_PIXELS on screen are drawn as icons instead, binned into
+# cells of ICON_PIXELS per type so a distant group costs one icon, however many contacts it holds. Only the
+# visible hulls and one icon per occupied cell are drawn, which bounds a frame by the screen instead of the level.
+
+ZOOM_MIN = 0.005
+ZOOM_MAX = 8.0
+ZOOM_STEP = 1.25     # Zoom factor of one mouse wheel notch or +/- press
+PAN_SPEED = 600      # Screen pixels per second the camera pans with the arrow keys
+ICON_PIXELS = 6      # Ships shorter than this on screen become icons, and the size of an icon cell
+
+# Hull corners of a unit square as (forward, to port), scaled by length and width
+HULL_CORNERS = np.array([[0.5, 0.5], [0.5, -0.5], [-0.5, -0.5], [-0.5, 0.5]])
+
+TYPE_COLORS = {
+    "playerShip": (0, 255, 0),
+    "destroyer": (255, 80, 80),
+    "transport": (255, 255, 255),
+    "torpedo": (255, 255, 0),
+}
+DEFAULT_COLOR = (255, 255, 255)  # Plain entities and unknown types
+
+class Camera:
+    x: float        # World position at the centre of the screen
+    y: float
+    zoom: float     # Screen pixels per world unit
+    follow: bool    # Whether the camera stays centred on the player
+
+    def __init__(self, zoom: float = 1.0):
+        self.x = 0.0
+        self.y = 0.0
+        self.zoom = zoom
+        self.follow = True
+
+    def world_rect(self, width: int, height: int) -> tuple[float, float, float, float]:
+        """(x0, y0, x1, y1) of the world area on a screen of the given size."""
+        halfWidth = width / 2 / self.zoom
+        halfHeight = height / 2 / self.zoom
+        return self.x - halfWidth, self.y - halfHeight, self.x + halfWidth, self.y + halfHeight
+
+    def zoom_by(self, factor: float):
+        self.zoom = min(ZOOM_MAX, max(ZOOM_MIN, self.zoom * factor))
+
+    def pan(self, dx: float, dy: float):
+        """Move by screen pixels, which stops following the player."""
+        self.x += dx / self.zoom
+        self.y -= dy / self.zoom
+        self.follow = False
+
+camera = Camera()
+state = {"key": None} # Per tick arrays of the alive entities, see tick_state
+
+def handle_input(events, dt=1/60):
+    for event in events:
+        if event.type == pygame.MOUSEWHEEL:
+            camera.zoom_by(ZOOM_STEP ** event.y)
+        elif event.type == pygame.KEYDOWN:
+            if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                camera.zoom_by(ZOOM_STEP)
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                camera.zoom_by(1 / ZOOM_STEP)
+            elif event.key == pygame.K_HOME:
+                camera.follow = True
+    pressed = pygame.key.get_pressed()
+    dx = (pressed[pygame.K_RIGHT] - pressed[pygame.K_LEFT]) * PAN_SPEED * dt
+    dy = (pressed[pygame.K_DOWN] - pressed[pygame.K_UP]) * PAN_SPEED * dt
+    if dx or dy:
+        camera.pan(dx, dy)
+
+def tick_state() -> dict:
+    """Poses before and after the last tick and the hull sizes of the entities, gathered once per tick."""
+    key = (id(level.entityList), level.tickCount, len(level.entityList))
+    if state["key"] != key:
+        entities = level.entityList
+        ids = [id(entity) for entity in entities]
+        if ids != state.get("ids"):
+            # Hull sizes and types only change when entities spawn or despawn
+            isShip = np.array([isinstance(entity, ship.Ship) for entity in entities], dtype=bool)
+            size = np.array([(entity.length, entity.width) if isinstance(entity, ship.Ship) else (0, 0) for entity in entities], dtype=np.float64).reshape(-1, 2)
+            types = [entity.type for entity in entities]
+            typeNames = list(dict.fromkeys(types))
+            state.update(ids=ids, rows={entityId: i for i, entityId in enumerate(ids)}, isShip=isShip, length=size[:, 0], width=size[:, 1],
+                         typeNames=typeNames, typeIndex=np.array([typeNames.index(type) for type in types], dtype=np.int64))
+        alive = np.fromiter((entity.alive for entity in entities), dtype=bool, count=len(entities))
+        current = np.array([(entity.x, entity.y, entity.heading) for entity in entities], dtype=np.float64).reshape(-1, 3)
+        # Entities without a previous pose stay put, like level.interpolatedPose
+        previous = current.copy()
+        for i, entityId in enumerate(ids):
+            pose = level.previousPoses.get(entityId)
+            if pose is not None:
+                previous[i] = pose
+        both = np.concatenate((previous[alive, :2], current[alive, :2]))
+        bounds = (*both.min(axis=0), *both.max(axis=0)) if len(both) else (0, 0, 0, 0)
+        state.update(key=key, alive=alive, previous=previous, current=current, bounds=bounds)
+    return state
+
+def visible_rows(width: int, height: int, alpha: float = 1.0):
+    """Rows of tick_state that may be on screen, with their interpolated (x, y, heading) as an (n, 3) array."""
+    x0, y0, x1, y1 = camera.world_rect(width, height)
+    tick = tick_state()
+    bx0, by0, bx1, by1 = tick["bounds"]
+    if x0 <= bx0 and y0 <= by0 and bx1 <= x1 and by1 <= y1:
+        # Zoomed out over the whole level, every entity is on screen
+        rows = np.flatnonzero(tick["alive"])
+    else:
+        index = tick["rows"]
+        found = level.grid.query_rect(x0, y0, x1, y1)
+        rows = np.fromiter((index.get(id(entity), -1) for entity in found), dtype=np.int64, count=len(found))
+        rows = rows[rows >= 0]
+        rows = rows[tick["alive"][rows]]
+    current = tick["current"][rows]
+    if alpha >= 1:
+        return rows, current
+    previous = tick["previous"][rows]
+    poses = previous + (current - previous) * alpha
+    turn = (current[:, 2] - previous[:, 2] + 180) % 360 - 180 # Shortest way around
+    poses[:, 2] = (previous[:, 2] + turn * alpha) % 360
+    return rows, poses
+
+def draw_tactical_map(screen, events, dt=1/60, alpha=1.0):
+    handle_input(events, dt)
+    render_tactical_map(screen, alpha)
+
+def render_tactical_map(screen, alpha=1.0):
+    """Draw the map, without handling input."""
+    width, height = screen.get_size()
+    player = level.playerShip
+    if camera.follow and player is not None:
+        camera.x, camera.y, _ = level.interpolatedPose(player, alpha)
+    rows, poses = visible_rows(width, height, alpha)
+    if not len(rows):
+        return
+    tick = tick_state()
+    zoom = camera.zoom
+    screenX = width / 2 + (poses[:, 0] - camera.x) * zoom
+    screenY = height / 2 - (poses[:, 1] - camera.y) * zoom
+    lengths = tick["length"][rows]
+    widths = tick["width"][rows]
+    typeIndex = tick["typeIndex"][rows]
+    colors = [TYPE_COLORS.get(type, DEFAULT_COLOR) for type in tick["typeNames"]]
+    # Exact cull on the half-diagonal, the grid query is padded for the largest hull and a tick of movement
+    reach = np.hypot(lengths, widths) / 2 * zoom + ICON_PIXELS
+    onScreen = (screenX >= -reach) & (screenX <= width + reach) & (screenY >= -reach) & (screenY <= height + reach)
+    hull = onScreen & tick["isShip"][rows] & (lengths * zoom >= ICON_PIXELS)
+    icon = onScreen & ~hull
+
+    drawn = np.flatnonzero(hull)
+    if len(drawn):
+        heading = np.radians(poses[drawn, 2])
+        cos, sin = np.cos(heading)[:, None], np.sin(heading)[:, None]
+        forward = HULL_CORNERS[:, 0] * lengths[drawn, None]
+        port = HULL_CORNERS[:, 1] * widths[drawn, None]
+        cornerX = screenX[drawn, None] + (forward * cos - port * sin) * zoom
+        cornerY = screenY[drawn, None] - (forward * sin + port * cos) * zoom
+        corners = np.stack((cornerX, cornerY), axis=2).tolist()
+        for t, polygon in zip(typeIndex[drawn].tolist(), corners):
+            pygame.draw.polygon(screen, colors[t], polygon)
+    profiler.count("map hulls", len(drawn))
+
+    drawn = np.flatnonzero(icon)
+    if len(drawn):
+        # One icon per type and screen cell, sized by how many contacts share it
+        # Cells are counted from one cell left of and above the screen, icons may reach into it
+        columns = width // ICON_PIXELS + 3
+        rowsOfCells = height // ICON_PIXELS + 3
+        cx = np.clip(np.floor(screenX[drawn] / ICON_PIXELS).astype(np.int64) + 1, 0, columns - 1)
+        cy = np.clip(np.floor(screenY[drawn] / ICON_PIXELS).astype(np.int64) + 1, 0, rowsOfCells - 1)
+        cells, counts = np.unique((typeIndex[drawn] * rowsOfCells + cy) * columns + cx, return_counts=True)
+        for cell, count in zip(cells.tolist(), counts.tolist()):
+            t, cell = divmod(cell, rowsOfCells * columns)
+            cy, cx = divmod(cell, columns)
+            size = 2 + min(ICON_PIXELS - 2, int(math.log2(count)))
+            centreX = (cx - 1) * ICON_PIXELS + ICON_PIXELS // 2
+            centreY = (cy - 1) * ICON_PIXELS + ICON_PIXELS // 2
+            screen.fill(colors[t], (centreX - size // 2, centreY - size // 2, size, size))
+        profiler.count("map icons", len(cells))
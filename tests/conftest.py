@@ -0,0 +1,20 @@
+import os
+import sys
+
+# Run without a window or sound device and import the game modules from the repository root
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+import level
+
+@pytest.fixture(autouse=True)
+def fresh_level():
+    """Every test starts from an empty level with fixed random streams and per-object ticking."""
+    level.enableWorld(False)
+    level.loadEntities([])
+    level.seedRandom(1)
+    yield
+    level.enableWorld(False)
+    level.loadEntities([])
@@ -0,0 +1,33 @@
+import math
+import pytest
+from ship import point_in_rect, segment_rect_intersection
+
+def hit(x0, y0, x1, y1, heading=0, rx=0, ry=0, rw=10, rh=100):
+    radians = math.radians(heading)
+    return segment_rect_intersection(x0, y0, x1, y1, rx, ry, rw, rh, math.cos(radians), math.sin(radians))
+
+def test_segment_entering_the_side_of_a_hull():
+    # Hull along the x axis, 100 long and 10 wide, crossed from below
+    impact = hit(0, -20, 0, 20)
+    assert impact == pytest.approx((15 / 40, 0, -5))
+
+def test_segment_entering_the_end_of_a_rotated_hull():
+    # Same hull turned to heading 90, its stern is at y = -50
+    impact = hit(0, -100, 0, 0, heading=90)
+    assert impact == pytest.approx((0.5, 0, -50))
+
+def test_segment_missing_or_stopping_short():
+    assert hit(20, -20, 20, 20, heading=90) is None
+    assert hit(0, -20, 0, -10) is None
+    # Parallel to the hull and outside it
+    assert hit(-100, 8, 100, 8) is None
+
+def test_segment_starting_inside():
+    assert hit(0, 0, 0, 20) == pytest.approx((0, 0, 0))
+
+def test_entry_point_lies_on_the_hull():
+    impact = hit(-30, -40, 60, 25, heading=30, rx=5, ry=-3, rw=12, rh=80)
+    assert impact is not None
+    x, y = impact[1], impact[2]
+    # Nudged a little into the hull from the entry point
+    assert point_in_rect(x + 0.01 * 90, y + 0.01 * 65, 5, -3, 12, 80, 30)
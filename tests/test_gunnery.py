@@ -0,0 +1,35 @@
+import level
+import scenario
+
+def gunnery(useWorld, health, ticks=30):
+    """Player health and gun timers after every tick of the escorts shooting at the player, and the next gun roll."""
+    scenario.build_scenario(24, 10, 0, seed=4)
+    player = level.playerShip
+    player.health_max = player.health = health
+    destroyers = list(level.registry.of_type("destroyer"))
+    # Every escort sees the player, from about half its gun range so the hit chances vary between them
+    player.x, player.y = destroyers[0].x + 4000, destroyers[0].y
+    for destroyer in destroyers:
+        destroyer.spottedPlayer = True
+    level.seedRandom(7)
+    level.enableWorld(useWorld)
+    states = []
+    for tick in range(ticks):
+        level.updateEntities(tick)
+        level.updateGunnery(tick)
+        states.append((player.health, [destroyer.gun_time_lastFired for destroyer in destroyers]))
+    roll = level.randomStream("gun").random()
+    level.enableWorld(False)
+    return states, roll
+
+def test_batched_gun_ai_matches_per_destroyer_fire():
+    scalar = gunnery(False, 10 ** 6)
+    batched = gunnery(True, 10 ** 6)
+    assert scalar[0][-1][0] < 10 ** 6
+    assert batched == scalar
+
+def test_batched_gun_ai_stops_at_the_sinking_shot():
+    scalar = gunnery(False, 1000)
+    batched = gunnery(True, 1000)
+    assert scalar[0][-1][0] <= 0
+    assert batched == scalar
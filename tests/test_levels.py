@@ -0,0 +1,15 @@
+import os
+import pytest
+import headless
+import level
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEVELS = ["level1.p", "level2.p", "test.p", "savestate1.p", "convoy.json"]
+
+@pytest.mark.parametrize("useWorld", [False, True], ids=["objects", "world"])
+@pytest.mark.parametrize("saveName", LEVELS)
+def test_shipped_levels_run_headless(saveName, useWorld):
+    summary = headless.run(os.path.join(ROOT, saveName), 30, useWorld=useWorld, seed=1)
+    assert summary["ticks"] > 0
+    assert summary["transports"] + summary["destroyers"] > 0
+    assert level.world is None
@@ -0,0 +1,68 @@
+import pytest
+import level
+import projectiles
+import scenario
+
+@pytest.fixture
+def escort():
+    """A destroyer heading north at the origin, with the player far away."""
+    scenario.build_scenario(1, 1, 0)
+    destroyer = next(iter(level.registry.of_type("destroyer")))
+    destroyer.x, destroyer.y, destroyer.heading = 0, 0, 90
+    level.playerShip.x, level.playerShip.y = 5000, 5000
+    level.updateSpatialIndex(0)
+    return destroyer
+
+def test_dropped_charges_land_at_forward_starboard_offsets(escort):
+    pool = level.projectiles
+    # Astern, to starboard and to port of a ship heading north
+    for forward, starboard in ((-100, 0), (0, 20), (0, -20)):
+        pool.add(projectiles.DEPTH_CHARGE, escort.id, forward, starboard, 1, 10, 5, fuse=3, dropping=True)
+    pool.update()
+    c = pool.columns
+    assert len(pool) == 3 and not c["dropping"][:3].any()
+    assert c["x"][:3].tolist() == pytest.approx([0, 20, -20], abs=1e-9)
+    assert c["y"][:3].tolist() == pytest.approx([-100, 0, 0], abs=1e-9)
+    assert c["timer"][:3].tolist() == [3, 3, 3]
+
+def test_detonation_swap_removes_and_damages(escort):
+    pool = level.projectiles
+    target = next(iter(level.registry.of_type("transport")))
+    target.x, target.y = 0, -1000
+    level.updateSpatialIndex(0)
+    health = target.health
+    # Rows 1 and 3 go off on the first update, one of them under the transport. The last row fills the hole at 1
+    for row, (timer, y) in enumerate(((5, 0), (1, -1000), (5, 0), (1, 0), (5, 0))):
+        pool.add(projectiles.DEPTH_CHARGE, escort.id, 0, y, timer, 100 + row, 50)
+    pool.update()
+    assert len(pool) == 3
+    assert pool.columns["damage"][:3].tolist() == [100, 104, 102]
+    assert target.health == health - 101
+    # A sunk owner's charges are lost before they are dropped
+    pool.add(projectiles.DEPTH_CHARGE, escort.id, -100, 0, 1, 10, 5, fuse=3, dropping=True)
+    escort.take_damage(escort.health)
+    pool.update()
+    assert len(pool) == 3 and pool.columns["damage"][:3].tolist() == [100, 104, 102]
+
+def test_destroyers_attack_a_player_they_spotted_up_close(escort):
+    player = level.playerShip
+    player.health_max = player.health = 10 ** 6
+    # Right astern, under the drop point of the "behind" pattern
+    player.x, player.y = 0, -escort.length/2 - escort.depthCharge_pattern_size
+    escort.spottedPlayer = True
+    escort.throttle = 0
+    level.updateLevel(False)
+    assert len(level.projectiles)
+    assert escort.depthCharge_time_lastDropped == escort.depthCharge_time_reload
+    for _ in range(20):
+        level.updateLevel(False)
+    assert player.health < 10 ** 6
+
+def test_destroyers_throw_the_hedgehog_at_a_player_ahead(escort):
+    player = level.playerShip
+    player.x, player.y = 0, escort.length/2 + escort.hedgehog_range
+    escort.spottedPlayer = True
+    escort.throttle = 0
+    level.updateLevel(False)
+    assert escort.hedgehog_time_lastFired == escort.hedgehog_time_reload
+    assert (level.projectiles.columns["kind"][:len(level.projectiles)] == projectiles.HEDGEHOG).sum() == escort.hedgehog_burst_amount
@@ -0,0 +1,33 @@
+from types import SimpleNamespace
+from registry import Registry
+
+def entity(type="transport", id=None):
+    return SimpleNamespace(type=type, id=id)
+
+def test_ids_of_removed_entities_are_never_handed_out_again():
+    registry = Registry()
+    first, second = entity(), entity()
+    registry.add(first)
+    registry.add(second)
+    registry.remove(second)
+    third = entity()
+    registry.add(third)
+    assert (first.id, second.id, third.id) == (0, 1, 2)
+    assert registry.get(1) is None and second not in registry
+
+def test_taken_ids_are_replaced_and_higher_ids_move_the_counter():
+    registry = Registry()
+    registry.add(entity(id=5))
+    clash = entity(id=5)
+    registry.add(clash)
+    assert clash.id == 6 and registry.next_id() == 7
+
+def test_rebuild_keeps_the_saved_counter_and_spawn_order():
+    registry = Registry()
+    entities = [entity("destroyer", 3), entity("playerShip", 0), entity("destroyer", 1)]
+    registry.rebuild(entities, nextId=10)
+    assert registry.next_id() == 10
+    assert list(registry.of_type("destroyer")) == [entities[0], entities[2]]
+    assert registry.player is entities[1]
+    registry.remove(entities[1])
+    assert registry.player is None and len(registry) == 2
@@ -0,0 +1,39 @@
+import pytest
+import level
+import replay
+import scenario
+
+@pytest.mark.parametrize("useWorld", [False, True])
+def test_replay_reproduces_the_recording(tmp_path, useWorld):
+    scenario.build_scenario(6, 10, 2, seed=1)
+    level.enableWorld(useWorld)
+    level.recorder = replay.Recorder(seed=3)
+    try:
+        player = level.playerShip
+        for tick in range(120):
+            if tick == 10:
+                player.throttle = 80
+                player.steer_target = 5
+            if tick == 40:
+                player.attack_torpedo(0)
+            level.updateLevel(False)
+        path = tmp_path / "session.rec"
+        level.recorder.save(str(path))
+    finally:
+        level.recorder = None
+    result = replay.replay(str(path))
+    assert result["ticks"] == 120 and result["match"]
+
+def test_replay_notices_a_different_outcome(tmp_path):
+    scenario.build_scenario(2, 2, 0, seed=1)
+    level.recorder = replay.Recorder(seed=3)
+    try:
+        for _ in range(10):
+            level.updateLevel(False)
+        # Changed outside the recorded commands, the replay can't reproduce it
+        level.playerShip.health -= 1
+        path = tmp_path / "session.rec"
+        level.recorder.save(str(path))
+    finally:
+        level.recorder = None
+    assert not replay.replay(str(path))["match"]
@@ -0,0 +1,66 @@
+import random
+import struct
+import pytest
+import level
+import savefile
+import scenario
+
+def test_round_trip_keeps_state_references_and_next_id():
+    entities = scenario.build_scenario(4, 6, 2, seed=1)
+    torp = next(iter(level.registry.of_type("torpedo")))
+    escort = next(iter(level.registry.of_type("destroyer")))
+    escort.spottedTorpedoes = (torp,)
+    data = savefile.encode(entities, 42)
+    loaded, nextId = savefile.decode_level(data)
+    assert nextId == 42
+    assert [type(entity) for entity in loaded] == [type(entity) for entity in entities]
+    assert [entity.__dict__.keys() for entity in loaded] == [entity.__dict__.keys() for entity in entities]
+    # Entity references point into the loaded list, not at copies
+    assert loaded[entities.index(escort)].spottedTorpedoes == (loaded[entities.index(torp)],)
+    assert savefile.encode(loaded, nextId) == data
+
+def test_next_id_defaults_to_one_past_the_highest_id():
+    entities = scenario.build_scenario(2, 2, 0)
+    assert savefile.decode_level(savefile.encode(entities))[1] == max(entity.id for entity in entities) + 1
+
+def corrupted(data, rng):
+    """Copy of a save with a few bytes overwritten, somewhere after the magic."""
+    data = bytearray(data)
+    for _ in range(rng.randint(1, 4)):
+        data[rng.randrange(len(savefile.MAGIC), len(data))] = rng.randrange(256)
+    return bytes(data)
+
+def test_corrupt_saves_raise_save_format_error():
+    data = savefile.encode(scenario.build_scenario(4, 6, 2, seed=1))
+    rng = random.Random(0)
+    for _ in range(2000):
+        try:
+            savefile.decode_level(corrupted(data, rng))
+        except savefile.SaveFormatError:
+            pass
+    for size in range(len(savefile.MAGIC), len(data), 7):
+        with pytest.raises(savefile.SaveFormatError):
+            savefile.decode_level(data[:size])
+
+def test_out_of_range_references_raise_save_format_error():
+    data = savefile.encode(scenario.build_scenario(2, 2, 1, seed=1))
+    strings = struct.unpack_from("<I", data, len(savefile.MAGIC) + 2)[0]
+    # A string reference one past the interned strings, patched over the first class name
+    position = len(savefile.MAGIC) + 6
+    for _ in range(strings):
+        position += 4 + struct.unpack_from("<I", data, position)[0]
+    patched = data[:position + 2] + struct.pack("<I", strings) + data[position + 6:]
+    with pytest.raises(savefile.SaveFormatError):
+        savefile.decode_level(patched)
+
+def test_world_saves_keep_ints():
+    scenario.build_scenario(4, 4, 0, seed=1)
+    level.playerShip.take_damage(1)
+    level.enableWorld()
+    for _ in range(20):
+        level.updateLevel(False)
+    entities, _ = savefile.decode_level(savefile.encode(level.entityList))
+    for entity in entities:
+        assert type(entity.health) is int and type(entity.throttle) is int
+        if entity.type == "destroyer":
+            assert type(entity.gun_time_lastFired) is int
@@ -0,0 +1,36 @@
+import pytest
+from scheduler import Scheduler
+
+def test_staggered_tasks_visit_every_id_once_per_period():
+    scheduler = Scheduler()
+    visits = []
+    ids = range(23)
+    scheduler.register("look", lambda tick, part, period: visits.extend(id for id in ids if id % period == part), period=5, staggered=True)
+    for tick in range(5):
+        scheduler.run(tick)
+    assert sorted(visits) == list(ids)
+    # Each tick handles about a fifth of the ids
+    visits.clear()
+    scheduler.run(5)
+    assert visits == [id for id in ids if id % 5 == 0]
+
+def test_periodic_tasks_run_on_their_phase_in_registration_order():
+    scheduler = Scheduler()
+    runs = []
+    scheduler.register("every", lambda tick: runs.append(("every", tick)))
+    scheduler.register("third", lambda tick: runs.append(("third", tick)), period=3, phase=1)
+    for tick in range(7):
+        scheduler.run(tick)
+    assert [tick for name, tick in runs if name == "third"] == [1, 4]
+    assert runs[:3] == [("every", 0), ("every", 1), ("third", 1)]
+
+def test_register_replaces_in_place_and_rejects_bad_periods():
+    scheduler = Scheduler()
+    scheduler.register("a", print)
+    scheduler.register("b", print)
+    scheduler.register("a", repr)
+    assert [task.name for task in scheduler.tasks] == ["a", "b"] and scheduler.get("a").func is repr
+    scheduler.unregister("a")
+    assert scheduler.get("a") is None
+    with pytest.raises(ValueError):
+        scheduler.register("c", print, period=0)
@@ -0,0 +1,42 @@
+import level
+import savefile
+import scenario
+import sensors
+import ship
+
+def spot_torpedoes():
+    """A convoy with torpedoes in flight, looked for until some enemies have spotted one."""
+    scenario.build_scenario(10, 20, 10, seed=2)
+    # Torpedoes are only seen up close, put each one next to a destroyer
+    for torp, destroyer in zip(level.registry.of_type("torpedo"), level.registry.of_type("destroyer")):
+        torp.x, torp.y = destroyer.x + 50, destroyer.y
+    for tick in range(level.SENSOR_PERIOD):
+        level.updateSpatialIndex(tick)
+        sensors.update(tick, tick % level.SENSOR_PERIOD, level.SENSOR_PERIOD)
+    watched = [torp for torp in level.registry.of_type("torpedo") if torp.id in sensors.torpedoWatchers]
+    assert watched
+    return watched
+
+def spotted(entities):
+    return [torp for entity in entities if isinstance(entity, ship.enemyShip) for torp in entity.spottedTorpedoes]
+
+def test_despawn_forgets_spotted_torpedo():
+    torp = spot_torpedoes()[0]
+    torp.destroy()
+    assert torp.id not in sensors.torpedoWatchers
+    assert torp not in spotted(level.entityList)
+
+def test_save_and_load_right_after_a_torpedo_is_gone():
+    spot_torpedoes()[0].destroy()
+    entities, nextId = savefile.decode_level(savefile.encode(level.entityList, level.registry.nextId))
+    level.loadEntities(entities, nextId=nextId)
+    assert None not in spotted(level.entityList)
+    for tick in range(level.SENSOR_PERIOD):
+        sensors.update(tick, tick % level.SENSOR_PERIOD, level.SENSOR_PERIOD)
+
+def test_reset_skips_torpedoes_missing_from_older_saves():
+    spot_torpedoes()
+    watcher = next(entity for entity in level.entityList if isinstance(entity, ship.enemyShip) and entity.spottedTorpedoes)
+    watcher.spottedTorpedoes = (*watcher.spottedTorpedoes, None)
+    sensors.reset()
+    assert None not in watcher.spottedTorpedoes
@@ -0,0 +1,46 @@
+import random
+from types import SimpleNamespace
+from spatial import SpatialHash
+
+def points(count, seed=0):
+    rng = random.Random(seed)
+    return [SimpleNamespace(x=rng.uniform(-2000, 2000), y=rng.uniform(-2000, 2000)) for _ in range(count)]
+
+def inside(entity, x0, y0, x1, y1):
+    return x0 <= entity.x <= x1 and y0 <= entity.y <= y1
+
+def test_queries_find_every_entity_in_the_rect():
+    entities = points(500)
+    grid = SpatialHash(100)
+    grid.rebuild(entities)
+    rng = random.Random(1)
+    for _ in range(100):
+        x0, y0 = rng.uniform(-2500, 2000), rng.uniform(-2500, 2000)
+        x1, y1 = x0 + rng.uniform(0, 1500), y0 + rng.uniform(0, 1500)
+        found = {id(entity) for entity in grid.query_rect(x0, y0, x1, y1)}
+        assert {id(entity) for entity in entities if inside(entity, x0, y0, x1, y1)} <= found
+    # A query larger than the populated area walks the occupied cells instead
+    assert len(grid.query_rect(-10 ** 6, -10 ** 6, 10 ** 6, 10 ** 6)) == len(entities)
+
+def test_queries_are_padded_by_the_largest_hull():
+    grid = SpatialHash(100)
+    ship = SimpleNamespace(x=0, y=0, length=400, width=20, speed_max=10)
+    grid.insert(ship)
+    # The centre is three cells away but the bow reaches the query point
+    assert ship in grid.query_radius(190, 0, 1)
+    assert ship not in grid.query_radius(1000, 0, 1)
+
+def test_update_moves_and_drops_entities():
+    entities = points(50)
+    grid = SpatialHash(100)
+    grid.rebuild(entities)
+    moved = entities[0]
+    moved.x, moved.y = 5000, 5000
+    gone = entities.pop()
+    grid.update(entities)
+    assert len(grid) == len(entities) and gone not in grid
+    assert moved in grid.query_radius(5000, 5000, 10)
+    assert moved not in grid.query_rect(-2000, -2000, 2000, 2000)
+    grid.remove(moved)
+    grid.remove(moved)
+    assert moved not in grid and len(grid) == len(entities) - 1
@@ -0,0 +1,25 @@
+import pytest
+from timestep import FixedTimestep
+
+def test_steps_follow_the_accumulated_time():
+    timestep = FixedTimestep(60)
+    assert timestep.advance(1 / 120) == 0
+    assert timestep.alpha == pytest.approx(0.5)
+    assert timestep.advance(1 / 120) == 1
+    assert timestep.advance(2.5 / 60) == 2
+    assert timestep.alpha == pytest.approx(0.5)
+
+def test_long_frames_are_clamped_to_max_steps():
+    timestep = FixedTimestep(60, max_steps=5)
+    assert timestep.advance(1.0) == 5
+    # The rest of the long frame is dropped instead of being caught up later
+    assert timestep.accumulator == pytest.approx(0)
+    assert timestep.advance(1 / 60) == 1
+
+def test_reset_and_invalid_rate():
+    timestep = FixedTimestep(30)
+    timestep.advance(0.02)
+    timestep.reset()
+    assert timestep.alpha == 0
+    with pytest.raises(ValueError):
+        FixedTimestep(0)
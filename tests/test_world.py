@@ -0,0 +1,60 @@
+import math
+import level
+import scenario
+import ship
+
+TICKS = 60
+
+def run(useWorld):
+    """A convoy scenario with the player between the escorts, ticked with or without the world store."""
+    # No torpedoes, their hit checks see the other ships before or after they moved depending on the mode
+    scenario.build_scenario(12, 20, 0, seed=3)
+    player = level.playerShip
+    player.health_max = player.health = 10 ** 6
+    # Just south of the escort ring so the escorts spot the player, home in and open fire
+    player.x, player.y = 0, 1000
+    level.seedRandom(5)
+    level.enableWorld(useWorld)
+    for _ in range(TICKS):
+        level.updateLevel(False)
+    state = {entity.id: (entity.x, entity.y, entity.heading, entity.speed, entity.health, getattr(entity, "gun_time_lastFired", None))
+             for entity in level.entityList}
+    level.enableWorld(False)
+    return state, player.health
+
+def test_world_matches_per_object_ticking():
+    scalar, scalarHealth = run(False)
+    vector, vectorHealth = run(True)
+    assert scalarHealth < 10 ** 6, "no gun fired, the scenario doesn't exercise the AI"
+    assert vectorHealth == scalarHealth
+    assert scalar.keys() == vector.keys()
+    for entityId, (x, y, heading, speed, health, gunTime) in scalar.items():
+        worldX, worldY, worldHeading, worldSpeed, worldHealth, worldGunTime = vector[entityId]
+        assert math.isclose(x, worldX, abs_tol=1e-6)
+        assert math.isclose(y, worldY, abs_tol=1e-6)
+        assert math.isclose((heading - worldHeading + 180) % 360 - 180, 0, abs_tol=1e-6)
+        assert math.isclose(speed, worldSpeed, abs_tol=1e-6)
+        assert health == worldHealth and type(health) is type(worldHealth)
+        assert gunTime == worldGunTime
+
+def test_reads_come_from_the_instance_dict():
+    scenario.build_scenario(4, 4, 2)
+    level.enableWorld()
+    destroyer = next(iter(level.registry.of_type("destroyer")))
+    destroyer.x = 123
+    assert destroyer.x == 123 and level.world.columns["x"][destroyer._slot] == 123
+    level.updateLevel(False)
+    # The motion step writes the column, the dict follows it
+    assert destroyer.x == level.world.columns["x"][destroyer._slot].item()
+    assert "x" in destroyer.__getstate__() and "_world" not in destroyer.__getstate__()
+
+def test_spawned_ships_join_on_the_next_tick():
+    scenario.build_scenario(2, 2, 0)
+    level.enableWorld()
+    count = len(level.world)
+    torp = ship.torpedo(level.registry.next_id(), 90, 10, level.playerShip)
+    assert len(level.world) == count
+    level.updateLevel(False)
+    assert torp._world is level.world and len(level.world) == count + 1
+    torp.destroy()
+    assert len(level.world) == count and "_world" not in torp.__dict__
@@ -0,0 +1,69 @@
+from collections import OrderedDict
+import profiler
+
+# Cache of rendered text surfaces, shared by the UI so labels and values are only rendered when they change.
+#
+#   surface = textcache.text.render(font, "Speed", False, (25, 25, 25), static=True)
+#
+# Entries are keyed by (font, text, antialias, color). Values that change (stats, torpedo settings) go into an LRU
+# part of at most `capacity` surfaces, static labels are pinned and only rendered again when the screen resolution
+# changes (see set_resolution). Renders that missed the cache are counted as "text renders" in the profiler.
+
+class TextCache:
+    capacity: int
+    surfaces: OrderedDict  # Key -> surface, least recently used first
+    static: dict           # Key -> surface of the pinned labels
+    resolution: tuple | None
+    hits: int
+    misses: int
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.surfaces = OrderedDict()
+        self.static = {}
+        self.resolution = None
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.surfaces) + len(self.static)
+
+    def render(self, font, text: str, antialias: bool, color, static: bool = False):
+        """font.render(text, antialias, color), from the cache when the same text was rendered before."""
+        key = (font, text, antialias, tuple(color))
+        if static:
+            surface = self.static.get(key)
+        else:
+            surface = self.surfaces.get(key)
+            if surface is not None:
+                self.surfaces.move_to_end(key)
+        if surface is not None:
+            self.hits += 1
+            return surface
+        self.misses += 1
+        profiler.count("text renders")
+        surface = font.render(text, antialias, color)
+        if static:
+            self.static[key] = surface
+        else:
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.capacity:
+                self.surfaces.popitem(last=False)
+        return surface
+
+    def set_resolution(self, size: tuple):
+        """Drop every surface when the screen size changed since the last call."""
+        if size != self.resolution:
+            self.resolution = size
+            self.clear()
+
+    def clear(self):
+        self.surfaces.clear()
+        self.static.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0,
+                "cached": len(self.surfaces), "static": len(self.static)}
+
+text = TextCache() # Shared by gameui
@@ -0,0 +1,35 @@
+# Fixed timestep scheduling for the game loop.
+# Real frame time is accumulated and the simulation is stepped at a fixed rate, independent of the render rate.
+# alpha tells the renderers how far the current frame is between the last two simulation states.
+
+class FixedTimestep:
+    rate: float          # Simulation steps per second
+    step: float          # Seconds per simulation step
+    max_steps: int       # Most steps run in one frame, the rest of a long frame is dropped so the game never spirals
+    accumulator: float   # Real time not yet consumed by simulation steps
+
+    def __init__(self, rate: float, max_steps: int = 5):
+        if rate <= 0:
+            raise ValueError("Simulation rate must be positive")
+        self.rate = rate
+        self.step = 1 / rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def reset(self):
+        self.accumulator = 0.0
+
+    def advance(self, elapsed: float) -> int:
+        """Add elapsed real seconds, return how many simulation steps to run this frame."""
+        self.accumulator += elapsed
+        steps = int(self.accumulator / self.step)
+        if steps > self.max_steps:
+            steps = self.max_steps
+            self.accumulator = steps * self.step
+        self.accumulator -= steps * self.step
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        """Fraction of a step elapsed since the last simulation step, from 0 to 1."""
+        return min(self.accumulator / self.step, 1.0)
@@ -0,0 +1,315 @@
+import numpy as np
+import profiler
+import ship
+
+# Structure-of-arrays store for ship state.
+# Attached ships keep working as normal objects: their ship.SHIP_COLUMNS attributes are mirrored into the arrays
+# below (see ship.WorldColumn), so the motion step can run for every ship at once. Reads always come from the
+# instance dicts, so every other system (sensors, radio, spatial index, torpedo sweep) costs the same as without a
+# world. Assignments write the dict and the column, and after each vectorised pass the world copies the columns it
+# changed back into the dicts: STEP_COLUMNS after step(), the reload timers after countdown(), steering and throttle
+# after combat_ai() and the gun timers after gun_ai().
+#
+# World.step matches Ship.tick_motion to within MOTION_TOLERANCE (absolute, per tick) on positions, heading,
+# speed, visibility and noise. The only differences come from float rounding of the vectorised trig.
+# Columns are float64, except BOOL_COLUMNS, so the STEP_COLUMNS read back as floats after a step. Health, throttle
+# and the reload timers are written to the dicts as ints, like per-object ticking does, and save as ints. Every row has
+# every column. A ship only mirrors the attributes of its class's world_columns, so destroyer-only columns are
+# zero (and their guns unloaded) on the rows of other ships.
+#
+# Per-class work stays in Python but only runs for the classes that have any: tick_before and tick_after are called
+# for the attached ships whose class overrides them, except destroyer.tick_after, which countdown() runs for every
+# destroyer at once. Ships spawned during a tick are attached at the start of the next one. Torpedoes check for hits
+# once every ship has moved, per-object ticking checks them against the ships later in the list before those move.
+#
+# combat_ai and gun_ai are the batched destroyer.ai_combat_behavior and ai_gun_behavior. Gun decisions (range,
+# reload, hit rolls and damage order) are exact, the steering targets differ by float rounding only, like World.step.
+
+MOTION_TOLERANCE = 1e-9
+BOOL_COLUMNS = ("alive", "has_gun", "has_depthCharge", "has_hedgehog")
+STEP_COLUMNS = ("x", "y", "heading", "speed", "steer", "visibility", "noise", "alive") # Written by step
+# Destroyer reload timers run by countdown, (timer, whether the destroyer has the weapon)
+RELOAD_COLUMNS = (("gun_time_lastFired", "has_gun"), ("depthCharge_time_lastDropped", "has_depthCharge"),
+                  ("hedgehog_time_lastFired", "has_hedgehog"))
+# tick_after implementations the world runs vectorised instead of per ship
+VECTORISED_HOOKS = (ship.destroyer.tick_after,)
+
+def hooks(cls: type) -> tuple[bool, bool]:
+    """Whether the world has to call tick_before and tick_after on ships of this class."""
+    before = cls.tick_before is not ship.Ship.tick_before
+    after = cls.tick_after is not ship.Ship.tick_after and cls.tick_after not in VECTORISED_HOOKS
+    return before, after
+
+class World:
+    columns: dict[str, np.ndarray]  # Column name -> array, only the first `count` rows are in use
+    entities: list[ship.Ship]        # Attached ship for every used row
+    count: int
+    pending: list[ship.Entity]       # Spawned since the last tick, attached at the start of the next one
+    loose: list[ship.Entity]         # Entities that aren't ships, ticked one by one
+    before: list[ship.Ship]          # Attached ships whose class has its own tick_before
+    after: list[ship.Ship]           # Attached ships whose class has its own tick_after
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = max(1, capacity)
+        self.count = 0
+        self.entities = []
+        self.pending = []
+        self.loose = []
+        self.before = []
+        self.after = []
+        self.columns = {}
+        self._add_columns(ship.SHIP_COLUMNS)
+
+    def __len__(self):
+        return self.count
+
+    def _add_columns(self, names):
+        for name in names:
+            if name not in self.columns:
+                self.columns[name] = np.zeros(self.capacity, dtype=bool if name in BOOL_COLUMNS else np.float64)
+
+    def _grow(self):
+        self.capacity *= 2
+        for name, column in self.columns.items():
+            grown = np.zeros(self.capacity, dtype=column.dtype)
+            grown[:self.count] = column[:self.count]
+            self.columns[name] = grown
+
+    def attach(self, entity: ship.Ship):
+        """Copy the entity's column attributes into a new row, its assignments then update the row too."""
+        self.attach_all([entity])
+
+    def attach_all(self, entities):
+        """attach() for many ships, one array assignment per column and class."""
+        entities = [entity for entity in entities if entity.__dict__.get("_world") is not self]
+        if not entities:
+            return
+        while self.count + len(entities) > self.capacity:
+            self._grow()
+        groups = {}
+        for slot, entity in enumerate(entities, self.count):
+            groups.setdefault(entity.world_columns, ([], []))
+            groups[entity.world_columns][0].append(slot)
+            groups[entity.world_columns][1].append(entity)
+            entity.__dict__["_world"] = self
+            entity.__dict__["_slot"] = slot
+            before, after = hooks(type(entity))
+            if before:
+                self.before.append(entity)
+            if after:
+                self.after.append(entity)
+        for names, (slots, group) in groups.items():
+            self._add_columns(names)
+            for name in names:
+                self.columns[name][slots] = [entity.__dict__[name] for entity in group]
+        self.entities.extend(entities)
+        self.count += len(entities)
+
+    def detach(self, entity: ship.Entity):
+        """Unlink the entity and free its row (swap with the last one), its dict already holds its values."""
+        if entity.__dict__.get("_world") is not self:
+            if entity in self.pending:
+                self.pending.remove(entity)
+            elif entity in self.loose:
+                self.loose.remove(entity)
+            return
+        slot = entity.__dict__.pop("_slot")
+        del entity.__dict__["_world"]
+        last = self.count - 1
+        for column in self.columns.values():
+            column[slot] = column[last]
+        moved = self.entities.pop()
+        if moved is not entity:
+            self.entities[slot] = moved
+            moved.__dict__["_slot"] = slot
+        self.count = last
+        before, after = hooks(type(entity))
+        if before:
+            self.before.remove(entity)
+        if after:
+            self.after.remove(entity)
+
+    def detach_all(self):
+        while self.count:
+            self.detach(self.entities[-1])
+        self.pending.clear()
+        self.loose.clear()
+
+    def spawned(self, entity: ship.Entity):
+        """Called by level.spawn, the entity is attached once its constructor has finished."""
+        self.pending.append(entity)
+
+    def sync(self, entityList: list[ship.Entity]):
+        """Attach new ships from the entity list and detach ships that are no longer in it."""
+        present = {id(entity) for entity in entityList}
+        for entity in list(self.entities) + self.loose:
+            if id(entity) not in present:
+                self.detach(entity)
+        known = {id(entity) for entity in self.loose}
+        self.loose.extend(entity for entity in entityList if not isinstance(entity, ship.Ship) and id(entity) not in known)
+        self.attach_all([entity for entity in entityList if isinstance(entity, ship.Ship)])
+        self.pending.clear()
+
+    def tick(self, entityList: list[ship.Entity]):
+        """Drop-in replacement for calling tick_update on every entity of the list."""
+        if self.pending:
+            spawned, self.pending = self.pending, []
+            self.loose.extend(entity for entity in spawned if not isinstance(entity, ship.Ship))
+            self.attach_all([entity for entity in spawned if isinstance(entity, ship.Ship)])
+        for entity in list(self.loose):
+            entity.tick_update()
+        # tick_before may despawn its ship (a spent torpedo), which detaches it
+        stopped = {id(entity) for entity in list(self.before) if not entity.tick_before()}
+        started = profiler.start()
+        self.step()
+        self.countdown()
+        profiler.stop("movement", started)
+        for entity in list(self.after):
+            if entity.__dict__.get("_world") is self and id(entity) not in stopped:
+                entity.tick_after()
+
+    def mirror(self, names, rows=None):
+        """Copy the given columns back into the instance dicts of all attached ships or of the given rows."""
+        if rows is None:
+            entities = self.entities
+            values = [self.columns[name][:self.count].tolist() for name in names]
+        else:
+            entities = [self.entities[row] for row in rows.tolist()]
+            values = [self.columns[name][rows].tolist() for name in names]
+        for entity, row in zip(entities, zip(*values)):
+            entity.__dict__.update(zip(names, row))
+
+    def countdown(self):
+        """Vectorised destroyer.tick_after: loaded weapons count their reload time down by a tick."""
+        n = self.count
+        if n == 0 or "has_gun" not in self.columns:
+            return
+        for timer, has in RELOAD_COLUMNS:
+            column = self.columns[timer][:n]
+            rows = np.flatnonzero(self.columns[has][:n] & (column > 0))
+            if len(rows):
+                column[rows] -= 1
+                # The dicts count down on their own values, the timers stay ints like with per-object ticking
+                for row in rows.tolist():
+                    self.entities[row].__dict__[timer] -= 1
+
+    def step(self):
+        """Vectorised Ship.tick_motion for every attached ship."""
+        n = self.count
+        if n == 0:
+            return
+        c = {name: column[:n] for name, column in self.columns.items()}
+        x, y, heading, speed, throttle = c["x"], c["y"], c["heading"], c["speed"], c["throttle"]
+        steer, steer_target = c["steer"], c["steer_target"]
+        length, speed_max, speed_min = c["length"], c["speed_max"], c["speed_min"]
+        alive = c["alive"]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Position and heading, pivoting around a point 1/6 of the length ahead of the centre
+            forward = speed >= 0
+            pivot = np.where(forward, length * 1/6 * speed/speed_max, length * 1/6 * speed/speed_min)
+            rad = np.radians(heading)
+            x += (speed + pivot) * np.cos(rad)
+            y += (speed + pivot) * np.sin(rad)
+            heading[:] = (360 + heading + steer) % 360
+            rad = np.radians(heading)
+            x -= pivot * np.cos(rad)
+            y -= pivot * np.sin(rad)
+
+            # Throttle and speed
+            new_speed = speed.copy()
+            ahead = (throttle >= 0) & forward
+            ratio = speed/speed_max * 100
+            accelerate = ahead & (throttle > ratio)
+            decelerate = ahead & (throttle < ratio)
+            change = 1.5 - speed/speed_max
+            new_speed[accelerate] = np.minimum(speed + c["speed_acceleration"] * change, throttle*speed_max/100)[accelerate]
+            new_speed[decelerate] = (speed - c["speed_deceleration"] * change)[decelerate]
+            new_speed[ahead] = np.maximum(new_speed[ahead], 0)
+
+            astern = (throttle < 0) & (speed < 0)
+            ratio = speed/speed_min * 100
+            accelerate = astern & (throttle < ratio)
+            decelerate = astern & (throttle > ratio)
+            change = 1.5 - speed/-speed_min
+            new_speed[accelerate] = np.maximum(speed - c["speed_acceleration"] * change, throttle*speed_min/100)[accelerate]
+            new_speed[decelerate] = (speed + c["speed_deceleration"] * change)[decelerate]
+            new_speed[astern] = np.minimum(new_speed[astern], 0)
+            speed[:] = new_speed
+
+            # Steer and heading
+            steer_speed = c["steer_speed"]
+            right = alive & (steer_target > steer)
+            left = alive & (steer_target < steer)
+            steer[right] = np.minimum(steer + steer_speed, steer_target)[right]
+            steer[left] = np.maximum(steer - steer_speed, steer_target)[left]
+
+            # Visibility and noise
+            c["visibility"][:] = c["base_visibility"] * ((np.abs(speed) / speed_max) / 2 + 0.5)
+            c["noise"][:] = 10 + np.abs(throttle)
+
+        # Health
+        alive &= c["health"] > 0
+        sunk = np.flatnonzero(~alive & (throttle != 0))
+        throttle[sunk] = 0
+        self.mirror(STEP_COLUMNS)
+        # Throttle is only touched on the ships that went down, it keeps the int it was set with
+        for row in sunk.tolist():
+            self.entities[row].__dict__["throttle"] = 0
+
+    def combat_ai(self, player: ship.Ship, destroyers):
+        """Batched destroyer.ai_combat_behavior for the attached destroyers with a contact."""
+        if player is None or not player.alive:
+            return
+        # Destroyers with a contact to head for, see sensors.py
+        known = [entity for entity in destroyers if entity.lastKnownPosition is not None and entity.__dict__.get("_world") is self]
+        if not known:
+            return
+        slots = np.fromiter((entity.__dict__["_slot"] for entity in known), dtype=np.intp, count=len(known))
+        target = np.array([entity.lastKnownPosition for entity in known], dtype=np.float64)
+        c = self.columns
+
+        # Bearing to the last known position and the turn towards it
+        target_angle = np.degrees(np.arctan2(target[:, 1] - c["y"][slots], target[:, 0] - c["x"][slots])) % 360
+        angle_diff = (target_angle - c["heading"][slots] + 360) % 360
+        angle_diff[angle_diff > 180] -= 360
+        steer_max = c["steer_max"][slots]
+        c["steer_target"][slots] = np.where(np.abs(angle_diff) > c["steer_speed"][slots], np.clip(angle_diff, -steer_max, steer_max), c["steer_target"][slots])
+        c["throttle"][slots] = 100
+        self.mirror(("steer_target",), slots)
+        for entity in known:
+            entity.__dict__["throttle"] = 100
+
+    def gun_ai(self, player: ship.Ship, destroyers):
+        """Batched destroyer.ai_gun_behavior for the attached destroyers, in the given (spawn) order.
+        Like the per-object loop it stops at the destroyer whose gun kills the player, later ones keep their guns loaded."""
+        if player is None or not player.alive:
+            return
+        spotting = [entity for entity in destroyers if entity.spottedPlayer and entity.__dict__.get("_world") is self]
+        if not spotting:
+            return
+        slots = np.fromiter((entity.__dict__["_slot"] for entity in spotting), dtype=np.intp, count=len(spotting))
+        c = self.columns
+
+        # Guns that are loaded and in range, hit rolls are drawn in destroyer order from the same stream as attack_gun
+        distance = np.sqrt((player.x - c["x"][slots]) ** 2 + (player.y - c["y"][slots]) ** 2)
+        gun_range = c["gun_range"][slots]
+        fire = np.flatnonzero(c["has_gun"][slots] & (c["gun_time_lastFired"][slots] <= 0) & (distance <= gun_range))
+        if not len(fire):
+            return
+        from level import randomStream
+        gun = randomStream("gun")
+        chance = ((2 - distance[fire] / gun_range[fire]) * c["gun_accuracy"][slots[fire]]).tolist()
+        # Roll and damage in order, destroyers after the one that sinks the player neither roll nor fire this tick.
+        # The rolls stay one randint per firing destroyer instead of one batched draw: attack_gun draws them from the
+        # "gun" stream in this order, and a replay only stays in step with the recording if both modes draw alike
+        for n, index in enumerate(fire.tolist()):
+            if chance[n] > gun.randint(0, 100):
+                player.take_damage(spotting[index].gun_damage)
+                if not player.alive:
+                    fire = fire[:n + 1]
+                    break
+        c["gun_time_lastFired"][slots[fire]] = c["gun_time_reload"][slots[fire]]
+        for index in fire.tolist():
+            state = spotting[index].__dict__
+            state["gun_time_lastFired"] = state["gun_time_reload"]